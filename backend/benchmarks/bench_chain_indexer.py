@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Chain indexer catch-up benchmark against the in-process mock chain node
+Builds a chain of N blocks of privachain registrations on the mock node, lets
+ChainIndexer catch up from height 0 through the real tx_search / blockchain RPC
+path, then orphans the newest blocks to exercise re-org rollback and times the
+indexed domain history and ownership reads.
+
+Requires a running MongoDB: MONGO_URL=mongodb://localhost:27017
+Usage: python backend/benchmarks/bench_chain_indexer.py [--blocks 5000] [--txs-per-block 2] [--msgs-per-tx 4]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Settings read when the services are constructed
+os.environ.setdefault('COSMOS_WEBSOCKET_URL', 'off')
+os.environ.setdefault('COSMOS_STATUS_REFRESH_SECONDS', '0.2')
+os.environ.setdefault('COSMOS_INDEXER_POLL_SECONDS', '0.05')
+os.environ.setdefault('COSMOS_INDEXER_START_HEIGHT', '1')
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks.mock_chain_node import MockChainNode
+from services.chain_indexer import chain_indexer
+from services.cosmos_service import CosmosService
+from services.index_service import IndexManager
+
+BENCH_DB = 'privachain_indexer_bench'
+MOCK_ENDPOINT = "http://mock-chain-node"
+SIGNER = "cosmos1benchsigner"
+
+
+def build_chain(node: MockChainNode, blocks: int, txs_per_block: int, msgs_per_tx: int, domains: int):
+    """Commit blocks of RegisterDomain / RegisterContent msgs straight into the mock node"""
+    registration = 0
+    for _ in range(blocks):
+        for _ in range(txs_per_block):
+            msgs = []
+            for _ in range(msgs_per_tx):
+                # Domains are re-registered as the chain grows, so state upserts overwrite
+                name = f"bench{registration % domains}"
+                msgs.append({"type": "privachain/RegisterDomain", "value": {
+                    "domain": name, "content_hash": f"QmBench{registration:010d}", "owner": f"cosmos1owner{registration % 97}",
+                    "metadata": {"title": f"Bench domain {name}"}, "timestamp": f"2026-01-01T00:00:{registration % 60:02d}Z"
+                }})
+                registration += 1
+            msgs.append({"type": "privachain/RegisterContent", "value": {
+                "content_hash": f"QmContent{registration:010d}", "content_type": "text/html", "owner": "cosmos1content"
+            }})
+            node.check_tx({
+                "chain_id": node.chain_id, "account_number": "0", "sequence": str(node.account(SIGNER)['sequence']),
+                "signed_by": SIGNER, "memo": "", "msgs": msgs,
+                "fee": {"amount": [{"denom": "uatom", "amount": "1"}], "gas": "100000"}
+            })
+        node.commit_block()
+    return registration
+
+
+async def wait_for_height(indexer, height: int, timeout: float = 600):
+    deadline = time.monotonic() + timeout
+    while indexer.indexed_height < height and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+
+async def run(db, args):
+    for name in ('chain_events', 'chain_domains', 'chain_contents', 'chain_indexer_state'):
+        await db[name].drop()
+    await IndexManager().apply(db)
+
+    node = MockChainNode(verify_signatures=False, block_time=3600)
+    start = time.perf_counter()
+    registrations = build_chain(node, args.blocks, args.txs_per_block, args.msgs_per_tx, args.domains)
+    print(f"mock chain         {node.height} blocks, {registrations} domain registrations built in {time.perf_counter() - start:.1f} s")
+
+    service = CosmosService(rpc_endpoint=MOCK_ENDPOINT, chain_id=node.chain_id, simulate=False)
+    service.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=node.app), timeout=30.0)
+    await service.initialize()
+
+    # The global indexer, which CosmosService reads history and ownership from
+    indexer = chain_indexer
+    indexer.batch_blocks = args.batch_blocks
+    start = time.perf_counter()
+    await indexer.initialize(db, service)
+    await wait_for_height(indexer, node.height)
+    elapsed = time.perf_counter() - start
+    stats = indexer.get_stats()
+    print(f"catch-up           {stats['blocks_indexed']} blocks, {stats['txs_indexed']} txs, {stats['events_indexed']} events "
+          f"in {elapsed:.2f} s ({stats['blocks_indexed'] / elapsed:.0f} blocks/s, {stats['events_indexed'] / elapsed:.0f} events/s)")
+
+    # Re-org: the newest blocks are replaced by empty ones, then the chain moves on
+    indexed_domains = await db.chain_domains.count_documents({})
+    node.orphan_blocks(args.reorg_depth)
+    for _ in range(3):
+        node.commit_block()
+    start = time.perf_counter()
+    await wait_for_height(indexer, node.height)
+    rolled_back = await db.chain_domains.count_documents({})
+    mismatched = 0
+    async for doc in db.chain_domains.find({}, {'domain': 1, 'content_hash': 1}):
+        mismatched += node.domains.get(doc['domain'], {}).get('content_hash') != doc['content_hash']
+    print(f"re-org             {args.reorg_depth} blocks orphaned, recovered in {time.perf_counter() - start:.2f} s   "
+          f"domains {indexed_domains} -> {rolled_back} (node {len(node.domains)}), {mismatched} mismatched")
+
+    for label, call in (('domain history', lambda i: service.get_domain_history(f"bench{i % args.domains}.prv")),
+                        ('ownership check', lambda i: service.validate_domain_ownership(f"bench{i % args.domains}.prv", "cosmos1owner0"))):
+        timings = []
+        for i in range(args.lookups):
+            start = time.perf_counter()
+            await call(i)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"{label:<18} p50 {statistics.median(timings) * 1e3:6.2f} ms   p99 {timings[int(len(timings) * 0.99) - 1] * 1e3:6.2f} ms")
+
+    print(f"\nindexer            {indexer.get_stats()}")
+    await indexer.stop()
+    await service.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--blocks', type=int, default=5000)
+    parser.add_argument('--txs-per-block', type=int, default=2)
+    parser.add_argument('--msgs-per-tx', type=int, default=4)
+    parser.add_argument('--domains', type=int, default=20000, help='distinct domain names registered')
+    parser.add_argument('--batch-blocks', type=int, default=1000)
+    parser.add_argument('--reorg-depth', type=int, default=5)
+    parser.add_argument('--lookups', type=int, default=500)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    try:
+        await run(client[BENCH_DB], args)
+    finally:
+        await client.drop_database(BENCH_DB)
+        client.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+End-to-end CosmosService benchmark against the in-process mock chain node
+Runs the real (non-simulated) broadcast, confirmation, query and status paths
+with no network: registers domains concurrently, waits for every transaction
+to be committed, then resolves registered and unknown .prv domains.
+Latency, jitter, error rate and block time of the mock node are configurable.
+
+Usage: python backend/benchmarks/bench_cosmos_e2e.py [--registrations N] [--latency-ms MS] [--error-rate P]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Settings read when the services are constructed
+os.environ.setdefault('COSMOS_WEBSOCKET_URL', 'off')
+os.environ.setdefault('COSMOS_TX_POLL_SECONDS', '0.25')
+
+import httpx
+
+from benchmarks.mock_chain_node import MockChainNode
+from services.cosmos_service import CosmosService
+from services.tx_tracker import CONFIRMED
+
+MOCK_ENDPOINT = "http://mock-chain-node"
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[max(int(len(samples) * 0.99) - 1, 0)]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--registrations', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--jitter-ms', type=float, default=5.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--block-time', type=float, default=0.5)
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    node = MockChainNode(block_time=args.block_time, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         error_rate=args.error_rate, seed=1)
+    await node.start()
+
+    service = CosmosService(rpc_endpoint=MOCK_ENDPOINT, chain_id=node.chain_id, simulate=False)
+    service.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=node.app), timeout=10.0)
+    await service.initialize()
+
+    # Registrations: broadcast latency, then time until committed
+    semaphore = asyncio.Semaphore(args.concurrency)
+    broadcast_latency, results = [], []
+
+    async def register(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            result = await service.register_domain(f"bench{i}.prv", f"QmBench{i:08d}", "cosmos1bench")
+            broadcast_latency.append(time.perf_counter() - start)
+            results.append(result)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(register(i) for i in range(args.registrations)))
+    broadcast_elapsed = time.perf_counter() - start
+    accepted = [r for r in results if r.get("success")]
+    settled = await asyncio.gather(*(service.tx_tracker.wait(r["tx_hash"]) for r in {r["tx_hash"]: r for r in accepted}.values()))
+    committed_elapsed = time.perf_counter() - start
+    confirmed = sum(1 for status in settled if status and status["status"] == CONFIRMED)
+
+    p50, p99 = percentiles(broadcast_latency)
+    print(f"registrations      {len(accepted)}/{args.registrations} accepted in {broadcast_elapsed:.2f} s "
+          f"({len(accepted) / broadcast_elapsed:.0f}/s)   p50 {p50 * 1000:.1f} ms   p99 {p99 * 1000:.1f} ms")
+    print(f"committed          {confirmed}/{len(settled)} txs confirmed after {committed_elapsed:.2f} s")
+
+    # Resolution: registered domains come from the local registry, unknown ones from abci_query (+ cache)
+    for label, names in (('registered .prv', [f"bench{i % args.registrations}.prv" for i in range(args.lookups)]),
+                         ('unknown .prv', [f"missing{i % 50}.prv" for i in range(args.lookups)])):
+        timings = []
+        for name in names:
+            start = time.perf_counter()
+            await service.resolve_prv_domain(name)
+            timings.append(time.perf_counter() - start)
+        p50, p99 = percentiles(timings)
+        print(f"resolve {label:<16} p50 {p50 * 1e6:8.1f} us   p99 {p99 * 1e6:8.1f} us")
+
+    start = time.perf_counter()
+    for _ in range(args.lookups):
+        await service.get_chain_info()
+    print(f"get_chain_info     {(time.perf_counter() - start) / args.lookups * 1e6:.1f} us per call")
+
+    print(f"\nsequence manager   {service.sequence_manager.get_stats()}")
+    print(f"tx batcher         {service.tx_batcher.get_stats()}")
+    print(f"mock node          {node.get_stats()}")
+
+    await service.close()
+    await node.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Cosmos signing benchmark
+Verifies a produced signature, then measures signatures per second: the legacy
+JSON-hash placeholder, sign() inline, and asign() on the signer pool. Address and
+bech32 test vectors live in tests/test_cosmos_signer.py.
+
+Usage: python backend/benchmarks/bench_cosmos_signing.py [--signatures N]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.cosmos_signer import CosmosSigner, canonical_json, sign_doc_bytes
+
+# Fixed throwaway key, so runs are comparable
+BENCH_PRIVATE_KEY = hashlib.sha256(b"privachain signing benchmark").hexdigest()
+
+
+def sample_transaction(sequence: int):
+    msgs = [{
+        "type": "privachain/RegisterContent",
+        "value": {"content_hash": f"QmBench{i:08d}", "content_type": "benchmark", "owner": "cosmos1bench"}
+    } for i in range(8)]
+    fee = {"amount": [{"denom": "uatom", "amount": "22500"}], "gas": "900000"}
+    return {"chain_id": "theta-testnet-001", "account_number": "42", "sequence": str(sequence),
+            "fee": fee, "msgs": msgs, "memo": "bench", "timeout_height": "0"}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--signatures', type=int, default=20000)
+    args = parser.parse_args()
+
+    signer = CosmosSigner(BENCH_PRIVATE_KEY)
+    transaction = sample_transaction(0)
+    fee_json, msgs_json = canonical_json(transaction["fee"]), canonical_json(transaction["msgs"])
+    doc = sign_doc_bytes("theta-testnet-001", "42", "0", fee_json, msgs_json, "bench")
+    assert doc == canonical_json({k: v for k, v in transaction.items() if k != "timeout_height"}).encode()
+    assert signer.verify(signer.sign(doc), doc)
+
+    start = time.perf_counter()
+    for sequence in range(args.signatures):
+        transaction["sequence"] = str(sequence)
+        tx_hash = hashlib.sha256(json.dumps(transaction, sort_keys=True).encode()).hexdigest()
+        hashlib.sha256(f"{'0' * 64}{tx_hash}".encode()).digest()
+    legacy = args.signatures / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for sequence in range(args.signatures):
+        signer.sign(sign_doc_bytes("theta-testnet-001", "42", str(sequence), fee_json, msgs_json, "bench"))
+    inline = args.signatures / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        signer.asign(sign_doc_bytes("theta-testnet-001", "42", str(sequence), fee_json, msgs_json, "bench"))
+        for sequence in range(args.signatures)
+    ))
+    pooled = args.signatures / (time.perf_counter() - start)
+    signer.shutdown()
+
+    print(f"\nlegacy JSON-hash placeholder  {legacy:10.0f} /s  (no real signature)")
+    print(f"secp256k1 sign() inline       {inline:10.0f} /s")
+    print(f"secp256k1 asign() pooled      {pooled:10.0f} /s  ({signer.workers} workers, event loop free)")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Domain search index benchmark
+Indexes N synthetic .prv domains (names, titles and descriptions drawn from a
+Zipf-like vocabulary), then measures query latency for whole-word, multi-word,
+prefix and exact-name queries, plus incremental updates on the full index and
+prefix queries interleaved with new registrations.
+
+Usage: python backend/benchmarks/bench_domain_search.py [--domains N] [--queries N]
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.domain_search import DomainSearchIndex
+
+
+def make_vocabulary(rng: random.Random, size: int):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 9))))
+    return sorted(words)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[max(int(len(samples) * 0.99) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--domains', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--vocabulary', type=int, default=50_000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng, args.vocabulary)
+    # Zipf-like word popularity: a few very common words, a long tail of rare ones
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def words(count):
+        return rng.choices(vocabulary, cum_weights=cumulative, k=count)
+
+    index = DomainSearchIndex()
+    names = []
+    start = time.perf_counter()
+    for i in range(args.domains):
+        name = "-".join(words(rng.randint(1, 2))) + str(i)
+        names.append(name)
+        index.add(f"{name}.prv", {"title": " ".join(words(4)), "description": " ".join(words(12))},
+                  f"QmSynthetic{i:010d}", f"cosmos1owner{i % 1000}")
+    build_elapsed = time.perf_counter() - start
+    print(f"build              {args.domains} domains in {build_elapsed:.1f} s "
+          f"({args.domains / build_elapsed:.0f}/s)   {index.get_stats()['terms']} terms")
+
+    # Warm up: impact-orders the postings touched by the first queries
+    for word in vocabulary[:2000]:
+        index.search(word)
+
+    query_sets = {
+        'one word': [words(1)[0] for _ in range(args.queries)],
+        'two words': [" ".join(words(2)) for _ in range(args.queries)],
+        'prefix': [words(1)[0][:3] for _ in range(args.queries)],
+        'exact name': [rng.choice(names) for _ in range(args.queries)]
+    }
+    for label, queries in query_sets.items():
+        timings, empty = [], 0
+        for query in queries:
+            start = time.perf_counter()
+            results = index.search(query, 10)
+            timings.append(time.perf_counter() - start)
+            empty += not results
+        p50, p99 = percentiles(timings)
+        print(f"query {label:<12} p50 {p50 * 1e6:8.1f} us   p99 {p99 * 1e6:8.1f} us   empty {empty}")
+
+    timings = []
+    for i in range(args.queries):
+        name = rng.choice(names)
+        start = time.perf_counter()
+        index.add(f"{name}.prv", {"title": " ".join(words(4)), "description": " ".join(words(12))}, f"QmUpdated{i:010d}", "cosmos1updater")
+        timings.append(time.perf_counter() - start)
+    p50, p99 = percentiles(timings)
+    print(f"update             p50 {p50 * 1e6:8.1f} us   p99 {p99 * 1e6:8.1f} us")
+
+    # Steady registrations: every new domain adds new terms, each followed by a prefix query
+    timings = []
+    for i in range(args.queries):
+        name = "-".join(words(rng.randint(1, 2))) + f"new{i}"
+        index.add(f"{name}.prv", {"title": " ".join(words(4)), "description": " ".join(words(12))}, f"QmNew{i:010d}", "cosmos1new")
+        query = words(1)[0][:3]
+        start = time.perf_counter()
+        index.search(query, 10)
+        timings.append(time.perf_counter() - start)
+    p50, p99 = percentiles(timings)
+    print(f"prefix after insert p50 {p50 * 1e6:7.1f} us   p99 {p99 * 1e6:8.1f} us")
+    print(f"\nindex              {index.get_stats()}")
+
+
+if __name__ == '__main__':
+    main()
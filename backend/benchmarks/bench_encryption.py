@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+IPFS encryption microbenchmark
+Compares encrypt/decrypt throughput of the legacy per-call PBKDF2 path against
+the HKDF key schedule with the derived-key cache.
+
+Usage: python backend/benchmarks/bench_encryption.py [--ops N] [--size BYTES]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.privacy_service import IPFSEncryptionService, HKDF_KDF, LEGACY_KDF
+
+
+def make_service(kdf: str, cache_size: int) -> IPFSEncryptionService:
+    service = IPFSEncryptionService(key_cache_size=cache_size)
+    asyncio.run(service.initialize())
+    service.kdf = kdf
+    return service
+
+
+def run_case(name: str, service: IPFSEncryptionService, payload: bytes, ops: int, reads_per_envelope: int):
+    start = time.perf_counter()
+    envelopes = [service.encrypt_content(payload) for _ in range(ops)]
+    encrypt_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(reads_per_envelope):
+        for envelope in envelopes:
+            assert service.decrypt_content(envelope) == payload
+    decrypt_elapsed = time.perf_counter() - start
+    decrypt_ops = ops * reads_per_envelope
+
+    print(f"{name:<28} encrypt {ops / encrypt_elapsed:>10.1f} ops/s   "
+          f"decrypt {decrypt_ops / decrypt_elapsed:>10.1f} ops/s")
+    return envelopes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ops", type=int, default=50, help="envelopes per case (one inbox page is 50)")
+    parser.add_argument("--size", type=int, default=1024, help="plaintext size in bytes")
+    parser.add_argument("--reads", type=int, default=3, help="times each envelope is decrypted (repeat inbox loads)")
+    args = parser.parse_args()
+
+    payload = b"x" * args.size
+    print(f"{args.ops} envelopes of {args.size} bytes, each decrypted {args.reads}x\n")
+
+    run_case("legacy PBKDF2 (uncached)", make_service(LEGACY_KDF, 0), payload, args.ops, args.reads)
+    run_case("legacy PBKDF2 (LRU cached)", make_service(LEGACY_KDF, 4096), payload, args.ops, args.reads)
+    run_case("HKDF (uncached)", make_service(HKDF_KDF, 0), payload, args.ops, args.reads)
+    service = make_service(HKDF_KDF, 4096)
+    run_case("HKDF (LRU cached)", service, payload, args.ops, args.reads)
+    print(f"\nkey cache: {service.key_cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+IPFS gateway pool benchmark: single gateway vs health-scored hedged pool
+Stand-in gateways run in-process behind an httpx mock transport. Each one has a
+base latency plus a heavy tail (a fraction of requests stall), and one can be
+made to refuse connections to exercise the circuit breaker. The same request
+stream is sent through a single-gateway pool (the old fixed-gateway behaviour)
+and through the hedged pool, and latency percentiles are compared.
+
+Usage: python backend/benchmarks/bench_ipfs_gateways.py [--requests 2000] [--tail-rate 0.05] [--tail-ms 800]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+from services.ipfs_gateway_pool import IPFSGatewayPool
+from services.unixfs import compute_cid
+
+BODY = b"x" * 4096
+
+
+def make_transport(profiles, rng: random.Random):
+    """Mock transport answering per gateway host with (base_ms, jitter_ms, tail_rate, tail_ms, down)"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        base_ms, jitter_ms, tail_rate, tail_ms, down = profiles[request.url.host]
+        if down:
+            raise httpx.ConnectError("connection refused", request=request)
+        delay = base_ms + rng.uniform(0, jitter_ms)
+        if rng.random() < tail_rate:
+            delay += tail_ms
+        await asyncio.sleep(delay / 1000)
+        return httpx.Response(200, content=BODY, headers={"content-type": "application/octet-stream"})
+    return httpx.MockTransport(handler)
+
+
+async def run(pool: IPFSGatewayPool, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    timings, failures = [], 0
+    cids = [compute_cid(str(i).encode()) for i in range(requests)]
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await pool.fetch(cids[i])
+                timings.append(time.perf_counter() - start)
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    timings.sort()
+    return timings, failures
+
+
+def report(label: str, timings, failures: int, pool: IPFSGatewayPool):
+    def pct(p):
+        return timings[min(int(len(timings) * p), len(timings) - 1)] * 1000
+    upstream = sum(gateway.stats['requests'] for gateway in pool.gateways)
+    print(f"{label:<16} p50 {statistics.median(timings) * 1000:7.1f} ms   p95 {pct(0.95):7.1f} ms   "
+          f"p99 {pct(0.99):7.1f} ms   max {timings[-1] * 1000:7.1f} ms   failures {failures}   "
+          f"upstream requests {upstream} ({upstream / max(len(timings) + failures, 1):.2f}/req)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--tail-rate', type=float, default=0.05, help='fraction of requests that stall')
+    parser.add_argument('--tail-ms', type=float, default=800)
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    rng = random.Random(args.seed)
+    profiles = {
+        'kubo.local': (0, 0, 0, 0, True),                                  # local node not running
+        'gateway-a': (20, 10, args.tail_rate, args.tail_ms, False),
+        'gateway-b': (35, 15, args.tail_rate, args.tail_ms, False),
+        'gateway-c': (60, 30, args.tail_rate, args.tail_ms, False),
+    }
+    client = httpx.AsyncClient(transport=make_transport(profiles, rng))
+
+    single = IPFSGatewayPool(["http://gateway-a"], client_factory=lambda: client, max_attempts=1)
+    timings, failures = await run(single, args.requests, args.concurrency)
+    report("single gateway", timings, failures, single)
+
+    pool = IPFSGatewayPool(["http://kubo.local", "http://gateway-a", "http://gateway-b", "http://gateway-c"],
+                           client_factory=lambda: client)
+    # Warm-up fills the latency windows the hedge delays are derived from
+    await run(pool, 200, args.concurrency)
+    for gateway in pool.gateways:
+        gateway.stats['requests'] = 0
+    timings, failures = await run(pool, args.requests, args.concurrency)
+    report("hedged pool", timings, failures, pool)
+
+    print(f"\npool               {pool.stats}")
+    for gateway in pool.gateways:
+        print(f"  {gateway.snapshot()}")
+    await client.aclose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Inbox query benchmark with and without the declared MongoDB indexes
+Seeds a scratch database with messages, times the GET /api/messages query
+(sender and recipient branches sorted by timestamp, id and merged) before
+and after IndexManager.apply(), and prints the winning plan stages.
+
+Requires a running MongoDB: MONGO_URL=mongodb://localhost:27017
+Usage: python backend/benchmarks/bench_message_indexes.py [--messages 1000000]
+"""
+
+import argparse
+import asyncio
+import heapq
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.index_service import IndexManager, INDEX_SPECS
+
+BENCH_DB = 'privachain_index_bench'
+
+
+async def seed(db, total: int, users: int):
+    print(f"Seeding {total:,} messages across {users:,} users...")
+    await db.messages.drop()
+    base = datetime.now(timezone.utc)
+    batch = []
+    for i in range(total):
+        sender, recipient = random.sample(range(users), 2)
+        batch.append({
+            'id': str(uuid.uuid4()),
+            'sender': f"user{sender}",
+            'recipient': f"user{recipient}",
+            'content': 'x' * 200,
+            'timestamp': base - timedelta(seconds=i),
+            'encrypted': False,
+            'message_type': 'text'
+        })
+        if len(batch) == 10000:
+            await db.messages.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.messages.insert_many(batch, ordered=False)
+
+
+async def time_inbox(db, users: int, runs: int):
+    timings = []
+    for _ in range(runs):
+        user_id = f"user{random.randrange(users)}"
+        start = time.perf_counter()
+        sent, received = await asyncio.gather(*(
+            db.messages.find({field: user_id}).sort([('timestamp', -1), ('id', -1)]).limit(50).to_list(length=None)
+            for field in ('sender', 'recipient')
+        ))
+        list(heapq.merge(sent, received, key=lambda m: (m['timestamp'], m['id']), reverse=True))[:50]
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--messages', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--keep', action='store_true', help='keep the scratch database afterwards')
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client[BENCH_DB]
+    manager = IndexManager(specs={'messages': INDEX_SPECS['messages']})
+
+    try:
+        await seed(db, args.messages, args.users)
+
+        plans = await manager.check_query_plans(db)
+        p50, p99 = await time_inbox(db, args.users, max(args.runs // 10, 3))
+        print(f"without indexes: p50 {p50:9.2f} ms   p99 {p99:9.2f} ms   plan {plans.get('messages.inbox_sent')}")
+
+        start = time.perf_counter()
+        await manager.apply(db)
+        print(f"index build: {time.perf_counter() - start:.1f} s")
+
+        plans = await manager.check_query_plans(db)
+        p50, p99 = await time_inbox(db, args.users, args.runs)
+        print(f"with indexes:    p50 {p50:9.2f} ms   p99 {p99:9.2f} ms   plan {plans.get('messages.inbox_sent')}")
+    finally:
+        if not args.keep:
+            await client.drop_database(BENCH_DB)
+        client.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
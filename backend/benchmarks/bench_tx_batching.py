@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Registration throughput benchmark for transaction batching
+Fires concurrent register_content calls through CosmosService against the
+simulated testnet broadcast and reports registrations per second, the number
+of transactions signed and the fees paid, with batching off (one msg per tx)
+and on.
+
+Usage: python backend/benchmarks/bench_tx_batching.py [--registrations N] [--concurrency C]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.cosmos_service import CosmosService
+from services.tx_batcher import TxBatcher
+
+
+async def run(max_msgs: int, registrations: int, concurrency: int):
+    service = CosmosService()
+    service.tx_batcher = TxBatcher(service._submit_transaction, max_msgs=max_msgs)
+    semaphore = asyncio.Semaphore(concurrency)
+    fees = []
+    broadcast = service._broadcast_transaction
+
+    async def counted_broadcast(signed_tx, tx_type):
+        result = await broadcast(signed_tx, tx_type)
+        fees.append(result.get("fee_paid", 0))
+        return result
+
+    service._broadcast_transaction = counted_broadcast
+
+    async def register(i: int):
+        async with semaphore:
+            await service.register_content(f"QmBench{i:08d}", "benchmark", "cosmos1bench")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(register(i) for i in range(registrations)))
+    elapsed = time.perf_counter() - start
+    await service.tx_batcher.close()
+    return elapsed, service.transaction_count, sum(fees)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--registrations', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--max-msgs', type=int, default=32)
+    args = parser.parse_args()
+
+    for label, max_msgs in (('unbatched', 1), (f'batched ({args.max_msgs}/tx)', args.max_msgs)):
+        elapsed, txs, fees = await run(max_msgs, args.registrations, args.concurrency)
+        print(f"{label:<20} {args.registrations / elapsed:9.1f} registrations/s   "
+              f"{txs:6d} txs   {fees:10,d} uatom fees")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
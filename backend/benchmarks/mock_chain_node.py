@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Mock Cosmos chain node for offline load tests
+Serves the Tendermint RPC and Cosmos REST endpoints CosmosService calls
+(/status, /abci_query, /tx_search, /blockchain, /cosmos/tx/v1beta1/txs, tx lookup
+by hash, bank balances and auth accounts) from an in-memory state machine:
+- Broadcasts are checked like CheckTx would: account sequence and secp256k1 signature
+- Accepted transactions are committed in the next block, every --block-time seconds,
+  applying RegisterDomain / RegisterContent / RegisterMessage / RecordDomainAccess msgs
+- Every request can be slowed (--latency-ms, --jitter-ms) or failed (--error-rate)
+- orphan_blocks() replaces the newest blocks with empty ones to simulate a re-org
+
+Standalone (needs uvicorn): python backend/benchmarks/mock_chain_node.py [--port 26657]
+then start the backend with COSMOS_RPC_ENDPOINT=http://127.0.0.1:26657
+COSMOS_WEBSOCKET_URL=off. In-process, mount MockChainNode().app on an
+httpx.ASGITransport (see bench_cosmos_e2e.py).
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import coincurve
+import coincurve.ecdsa
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from services.cosmos_signer import canonical_json, sign_doc_bytes
+
+INITIAL_BALANCE = 10_000_000_000
+
+
+class MockChainNode:
+    def __init__(self, chain_id: str = "mock-chain-1", block_time: float = 1.0, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0, verify_signatures: bool = True, seed: int = None):
+        self.chain_id = chain_id
+        self.block_time = block_time
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.verify_signatures = verify_signatures
+        self.random = random.Random(seed)
+
+        self.height = 1
+        self.block_time_iso = datetime.now(timezone.utc).isoformat()
+        self.forks = 0
+        # height -> {"hash", "time", "txs": [tx hashes]}
+        self.blocks: Dict[int, Dict[str, Any]] = {1: {"hash": self._block_hash(1, "genesis"), "time": self.block_time_iso, "txs": []}}
+        self.accounts: Dict[str, Dict[str, int]] = {}
+        self.mempool: List[Dict[str, Any]] = []
+        self.committed: Dict[str, Dict[str, Any]] = {}
+        self.domains: Dict[str, Dict[str, Any]] = {}
+        self.contents: Dict[str, Dict[str, Any]] = {}
+        self.messages = 0
+        self.domain_views = 0
+        self.stats = {
+            'requests': 0,
+            'injected_errors': 0,
+            'txs_accepted': 0,
+            'txs_rejected': 0,
+            'sequence_mismatches': 0,
+            'bad_signatures': 0,
+            'msgs_committed': 0,
+            'blocks': 0,
+            'orphaned_blocks': 0
+        }
+        self._block_task: Optional[asyncio.Task] = None
+        self.app = self._create_app()
+
+    # --- state machine -------------------------------------------------------
+
+    def account(self, address: str) -> Dict[str, int]:
+        if address not in self.accounts:
+            self.accounts[address] = {'account_number': len(self.accounts) + 1, 'sequence': 0, 'balance': INITIAL_BALANCE}
+        return self.accounts[address]
+
+    def check_tx(self, tx: Dict[str, Any]) -> Dict[str, Any]:
+        """CheckTx: returns a tx_response; accepted transactions go to the mempool"""
+        address = tx.get("signed_by") or "unknown"
+        account = self.account(address)
+        sequence = int(tx.get("sequence", -1))
+
+        if sequence != account['sequence']:
+            self.stats['sequence_mismatches'] += 1
+            return self._rejected(32, f"account sequence mismatch, expected {account['sequence']}, got {sequence}: incorrect account sequence")
+        if str(tx.get("account_number")) not in (str(account['account_number']), "0"):
+            return self._rejected(4, f"signature verification failed; verify correct account number ({account['account_number']})")
+        if self.verify_signatures and not self._signature_valid(tx):
+            self.stats['bad_signatures'] += 1
+            return self._rejected(4, "signature verification failed; please verify account number, sequence and chain-id")
+
+        account['sequence'] += 1
+        tx_hash = hashlib.sha256(canonical_json(tx).encode()).hexdigest().upper()
+        self.mempool.append({'hash': tx_hash, 'tx': tx, 'address': address})
+        self.stats['txs_accepted'] += 1
+        return {"txhash": tx_hash, "code": 0, "height": "0", "raw_log": "[]"}
+
+    def _rejected(self, code: int, log: str) -> Dict[str, Any]:
+        self.stats['txs_rejected'] += 1
+        return {"txhash": "", "code": code, "codespace": "sdk", "height": "0", "raw_log": log}
+
+    def _signature_valid(self, tx: Dict[str, Any]) -> bool:
+        try:
+            signature = tx["signatures"][0]
+            public_key = base64.b64decode(signature["pub_key"]["value"])
+            compact = base64.b64decode(signature["signature"])
+            doc = sign_doc_bytes(tx["chain_id"], tx["account_number"], tx["sequence"],
+                                 canonical_json(tx["fee"]), canonical_json(tx["msgs"]), tx["memo"])
+            der = coincurve.ecdsa.cdata_to_der(coincurve.ecdsa.deserialize_compact(compact))
+            return tx["chain_id"] == self.chain_id and coincurve.PublicKey(public_key).verify(der, doc)
+        except Exception:
+            return False
+
+    def commit_block(self):
+        self.height += 1
+        self.block_time_iso = datetime.now(timezone.utc).isoformat()
+        self.stats['blocks'] += 1
+        mempool, self.mempool = self.mempool, []
+        for index, entry in enumerate(mempool):
+            tx = entry['tx']
+            for msg in tx.get("msgs", []):
+                self._apply(msg, entry['hash'])
+            self.accounts[entry['address']]['balance'] -= int(tx["fee"]["amount"][0]["amount"])
+            gas_wanted = int(tx["fee"]["gas"])
+            self.committed[entry['hash']] = {
+                "txhash": entry['hash'],
+                "height": str(self.height),
+                "index": index,
+                "code": 0,
+                "gas_wanted": str(gas_wanted),
+                "gas_used": str(int(gas_wanted * 0.75)),
+                "timestamp": self.block_time_iso,
+                "tx": tx
+            }
+        self.blocks[self.height] = {
+            "hash": self._block_hash(self.height, ",".join(entry['hash'] for entry in mempool)),
+            "time": self.block_time_iso,
+            "txs": [entry['hash'] for entry in mempool]
+        }
+
+    def _block_hash(self, height: int, contents: str) -> str:
+        return hashlib.sha256(f"{self.chain_id}:{self.forks}:{height}:{contents}".encode()).hexdigest().upper()
+
+    def orphan_blocks(self, depth: int):
+        """Replace the newest `depth` blocks with empty ones, as if another fork won"""
+        self.forks += 1
+        for height in range(max(self.height - depth + 1, 2), self.height + 1):
+            for tx_hash in self.blocks[height]["txs"]:
+                self.committed.pop(tx_hash, None)
+            self.blocks[height] = {"hash": self._block_hash(height, ""), "time": self.blocks[height]["time"], "txs": []}
+            self.stats['orphaned_blocks'] += 1
+        # Rebuild application state from the surviving blocks
+        self.domains, self.contents = {}, {}
+        for height in range(1, self.height + 1):
+            for tx_hash in self.blocks[height]["txs"]:
+                for msg in self.committed[tx_hash]["tx"].get("msgs", []):
+                    if msg.get("type") in ("privachain/RegisterDomain", "privachain/RegisterContent"):
+                        self._apply(msg, tx_hash, height)
+
+    def tx_search(self, min_height: int, max_height: int, page: int, per_page: int) -> Dict[str, Any]:
+        """Committed transactions in a height range, in (height, index) order"""
+        hashes = [tx_hash for height in range(max(min_height, 1), min(max_height, self.height) + 1)
+                  for tx_hash in self.blocks.get(height, {}).get("txs", [])]
+        txs = []
+        for tx_hash in hashes[(page - 1) * per_page:page * per_page]:
+            committed = self.committed[tx_hash]
+            txs.append({
+                "hash": tx_hash,
+                "height": committed["height"],
+                "index": committed["index"],
+                "tx_result": {"code": 0, "log": "[]", "gas_wanted": committed["gas_wanted"], "gas_used": committed["gas_used"]},
+                "tx": base64.b64encode(canonical_json(committed["tx"]).encode()).decode()
+            })
+        return {"txs": txs, "total_count": str(len(hashes))}
+
+    def _apply(self, msg: Dict[str, Any], tx_hash: str, height: int = None):
+        height = height or self.height
+        value = msg.get("value", {})
+        kind = msg.get("type")
+        if kind == "privachain/RegisterDomain":
+            name = value["domain"].lower()
+            name = name[:-len(".prv")] if name.endswith(".prv") else name
+            self.domains[name] = {
+                "content_hash": value.get("content_hash"),
+                "owner": value.get("owner"),
+                "height": height,
+                "expiry": None,
+                "metadata": value.get("metadata", {}),
+                "tx_hash": tx_hash
+            }
+        elif kind == "privachain/RegisterContent":
+            self.contents[value["content_hash"]] = {**value, "height": height, "tx_hash": tx_hash}
+        elif kind == "privachain/RegisterMessage":
+            self.messages += 1
+        elif kind == "privachain/RecordDomainAccess":
+            self.domain_views += sum(access.get("hits", 0) for access in value.get("accesses", []))
+        self.stats['msgs_committed'] += 1
+
+    async def _produce_blocks(self):
+        while True:
+            await asyncio.sleep(self.block_time)
+            self.commit_block()
+
+    async def start(self):
+        if self._block_task is None or self._block_task.done():
+            self._block_task = asyncio.create_task(self._produce_blocks())
+
+    async def stop(self):
+        if self._block_task:
+            self._block_task.cancel()
+            await asyncio.gather(self._block_task, return_exceptions=True)
+            self._block_task = None
+
+    # --- HTTP surface --------------------------------------------------------
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI(title="Mock Cosmos chain node")
+        node = self
+
+        @app.on_event("startup")
+        async def start_blocks():
+            await node.start()
+
+        @app.middleware("http")
+        async def inject_latency_and_errors(request: Request, call_next):
+            node.stats['requests'] += 1
+            delay = node.latency + node.random.uniform(0, node.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if node.error_rate and node.random.random() < node.error_rate:
+                node.stats['injected_errors'] += 1
+                return JSONResponse({"code": 14, "message": "injected failure: node unavailable"}, status_code=503)
+            return await call_next(request)
+
+        @app.get("/status")
+        async def status():
+            return {"jsonrpc": "2.0", "id": -1, "result": {
+                "node_info": {"network": node.chain_id, "moniker": "mock-chain-node", "version": "0.37.0-mock"},
+                "sync_info": {
+                    "latest_block_height": str(node.height),
+                    "latest_block_time": node.block_time_iso,
+                    "catching_up": False
+                }
+            }}
+
+        @app.get("/abci_query")
+        async def abci_query(path: str, data: str = '""'):
+            try:
+                query = json.loads(base64.b64decode(data.strip('"')))
+            except Exception:
+                query = {}
+            if path.strip('"') == "custom/privachain/domain":
+                domain = node.domains.get(str(query.get("params", {}).get("domain", "")).lower())
+                if domain:
+                    return {"jsonrpc": "2.0", "id": -1, "result": {"result": domain}}
+            return {"jsonrpc": "2.0", "id": -1, "result": {"response": {"code": 1, "log": "not found", "height": str(node.height)}}}
+
+        @app.get("/tx_search")
+        async def tx_search(query: str, page: str = "1", per_page: str = "30"):
+            heights = dict(re.findall(r"tx\.height\s*([<>]=?|=)\s*(\d+)", query))
+            min_height = int(heights.get(">=", heights.get("=", 1)))
+            max_height = int(heights.get("<=", heights.get("=", node.height)))
+            result = node.tx_search(min_height, max_height, int(page.strip('"')), min(int(per_page.strip('"')), 100))
+            return {"jsonrpc": "2.0", "id": -1, "result": result}
+
+        @app.get("/blockchain")
+        async def blockchain(minHeight: str = "1", maxHeight: str = "0"):
+            max_height = min(int(maxHeight) or node.height, node.height)
+            min_height = max(int(minHeight), max_height - 19, 1)
+            metas = [{
+                "block_id": {"hash": node.blocks[height]["hash"]},
+                "header": {"height": str(height), "time": node.blocks[height]["time"], "chain_id": node.chain_id},
+                "num_txs": str(len(node.blocks[height]["txs"]))
+            } for height in range(max_height, min_height - 1, -1)]
+            return {"jsonrpc": "2.0", "id": -1, "result": {"last_height": str(node.height), "block_metas": metas}}
+
+        @app.post("/cosmos/tx/v1beta1/txs")
+        async def broadcast(request: Request):
+            body = await request.json()
+            return {"tx_response": node.check_tx(body.get("tx", {}))}
+
+        @app.get("/cosmos/tx/v1beta1/txs/{tx_hash}")
+        async def get_tx(tx_hash: str):
+            committed = node.committed.get(tx_hash.upper())
+            if committed is None:
+                return JSONResponse({"code": 5, "message": f"tx not found: {tx_hash}"}, status_code=404)
+            return {"tx_response": {key: value for key, value in committed.items() if key != "tx"}}
+
+        @app.get("/cosmos/bank/v1beta1/balances/{address}")
+        async def balances(address: str):
+            return {"balances": [{"denom": "uatom", "amount": str(node.account(address)['balance'])}], "pagination": {"total": "1"}}
+
+        @app.get("/cosmos/auth/v1beta1/accounts/{address}")
+        async def account(address: str):
+            state = node.account(address)
+            return {"account": {
+                "@type": "/cosmos.auth.v1beta1.BaseAccount",
+                "address": address,
+                "account_number": str(state['account_number']),
+                "sequence": str(state['sequence'])
+            }}
+
+        @app.get("/mock/stats")
+        async def mock_stats():
+            return node.get_stats()
+
+        return app
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'height': self.height,
+            'mempool': len(self.mempool),
+            'domains': len(self.domains),
+            'contents': len(self.contents),
+            'messages': self.messages,
+            'domain_views': self.domain_views
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=26657)
+    parser.add_argument('--chain-id', default='mock-chain-1')
+    parser.add_argument('--block-time', type=float, default=1.0, help='seconds between blocks')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--no-verify-signatures', action='store_true')
+    args = parser.parse_args()
+
+    import uvicorn
+
+    node = MockChainNode(args.chain_id, args.block_time, args.latency_ms, args.jitter_ms, args.error_rate,
+                         verify_signatures=not args.no_verify_signatures)
+    uvicorn.run(node.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -6,7 +7,7 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
 from datetime import datetime, timezone
 import httpx
@@ -14,6 +15,16 @@ import base64
 import json
 import asyncio
 import hashlib
+import heapq
+from services.http_client_service import http_clients
+from services.content_cache_service import content_cache
+from services.index_service import index_manager
+from services.domain_registry import domain_registry
+from services.domain_search import domain_search_index
+from services.chain_indexer import chain_indexer
+from services.access_recorder import access_recorder
+from services.ipfs_gateway_pool import ipfs_gateways, GatewayUnavailable, InvalidContentPath
+from services.unixfs import UnixFSBuilder, BlockPusher, DEFAULT_CHUNK_SIZE, cid_codec, cid_to_string, CODEC_RAW
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -34,6 +45,31 @@ IPFS_API_KEY = os.environ.get('IPFS_API_KEY')
 IPFS_RPC_ENDPOINT = os.environ.get('IPFS_RPC_ENDPOINT')
 IPFS_PROJECT = os.environ.get('IPFS_PROJECT')
 
+# Search fan-out deadlines (seconds)
+SEARCH_DEADLINE = float(os.environ.get('SEARCH_DEADLINE_SECONDS', 3.0))
+SEARCH_SOURCE_TIMEOUTS = {
+    "ipfs": float(os.environ.get('SEARCH_IPFS_TIMEOUT_SECONDS', 1.5)),
+    "prv": float(os.environ.get('SEARCH_PRV_TIMEOUT_SECONDS', 2.0)),
+    "cosmos": float(os.environ.get('SEARCH_COSMOS_TIMEOUT_SECONDS', 2.0))
+}
+
+# Streaming content retrieval: bytes per chunk relayed to the client, and the largest
+# body that is teed into the content cache while it streams
+CONTENT_STREAM_CHUNK_BYTES = int(os.environ.get('CONTENT_STREAM_CHUNK_BYTES', 64 * 1024))
+CONTENT_STREAM_TEE_MAX_BYTES = int(os.environ.get('CONTENT_STREAM_TEE_MAX_BYTES', 4 * 1024 * 1024))
+
+# Streaming IPFS adds: per-operation timeout towards the RPC node (the body itself may
+# take much longer to send, it is never held in memory)
+IPFS_ADD_TIMEOUT = float(os.environ.get('IPFS_ADD_TIMEOUT_SECONDS', 120.0))
+
+# Locally built DAGs: blocks are pushed to the RPC node (when one is configured) this
+# many at a time while hashing continues
+IPFS_PUSH_BLOCKS = os.environ.get('IPFS_PUSH_BLOCKS', 'true').lower() == 'true'
+IPFS_BLOCK_PUSH_CONCURRENCY = int(os.environ.get('IPFS_BLOCK_PUSH_CONCURRENCY', 8))
+
+# Gateway response headers passed through to streaming clients
+STREAM_PASSTHROUGH_HEADERS = ('content-type', 'content-length', 'content-range', 'accept-ranges', 'etag', 'last-modified')
+
 # Models
 class ContentRequest(BaseModel):
     url: str
@@ -50,6 +86,20 @@ class ContentResponse(BaseModel):
     privacy_enabled: Optional[bool] = False
     privacy_features: Optional[Dict[str, Any]] = None
 
+class CachedContentEntry(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    url: str
+    content_type: str
+    source: str
+    timestamp: datetime
+    content: Optional[str] = None  # only returned with include_content=true
+    content_digest: Optional[str] = None
+    size: Optional[int] = None
+    expires_at: Optional[datetime] = None
+    metadata: Optional[Dict[str, Any]] = None
+    privacy_enabled: Optional[bool] = False
+    privacy_features: Optional[Dict[str, Any]] = None
+
 class SearchQuery(BaseModel):
     query: str
     search_type: Optional[str] = "hybrid"  # hybrid, ipfs, prv, cosmos
@@ -64,6 +114,11 @@ class SearchResult(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
     relevance_score: Optional[float] = None
 
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+    sources_timed_out: List[str] = []
+    partial: bool = False
+
 class Message(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     sender: str
@@ -73,6 +128,19 @@ class Message(BaseModel):
     encrypted: bool = True
     message_type: str = "text"  # text, file, image
 
+class MessageView(BaseModel):
+    """Message as listed by the inbox endpoint; only requested fields are set"""
+    id: Optional[str] = None
+    sender: Optional[str] = None
+    recipient: Optional[str] = None
+    content: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    encrypted: Optional[bool] = None
+    message_type: Optional[str] = None
+
+MESSAGE_FIELDS = set(Message.__fields__)
+MESSAGE_PAGE_MAX = 100
+
 class IPFSService:
     def __init__(self):
         self.api_key = IPFS_API_KEY
@@ -82,26 +150,47 @@ class IPFSService:
     async def get_content(self, cid: str) -> Dict[str, Any]:
         """Retrieve content from IPFS using the provided API"""
         try:
-            # Try to get content via IPFS API
-            async with httpx.AsyncClient() as client:
-                # First try to get via gateway
-                gateway_url = f"https://ipfs.io/ipfs/{cid}"
-                response = await client.get(gateway_url, timeout=10.0)
-                
-                if response.status_code == 200:
-                    content_type = response.headers.get('content-type', 'text/plain')
-                    return {
-                        "content": response.text if 'text' in content_type else response.content.decode('utf-8', errors='ignore'),
-                        "content_type": content_type,
-                        "source": "ipfs",
-                        "cid": cid
-                    }
-                else:
-                    raise HTTPException(status_code=404, detail=f"IPFS content not found: {cid}")
+            # Fastest healthy gateway of the pool, hedged against the next best
+            response = await ipfs_gateways.fetch(cid)
+            
+            if response.status_code == 200:
+                content_type = response.headers.get('content-type', 'text/plain')
+                return {
+                    "content": response.text if 'text' in content_type else response.content.decode('utf-8', errors='ignore'),
+                    "content_type": content_type,
+                    "source": "ipfs",
+                    "cid": cid
+                }
+            else:
+                raise HTTPException(status_code=404, detail=f"IPFS content not found: {cid}")
+        except InvalidContentPath as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             logging.error(f"IPFS error for CID {cid}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"IPFS error: {str(e)}")
     
+    async def open_stream(self, cid: str, path: str = "", range_header: Optional[str] = None) -> httpx.Response:
+        """Open a gateway response without reading its body; the caller must aclose() it"""
+        # Identity encoding keeps lengths and byte ranges in terms of the stored bytes
+        headers = {"Accept-Encoding": "identity"}
+        if range_header:
+            headers["Range"] = range_header
+        try:
+            response = await ipfs_gateways.fetch(f"{cid}{path}", headers, stream=True)
+        except InvalidContentPath as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except GatewayUnavailable as e:
+            raise HTTPException(status_code=504, detail=f"IPFS gateways unavailable: {str(e)}")
+        
+        if response.status_code in (200, 206):
+            return response
+        await response.aclose()
+        if response.status_code == 416:
+            raise HTTPException(status_code=416, detail="Requested range not satisfiable")
+        if response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"IPFS content not found: {cid}")
+        raise HTTPException(status_code=502, detail=f"IPFS gateway returned {response.status_code}")
+    
     async def add_content(self, content: str, filename: str = None) -> str:
         """Add content to IPFS and return CID"""
         try:
@@ -113,23 +202,122 @@ class IPFSService:
                 'file': (filename or 'content.txt', content, 'text/plain')
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.rpc_endpoint}/api/v0/add",
-                    headers=headers,
-                    files=files,
-                    timeout=30.0
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result.get('Hash', '')
-                else:
-                    raise HTTPException(status_code=500, detail="Failed to add to IPFS")
+            client = http_clients.get('ipfs_rpc')
+            response = await client.post(
+                f"{self.rpc_endpoint}/api/v0/add",
+                headers=headers,
+                files=files,
+                timeout=30.0
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                return result.get('Hash', '')
+            else:
+                raise HTTPException(status_code=500, detail="Failed to add to IPFS")
         except Exception as e:
             logging.error(f"IPFS add error: {str(e)}")
             raise HTTPException(status_code=500, detail=f"IPFS add error: {str(e)}")
 
+    async def add_stream(self, chunks, filename: str = None) -> Dict[str, Any]:
+        """
+        Add a byte stream to IPFS with chunked transfer. The CID is computed locally
+        while the bytes are sent and must match the one the node returns.
+        """
+        builder = UnixFSBuilder()
+        boundary = uuid.uuid4().hex
+        # Control characters (CR/LF) could inject part headers; quotes and backslashes end the quoted string
+        filename = ''.join(char for char in (filename or 'content.bin') if char >= ' ' and char not in '"\\\x7f') or 'content.bin'
+        
+        async def multipart_body():
+            yield (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                   f'Content-Type: application/octet-stream\r\n\r\n').encode()
+            async for chunk in chunks:
+                if chunk:
+                    builder.update(chunk)
+                    yield chunk
+            yield f'\r\n--{boundary}--\r\n'.encode()
+        
+        client = http_clients.get('ipfs_rpc')
+        try:
+            # Pin the importer settings the local CID is computed with
+            response = await client.post(
+                f"{self.rpc_endpoint}/api/v0/add",
+                params={"cid-version": "0", "chunker": f"size-{DEFAULT_CHUNK_SIZE}", "raw-leaves": "false"},
+                headers={
+                    "Authorization": f"Basic {self.api_key}",
+                    "Content-Type": f"multipart/form-data; boundary={boundary}"
+                },
+                content=multipart_body(),
+                timeout=IPFS_ADD_TIMEOUT
+            )
+        except httpx.HTTPError as e:
+            logging.error(f"IPFS streaming add error: {str(e)}")
+            raise HTTPException(status_code=502, detail=f"IPFS add error: {str(e)}")
+        
+        if response.status_code != 200:
+            raise HTTPException(status_code=500, detail="Failed to add to IPFS")
+        
+        # Newline-delimited JSON, the added file last
+        lines = [line for line in response.text.splitlines() if line.strip()]
+        cid = json.loads(lines[-1]).get('Hash', '') if lines else ''
+        local_cid = builder.finalize()
+        if cid != local_cid:
+            logging.error(f"IPFS CID mismatch for {filename}: node returned {cid}, computed {local_cid}")
+            raise HTTPException(status_code=502, detail=f"IPFS node returned CID {cid}, expected {local_cid}")
+        
+        return {"cid": cid, "size": builder.size, "blocks": builder.blocks}
+    
+    async def put_block(self, cid: bytes, block: bytes):
+        """Store one DAG block on the RPC node under the CID computed for it"""
+        client = http_clients.get('ipfs_rpc')
+        codec = 'raw' if cid_codec(cid) == CODEC_RAW else 'dag-pb'
+        response = await client.post(
+            f"{self.rpc_endpoint}/api/v0/block/put",
+            params={"cid-codec": codec, "mhtype": "sha2-256"},
+            headers={"Authorization": f"Basic {self.api_key}"},
+            files={'file': ('block', block, 'application/octet-stream')}
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"block/put returned {response.status_code}")
+        stored = response.json().get('Key', '')
+        if stored != cid_to_string(cid):
+            raise RuntimeError(f"block/put stored {stored}, expected {cid_to_string(cid)}")
+    
+    async def add_dag(self, content: bytes, push: bool = None) -> Dict[str, Any]:
+        """
+        CIDv1 (raw leaves) of content computed locally in one pass; with push, blocks are
+        stored on the RPC node in parallel with hashing and the root is pinned
+        """
+        push = (IPFS_PUSH_BLOCKS and bool(self.rpc_endpoint)) if push is None else push
+        ready: List[Tuple[bytes, bytes]] = []
+        builder = UnixFSBuilder(cid_version=1, on_block=(lambda cid, block: ready.append((cid, block))) if push else None)
+        pusher = BlockPusher(self.put_block, IPFS_BLOCK_PUSH_CONCURRENCY) if push else None
+        
+        view = memoryview(content)
+        try:
+            for offset in range(0, len(view), DEFAULT_CHUNK_SIZE):
+                builder.update(view[offset:offset + DEFAULT_CHUNK_SIZE])
+                while ready:
+                    await pusher.submit(*ready.pop(0))
+            cid = builder.finalize()
+            if push:
+                for block in ready:
+                    await pusher.submit(*block)
+                await pusher.drain()
+                client = http_clients.get('ipfs_rpc')
+                response = await client.post(f"{self.rpc_endpoint}/api/v0/pin/add", params={"arg": cid},
+                                             headers={"Authorization": f"Basic {self.api_key}"})
+                if response.status_code != 200:
+                    raise RuntimeError(f"pin/add returned {response.status_code}")
+        except Exception as e:
+            if pusher is not None:
+                pusher.cancel()
+            logging.error(f"IPFS block push error: {str(e)}")
+            raise HTTPException(status_code=502, detail=f"IPFS block push error: {str(e)}")
+        
+        return {"cid": cid, "size": builder.size, "blocks": builder.blocks, "pushed": push}
+
 class ContentResolver:
     def __init__(self):
         self.ipfs_service = IPFSService()
@@ -137,7 +325,23 @@ class ContentResolver:
         self.privacy_service = privacy_service
     
     async def resolve_content(self, url: str) -> Dict[str, Any]:
-        """Resolve content based on URL scheme"""
+        """Resolve content based on URL scheme, reading through the content cache"""
+        cache_key = content_cache.key_for(url)
+        cached_entry = await content_cache.get(cache_key) if cache_key else None
+        
+        if cached_entry is not None and content_cache.is_fresh(cached_entry):
+            result = content_cache.to_result(cached_entry)
+            if result.get("source") == "prv" and result.get("blockchain_info"):
+                access_recorder.record(url, result["blockchain_info"]["content_hash"], result["blockchain_info"].get("owner"))
+            return result
+        
+        result = await self._resolve_uncached(url, cached_entry)
+        if cache_key:
+            await content_cache.put(cache_key, url, result)
+        return result
+    
+    async def _resolve_uncached(self, url: str, cached_entry: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Resolve content from its origin based on URL scheme"""
         try:
             if url.startswith('ipfs://'):
                 # Extract CID from ipfs:// URL
@@ -165,17 +369,8 @@ class ContentResolver:
                     # Fetch content from IPFS using resolved hash
                     ipfs_content = await self.ipfs_service.get_content(domain_info["ipfs_hash"])
                     
-                    # Record domain access on blockchain for analytics (optional)
-                    try:
-                        access_record = await cosmos_service.register_content(
-                            content_hash=domain_info["ipfs_hash"],
-                            content_type="prv_domain_access",
-                            owner_address=domain_info.get("owner", "unknown"),
-                            encryption_metadata={"accessed_domain": url, "access_time": datetime.now(timezone.utc).isoformat()}
-                        )
-                        logger.info(f"📊 Domain access recorded on blockchain: {access_record.get('tx_hash', 'N/A')}")
-                    except Exception as record_error:
-                        logger.warning(f"Could not record domain access: {record_error}")
+                    # Queue the access for batched recording on blockchain (off the read path)
+                    access_recorder.record(url, domain_info["ipfs_hash"], domain_info.get("owner"))
                     
                     return {
                         "content": ipfs_content["content"],
@@ -228,8 +423,8 @@ class ContentResolver:
                     }
             
             elif url.startswith('http://') or url.startswith('https://'):
-                # Handle regular HTTP requests with DPI bypass
-                return await self.fetch_http_content(url)
+                # Handle regular HTTP requests with DPI bypass, revalidating a stale cache entry
+                return await self.fetch_http_content(url, cached_entry)
             
             else:
                 raise HTTPException(status_code=400, detail="Unsupported URL scheme")
@@ -238,44 +433,71 @@ class ContentResolver:
             logging.error(f"Content resolution error for {url}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Resolution error: {str(e)}")
     
-    async def fetch_http_content(self, url: str) -> Dict[str, Any]:
+    async def resolve_stream_target(self, url: str) -> Tuple[str, str]:
+        """CID and path behind an ipfs:// URL or a .prv domain, for streaming"""
+        if url.startswith('ipfs://'):
+            cid, _, path = url[len('ipfs://'):].partition('/')
+            return cid, f"/{path}" if path else ""
+        
+        if url.endswith('.prv'):
+            from services.cosmos_service import cosmos_service
+            
+            domain_info = await cosmos_service.resolve_prv_domain(url)
+            if not domain_info or not domain_info.get("ipfs_hash"):
+                raise HTTPException(status_code=404, detail=f"Domain not registered: {url}")
+            access_recorder.record(url, domain_info["ipfs_hash"], domain_info.get("owner"))
+            return domain_info["ipfs_hash"], ""
+        
+        raise HTTPException(status_code=400, detail="Only ipfs:// URLs and .prv domains can be streamed")
+    
+    async def fetch_http_content(self, url: str, cached_entry: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Fetch HTTP content with privacy features enabled by default"""
         try:
             # Use privacy service for enhanced protection
             private_request = await self.privacy_service.create_private_request(url, 'GET')
             
-            # Use privacy-enhanced headers and session
+            # Use privacy-enhanced headers on the dedicated privacy pool
             headers = private_request['headers']
+            if cached_entry is not None:
+                headers.update(content_cache.validators(cached_entry))
             
-            async with httpx.AsyncClient(
-                follow_redirects=True,
-                timeout=30.0,
-                headers=headers
-            ) as client:
-                response = await client.get(url)
+            client = http_clients.get('http_private')
+            response = await client.get(url, headers=headers)
+            
+            if response.status_code == 304 and cached_entry is not None:
+                # Stale entry is still valid - serve it with the refreshed freshness headers
+                content_cache.record_revalidation()
+                result = content_cache.to_result(cached_entry)
+                result["cache_status"] = "revalidated"
+                previous_validators = {"etag": cached_entry.get("etag"), "last-modified": cached_entry.get("last_modified")}
+                result["headers"] = {
+                    **{name: value for name, value in previous_validators.items() if value},
+                    **dict(response.headers)
+                }
+                return result
+            
+            if response.status_code == 200:
+                content_type = response.headers.get('content-type', 'text/html')
                 
-                if response.status_code == 200:
-                    content_type = response.headers.get('content-type', 'text/html')
-                    
-                    # For complex web apps, we'll let the frontend handle them via iframe
-                    # This endpoint is mainly for IPFS and simple content now
-                    return {
-                        "content": response.text,
-                        "content_type": content_type,
-                        "source": "http",
-                        "url": str(response.url),  # Use final URL after redirects
-                        "status_code": response.status_code,
-                        "headers": dict(response.headers),
-                        "privacy_enabled": True,
-                        "privacy_features": {
-                            "tor_enabled": private_request['tor_enabled'],
-                            "dpi_bypassed": private_request['dpi_bypassed'],
-                            "anonymized": private_request['anonymized'],
-                            "zk_proof": private_request['zk_proof']['commitment'][:16] + "..."
-                        }
+                # For complex web apps, we'll let the frontend handle them via iframe
+                # This endpoint is mainly for IPFS and simple content now
+                return {
+                    "content": response.text,
+                    "content_type": content_type,
+                    "source": "http",
+                    "url": str(response.url),  # Use final URL after redirects
+                    "status_code": response.status_code,
+                    "headers": dict(response.headers),
+                    "privacy_enabled": True,
+                    "privacy_features": {
+                        "tor_enabled": private_request['tor_enabled'],
+                        "dpi_bypassed": private_request['dpi_bypassed'],
+                        "anonymized": private_request['anonymized'],
+                        "zk_proof": private_request['zk_proof']['commitment'][:16] + "..."
                     }
-                else:
-                    raise HTTPException(status_code=response.status_code, detail=f"HTTP fetch failed: {response.status_code}")
+                }
+            else:
+                raise HTTPException(status_code=response.status_code, detail=f"HTTP fetch failed: {response.status_code}")
         except Exception as e:
             logging.error(f"HTTP fetch error for {url}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"HTTP fetch error: {str(e)}")
@@ -296,6 +518,21 @@ async def startup_event():
     
     logger.info("🚀 Starting PrivaChain Decentral with Cosmos blockchain integration...")
     
+    # Shared HTTP connection pools for IPFS, HTTP resolution and the proxy
+    await http_clients.initialize()
+    
+    # Declare MongoDB indexes before anything queries the collections
+    await index_manager.initialize(db)
+    
+    # Read-through content cache backed by db.content_cache
+    await content_cache.initialize(db)
+    
+    # Persistent .prv registry, warm-loaded before Cosmos starts resolving domains
+    await domain_registry.initialize(db)
+    
+    # Ranked .prv search index, rebuilt from the persisted registry in the background
+    domain_search_index.start_rebuild(db, ('prv_domains', 'chain_domains'))
+    
     # Initialize privacy services first (they're foundational)
     privacy_initialized = await privacy_service.initialize()
     if privacy_initialized:
@@ -307,6 +544,9 @@ async def startup_event():
         logger.info("✅ COSMOS BLOCKCHAIN INTEGRATION ACTIVE - Developer-paid transactions enabled")
         logger.info("✅ ALL TRANSACTIONS GO THROUGH COSMOS BLOCKCHAIN FOR MAXIMUM SECURITY")
     
+    # Stream committed privachain transactions into MongoDB for local history/ownership reads
+    await chain_indexer.initialize(db, cosmos_service)
+    
     await working_browser_service.initialize()
     
     logger.info("🎉 PrivaChain Decentral startup complete - Web2 UX with blockchain security!")
@@ -332,69 +572,204 @@ async def resolve_content(request: ContentRequest):
             privacy_features=result.get("privacy_features")
         )
         
-        # Store in database for caching
-        await db.content_cache.insert_one(content_response.dict())
-        
+        # Cache storage happens in the resolver, which knows each source's freshness rules
         return content_response
     
     except Exception as e:
         logging.error(f"Content resolution failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/content/cached", response_model=List[ContentResponse])
-async def get_cached_content():
-    """Get recently cached content"""
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single-range 'bytes=' header; None means the whole body"""
+    if not range_header or not range_header.startswith('bytes=') or ',' in range_header:
+        return None
+    first, _, last = range_header[len('bytes='):].strip().partition('-')
+    try:
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+async def _store_streamed_content(cid: str, content_type: str, body: bytes):
+    """Cache a fully streamed text body like a resolved ipfs:// result"""
+    try:
+        content = body.decode('utf-8')
+    except UnicodeDecodeError:
+        return
+    url = f"ipfs://{cid}"
+    await content_cache.put(content_cache.key_for(url), url, {
+        "content": content,
+        "content_type": content_type,
+        "source": "ipfs",
+        "cid": cid
+    }, exact_bytes=True)
+
+async def _decrypt_chunks(chunks, decryptor):
+    async for chunk in chunks:
+        opened = decryptor.update(chunk)
+        if opened:
+            yield opened
+    # Raises on a truncated stream, aborting the response instead of ending it cleanly
+    yield decryptor.finalize()
+
+@api_router.get("/content/stream")
+async def stream_content(url: str, request: Request, cache: bool = True, decrypt: bool = True):
+    """
+    Stream IPFS or .prv content with Range support and constant memory per request
+    Whole objects stored as encrypted streams (/api/ipfs/add/stream) are decrypted on the
+    way out unless decrypt=false; Range requests always return the stored bytes
+    """
+    from services.privacy_service import privacy_service, STREAM_MAGIC, STREAM_HEADER_BYTES
+    
+    cid, path = await content_resolver.resolve_stream_target(url)
+    range_header = request.headers.get('range')
+    cache_key = content_cache.key_for(f"ipfs://{cid}") if not path else None
+    
+    # Bodies teed by an earlier stream are already in memory; serve (a slice of) them directly.
+    # Entries written by /content/resolve hold lossily decoded text, so those go to the gateway
+    cached_entry = await content_cache.get(cache_key) if cache_key else None
+    if cached_entry is not None and cached_entry.get("exact_bytes"):
+        body = cached_entry["content"].encode('utf-8')
+        headers = {"Accept-Ranges": "bytes", "X-Cache": "hit"}
+        byte_range = parse_byte_range(range_header, len(body))
+        if byte_range is None:
+            return Response(content=body, media_type=cached_entry.get("content_type"), headers=headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+        return Response(content=body[start:end + 1], status_code=206, media_type=cached_entry.get("content_type"), headers=headers)
+    
+    upstream = await content_resolver.ipfs_service.open_stream(cid, path, range_header)
+    content_type = upstream.headers.get('content-type', 'application/octet-stream')
+    upstream_chunks = upstream.aiter_bytes(CONTENT_STREAM_CHUNK_BYTES)
+    
+    # Peek at the start of whole objects for the encrypted stream header
+    head = b""
+    if decrypt and upstream.status_code == 200:
+        try:
+            async for chunk in upstream_chunks:
+                head += chunk
+                if len(head) >= STREAM_HEADER_BYTES:
+                    break
+        except Exception:
+            await upstream.aclose()
+            raise
+    encrypted = head.startswith(STREAM_MAGIC) and privacy_service.ipfs_encryption.encryption_enabled
+    
+    # Only complete text bodies of bounded size, checked for the encrypted header, are teed into the cache
+    tee = (cache and decrypt and cache_key is not None and upstream.status_code == 200 and not encrypted and
+           int(upstream.headers.get('content-length') or 0) <= CONTENT_STREAM_TEE_MAX_BYTES and
+           (content_type.startswith('text/') or 'json' in content_type or 'xml' in content_type))
+    
+    async def stored_chunks():
+        if head:
+            yield head
+        async for chunk in upstream_chunks:
+            yield chunk
+    
+    async def relay():
+        buffer = bytearray() if tee else None
+        chunks = _decrypt_chunks(stored_chunks(), privacy_service.ipfs_encryption.stream_decryptor()) if encrypted else stored_chunks()
+        try:
+            async for chunk in chunks:
+                if buffer is not None:
+                    if len(buffer) + len(chunk) > CONTENT_STREAM_TEE_MAX_BYTES:
+                        buffer = None
+                    else:
+                        buffer.extend(chunk)
+                yield chunk
+            if buffer is not None:
+                await _store_streamed_content(cid, content_type, bytes(buffer))
+        finally:
+            await upstream.aclose()
+    
+    headers = {name: upstream.headers[name] for name in STREAM_PASSTHROUGH_HEADERS if name in upstream.headers}
+    headers["X-Cache"] = "miss"
+    if encrypted:
+        # Plaintext length is only known once the last segment is opened
+        for name in ('content-length', 'content-range', 'accept-ranges', 'etag'):
+            headers.pop(name, None)
+        headers["X-Decrypted"] = "stream"
+    return StreamingResponse(relay(), status_code=upstream.status_code, headers=headers)
+
+@api_router.get("/content/cached", response_model=List[CachedContentEntry], response_model_exclude_none=True)
+async def get_cached_content(include_content: bool = False, limit: int = 50):
+    """Get recently cached content as metadata; pass include_content=true for full bodies"""
     try:
-        cached_items = await db.content_cache.find().sort("timestamp", -1).limit(50).to_list(length=None)
-        return [ContentResponse(**item) for item in cached_items]
+        cached_items = await content_cache.list_recent(min(max(limit, 1), 50), include_content)
+        return [CachedContentEntry(**item) for item in cached_items]
     except Exception as e:
         logging.error(f"Cache retrieval failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.post("/search", response_model=List[SearchResult])
+@api_router.get("/content/cache/stats")
+async def get_content_cache_stats():
+    """Hit, miss and eviction counters for the content cache"""
+    return {
+        **content_cache.get_stats(),
+        "timestamp": datetime.now(timezone.utc)
+    }
+
+@api_router.post("/search", response_model=SearchResponse)
 async def hybrid_search(query: SearchQuery):
-    """Perform privacy-enhanced hybrid search with Zero-Knowledge proofs"""
+    """
+    Perform privacy-enhanced hybrid search with Zero-Knowledge proofs.
+    Sources run concurrently under per-source timeouts and a global deadline;
+    sources that miss them are listed in sources_timed_out and the rest are returned.
+    """
     try:
-        from services.cosmos_service import cosmos_service
         from services.privacy_service import privacy_service
         
-        # Generate ZK proof for anonymous search query
-        zk_proof = privacy_service.zk_proof.generate_query_proof(query.query)
-        logger.info(f"Generated ZK proof for search query: {zk_proof.get('commitment', 'unknown')[:16]}...")
+        # Generate ZK proof for anonymous search query alongside the source queries
+        proof_task = asyncio.create_task(privacy_service.asign_commitment(query.query))
         
-        results = []
+        sources = {}
         
         # Search IPFS network
         if query.search_type in ["hybrid", "ipfs"]:
-            ipfs_results = await search_ipfs_content(query.query, query.limit // 2)
-            results.extend(ipfs_results)
+            sources["ipfs"] = search_ipfs_content(query.query, query.limit // 2)
         
         # Search PrivaChain domains on Cosmos
         if query.search_type in ["hybrid", "prv", "cosmos"]:
-            prv_results = await cosmos_service.search_domains(query.query, query.limit // 2)
-            
-            for domain_info in prv_results:
-                results.append(SearchResult(
-                    title=domain_info.get("title", f"PrivaChain Domain: {domain_info['domain']}"),
-                    url=domain_info["domain"],
-                    content_preview=domain_info.get("description", f"Decentralized content on {domain_info['domain']}"),
-                    source="prv",
-                    relevance_score=calculate_domain_relevance(domain_info["domain"], query.query),
-                    metadata={
-                        "owner": domain_info.get("owner"),
-                        "content_hash": domain_info.get("content_hash"),
-                        "blockchain": "cosmos"
-                    }
-                ))
+            sources["prv"] = search_prv_domains(query.query, query.limit // 2)
         
         # Search Cosmos chain directly
         if query.search_type in ["hybrid", "cosmos"]:
-            cosmos_results = await search_cosmos_chain(query.query, query.limit // 3)
-            results.extend(cosmos_results)
+            sources["cosmos"] = search_cosmos_chain(query.query, query.limit // 3)
+        
+        tasks = {
+            name: asyncio.create_task(asyncio.wait_for(coro, timeout=min(SEARCH_SOURCE_TIMEOUTS.get(name, SEARCH_DEADLINE), SEARCH_DEADLINE)))
+            for name, coro in sources.items()
+        }
+        if tasks:
+            await asyncio.wait(tasks.values(), timeout=SEARCH_DEADLINE)
+        
+        results = []
+        sources_timed_out = []
+        for name, task in tasks.items():
+            if not task.done():
+                task.cancel()
+                sources_timed_out.append(name)
+            elif task.cancelled() or isinstance(task.exception(), asyncio.TimeoutError):
+                sources_timed_out.append(name)
+            elif task.exception() is not None:
+                logging.error(f"Search source {name} failed: {str(task.exception())}")
+            else:
+                results.extend(task.result())
+        
+        if sources_timed_out:
+            logger.warning(f"Search returned partial results, timed out: {', '.join(sources_timed_out)}")
         
         # Sort by relevance score
         results.sort(key=lambda x: x.relevance_score or 0, reverse=True)
         
+        zk_proof = await proof_task
+        logger.info(f"Generated ZK proof for search query: {zk_proof.get('commitment', 'unknown')[:16]}...")
+        
         # Store anonymized search analytics with ZK proof
         search_record = {
             "query_hash": hashlib.sha256(query.query.encode()).hexdigest(),  # Store hash, not actual query
@@ -402,19 +777,50 @@ async def hybrid_search(query: SearchQuery):
             "timestamp": datetime.now(timezone.utc),
             "results_count": len(results),
             "sources": list(set(r.source for r in results)),
+            "sources_timed_out": sources_timed_out,
             "zk_proof_commitment": zk_proof.get('commitment'),
             "privacy_enabled": True,
             "anonymous_query": True
         }
         await db.search_queries.insert_one(search_record)
         
-        return results[:query.limit]
+        return SearchResponse(
+            results=results[:query.limit],
+            sources_timed_out=sources_timed_out,
+            partial=bool(sources_timed_out)
+        )
     
     except Exception as e:
         logging.error(f"Search failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def search_prv_domains(query: str, limit: int) -> List[SearchResult]:
+    """Search PrivaChain .prv domains registered on Cosmos"""
+    from services.cosmos_service import cosmos_service
+    
+    results = []
+    prv_results = await cosmos_service.search_domains(query, limit)
+    # BM25 scores are unbounded; scale them against the best match
+    top_score = max((domain_info.get("score", 0) for domain_info in prv_results), default=0)
+    
+    for domain_info in prv_results:
+        results.append(SearchResult(
+            title=domain_info.get("title") or f"PrivaChain Domain: {domain_info['domain']}",
+            url=domain_info["domain"],
+            content_preview=domain_info.get("description") or f"Decentralized content on {domain_info['domain']}",
+            source="prv",
+            relevance_score=domain_info["score"] / top_score if top_score else calculate_domain_relevance(domain_info["domain"], query),
+            metadata={
+                "owner": domain_info.get("owner"),
+                "content_hash": domain_info.get("content_hash"),
+                "blockchain": "cosmos"
+            }
+        ))
+    
+    return results
+
+
 async def search_ipfs_content(query: str, limit: int) -> List[SearchResult]:
     """Search for IPFS content"""
     try:
@@ -521,7 +927,7 @@ async def add_to_ipfs(content: str, filename: str = "content.txt", encrypt: bool
         if encrypt and privacy_service.ipfs_encryption.encryption_enabled:
             try:
                 content_bytes = content.encode('utf-8')
-                encrypted_data = privacy_service.encrypt_ipfs_content(content_bytes)
+                encrypted_data = await privacy_service.aencrypt(content_bytes)
                 
                 # Store encryption metadata
                 encryption_metadata = {
@@ -551,6 +957,52 @@ async def add_to_ipfs(content: str, filename: str = "content.txt", encrypt: bool
         logging.error(f"IPFS add failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _encrypt_chunks(chunks, encryptor):
+    yield encryptor.header
+    async for chunk in chunks:
+        sealed = encryptor.update(chunk)
+        if sealed:
+            yield sealed
+    yield encryptor.finalize()
+
+@api_router.post("/ipfs/add/stream")
+async def add_stream_to_ipfs(request: Request, filename: str = "content.bin", encrypt: bool = True):
+    """Stream a request body of any size into IPFS, encrypted segment by segment by default"""
+    from services.privacy_service import privacy_service, STREAM_METHOD
+    
+    chunks = request.stream()
+    encryptor = None
+    if encrypt and privacy_service.ipfs_encryption.encryption_enabled:
+        encryptor = privacy_service.ipfs_encryption.stream_encryptor()
+        chunks = _encrypt_chunks(chunks, encryptor)
+    
+    try:
+        result = await content_resolver.ipfs_service.add_stream(chunks, filename)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"IPFS streaming add failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    encryption_metadata = {}
+    if encryptor is not None:
+        encryption_metadata = {
+            "encrypted": True,
+            "encryption_method": STREAM_METHOD,
+            "segment_bytes": encryptor.segment_size,
+            "content_hash": encryptor.content_hash
+        }
+        logger.info(f"Content stream encrypted before IPFS storage: {encryptor.content_hash[:16]}...")
+    
+    return {
+        "cid": result["cid"],
+        "url": f"ipfs://{result['cid']}",
+        "size": result["size"],
+        "cid_verified": True,
+        "privacy_enabled": True,
+        **encryption_metadata
+    }
+
 @api_router.post("/messages/send", response_model=Message)
 async def send_message(message: Message):
     """Send a Web3 message with E2E encryption and privacy by default"""
@@ -561,14 +1013,14 @@ async def send_message(message: Message):
         if not message.encrypted:
             # Convert content to bytes for encryption
             content_bytes = message.content.encode('utf-8')
-            encrypted_data = privacy_service.encrypt_ipfs_content(content_bytes)
+            encrypted_data = await privacy_service.aencrypt(content_bytes)
             
             # Update message with encrypted content
             message.content = json.dumps(encrypted_data)
             message.encrypted = True
         
         # Generate ZK proof for message sender identity
-        zk_proof = privacy_service.zk_proof.generate_query_proof(f"message_{message.sender}_{message.timestamp}")
+        zk_proof = await privacy_service.asign_commitment(f"message_{message.sender}_{message.timestamp}")
         
         # Store message in database with privacy metadata
         message_dict = message.dict()
@@ -586,38 +1038,103 @@ async def send_message(message: Message):
         logging.error(f"Message send failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/messages/{user_id}", response_model=List[Message])
-async def get_messages(user_id: str):
-    """Get messages for a user with automatic decryption"""
+def encode_message_cursor(message: Dict[str, Any]) -> str:
+    """Opaque keyset cursor for the (timestamp, id) position of a message"""
+    position = {"t": message["timestamp"].isoformat(), "i": message["id"]}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+def decode_message_cursor(cursor: str) -> Dict[str, Any]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return {"timestamp": datetime.fromisoformat(position["t"]), "id": str(position["i"])}
+
+async def _inbox_branch(field: str, user_id: str, before: Optional[Dict[str, Any]], limit: int, projection: Dict[str, int]) -> List[Dict[str, Any]]:
+    """One side of the inbox, walked newest-first on the (field, timestamp, id) index"""
+    query: Dict[str, Any] = {field: user_id}
+    if before:
+        query["$or"] = [
+            {"timestamp": {"$lt": before["timestamp"]}},
+            {"timestamp": before["timestamp"], "id": {"$lt": before["id"]}}
+        ]
+    return await db.messages.find(query, projection).sort(
+        [("timestamp", -1), ("id", -1)]
+    ).limit(limit).to_list(length=None)
+
+@api_router.get("/messages/{user_id}", response_model=List[MessageView], response_model_exclude_unset=True)
+async def get_messages(user_id: str, response: Response, before: Optional[str] = None, limit: int = 50, fields: Optional[str] = None):
+    """
+    Get messages for a user with automatic decryption, newest first.
+    Page with ?before=<cursor> using the X-Next-Cursor header of the previous page;
+    ?fields=id,sender,timestamp returns only those fields (bodies are skipped unless requested).
+    """
     try:
         from services.privacy_service import privacy_service
         
-        messages = await db.messages.find(
-            {"$or": [{"sender": user_id}, {"recipient": user_id}]}
-        ).sort("timestamp", -1).limit(50).to_list(length=None)
-        
-        decrypted_messages = []
-        for msg_data in messages:
+        limit = min(max(limit, 1), MESSAGE_PAGE_MAX)
+        try:
+            before_position = decode_message_cursor(before) if before else None
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        
+        requested_fields = None
+        if fields:
+            requested_fields = {name.strip() for name in fields.split(",") if name.strip()}
+            unknown = requested_fields - MESSAGE_FIELDS
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown message fields: {', '.join(sorted(unknown))}")
+        
+        # id and timestamp drive the merge and the cursor; encrypted is needed to decrypt content
+        projection = {"_id": 0}
+        if requested_fields is not None:
+            projection.update({name: 1 for name in requested_fields | {"id", "timestamp", "encrypted"}})
+        
+        # Sent and received branches each use their own index, then merge newest-first
+        sent, received = await asyncio.gather(
+            _inbox_branch("sender", user_id, before_position, limit, projection),
+            _inbox_branch("recipient", user_id, before_position, limit, projection)
+        )
+        messages = []
+        seen_ids = set()
+        for msg_data in heapq.merge(sent, received, key=lambda m: (m["timestamp"], m["id"]), reverse=True):
+            if msg_data["id"] in seen_ids:
+                continue  # messages to oneself appear in both branches
+            seen_ids.add(msg_data["id"])
+            messages.append(msg_data)
+            if len(messages) == limit:
+                break
+        
+        if len(messages) == limit:
+            response.headers["X-Next-Cursor"] = encode_message_cursor(messages[-1])
+        
+        # Collect encrypted envelopes and decrypt the whole page in one batch
+        pending = []
+        wants_content = requested_fields is None or "content" in requested_fields
+        for msg_data in messages if wants_content else []:
+            if msg_data.get('encrypted', False):
+                try:
+                    encrypted_data = json.loads(msg_data['content'])
+                    if isinstance(encrypted_data, dict) and 'encrypted_content' in encrypted_data:
+                        pending.append((msg_data, encrypted_data))
+                except (json.JSONDecodeError, TypeError, KeyError) as e:
+                    # If the content is not an envelope, keep original content
+                    logger.warning(f"Failed to decrypt message {msg_data.get('id', 'unknown')}: {str(e)}")
+        
+        decrypted = await privacy_service.adecrypt_many([envelope for _, envelope in pending])
+        for (msg_data, _), result in zip(pending, decrypted):
+            if isinstance(result, Exception):
+                # If decryption fails, keep original content
+                logger.warning(f"Failed to decrypt message {msg_data.get('id', 'unknown')}: {str(result)}")
+                continue
             try:
-                # Decrypt message content if encrypted
-                if msg_data.get('encrypted', False):
-                    try:
-                        encrypted_data = json.loads(msg_data['content'])
-                        if isinstance(encrypted_data, dict) and 'encrypted_content' in encrypted_data:
-                            # Decrypt the content
-                            decrypted_content = privacy_service.decrypt_ipfs_content(encrypted_data)
-                            msg_data['content'] = decrypted_content.decode('utf-8')
-                    except (json.JSONDecodeError, ValueError, KeyError) as e:
-                        # If decryption fails, keep original content
-                        logger.warning(f"Failed to decrypt message {msg_data.get('id', 'unknown')}: {str(e)}")
-                
-                decrypted_messages.append(Message(**msg_data))
-            except Exception as msg_error:
-                logger.error(f"Error processing message: {str(msg_error)}")
-                # Add message anyway, even if decryption failed
-                decrypted_messages.append(Message(**msg_data))
+                msg_data['content'] = result.decode('utf-8')
+            except UnicodeDecodeError as e:
+                logger.warning(f"Failed to decode message {msg_data.get('id', 'unknown')}: {str(e)}")
         
-        return decrypted_messages
+        if requested_fields is None:
+            return [MessageView(**Message(**msg_data).dict()) for msg_data in messages]
+        return [MessageView(**{name: msg_data[name] for name in requested_fields if name in msg_data}) for msg_data in messages]
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Message retrieval failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -638,23 +1155,23 @@ async def proxy_website(url: str):
             'Upgrade-Insecure-Requests': '1'
         }
         
-        async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
-            response = await client.get(url, headers=headers)
+        client = http_clients.get('http_plain')
+        response = await client.get(url, headers=headers)
+        
+        if response.status_code == 200:
+            content = response.text
             
-            if response.status_code == 200:
-                content = response.text
-                
-                # Remove X-Frame-Options and CSP headers that block iframe embedding
-                content = modify_content_for_iframe(content, url)
-                
-                return {
-                    "content": content,
-                    "content_type": "text/html",
-                    "status_code": response.status_code,
-                    "proxied": True
-                }
-            else:
-                raise HTTPException(status_code=response.status_code, detail="Failed to fetch website")
+            # Remove X-Frame-Options and CSP headers that block iframe embedding
+            content = modify_content_for_iframe(content, url)
+            
+            return {
+                "content": content,
+                "content_type": "text/html",
+                "status_code": response.status_code,
+                "proxied": True
+            }
+        else:
+            raise HTTPException(status_code=response.status_code, detail="Failed to fetch website")
                 
     except Exception as e:
         logging.error(f"Proxy error for {url}: {str(e)}")
@@ -730,6 +1247,15 @@ async def health_check():
             "timestamp": datetime.now(timezone.utc)
         }
 
+@api_router.get("/status/http-pools")
+async def get_http_pool_status():
+    """Connection pool statistics for the shared upstream HTTP clients"""
+    return {
+        **http_clients.get_stats(),
+        "ipfs_gateways": ipfs_gateways.get_stats(),
+        "timestamp": datetime.now(timezone.utc)
+    }
+
 @api_router.get("/privacy/status")
 async def get_privacy_status():
     """Get comprehensive privacy status"""
@@ -753,10 +1279,11 @@ async def get_privacy_status():
 
 # Blockchain-integrated API endpoints
 @api_router.post("/blockchain/domains/register")
-async def register_prv_domain(request: Dict[str, Any]):
+async def register_prv_domain(request: Dict[str, Any], wait: bool = False):
     """
     Register a .prv domain on Cosmos blockchain with developer-paid transactions
     Provides Web2 UX while utilizing blockchain security
+    Returns once the transaction is broadcast; wait=true waits for it to be committed
     """
     try:
         from services.cosmos_service import cosmos_service
@@ -787,7 +1314,8 @@ async def register_prv_domain(request: Dict[str, Any]):
                 **metadata,
                 "owner_email": owner_email,
                 "registration_source": "privachain_api"
-            }
+            },
+            wait=wait
         )
         
         if result["success"]:
@@ -798,6 +1326,7 @@ async def register_prv_domain(request: Dict[str, Any]):
                 "owner_email": owner_email,
                 "blockchain_tx": result["tx_hash"],
                 "block_height": result.get("block_height"),
+                "tx_status": result.get("status"),
                 "fee_info": {
                     "paid_by": "developer",
                     "user_cost": "FREE",
@@ -816,10 +1345,11 @@ async def register_prv_domain(request: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.post("/blockchain/content/upload")
-async def upload_content_to_blockchain(request: Dict[str, Any]):
+async def upload_content_to_blockchain(request: Dict[str, Any], wait: bool = False):
     """
     Upload content to IPFS and register on Cosmos blockchain
     Transparent blockchain verification with Web2 UX
+    Returns once the transaction is broadcast; wait=true waits for it to be committed
     """
     try:
         from services.cosmos_service import cosmos_service
@@ -832,37 +1362,40 @@ async def upload_content_to_blockchain(request: Dict[str, Any]):
         if not content_data or not owner_email:
             raise HTTPException(status_code=400, detail="Content and owner email are required")
         
-        # Generate content hash and owner address
+        # Owner address from the email
         content_bytes = content_data.encode() if isinstance(content_data, str) else content_data
-        content_hash = hashlib.sha256(content_bytes).hexdigest()
         owner_address = hashlib.sha256(owner_email.encode()).hexdigest()[:40]
         
-        # Simulate IPFS upload (in production, actually upload to IPFS)
-        ipfs_hash = f"Qm{content_hash[:44]}"
-        
-        logger.info(f"📦 Uploading content to blockchain: {ipfs_hash}")
-        
-        # Encrypt content if requested
+        # Encrypt content if requested; the envelope is what gets stored
+        stored_bytes = content_bytes
         encryption_metadata = {}
         if encryption_enabled:
             from services.privacy_service import privacy_service
             try:
-                encrypted_data = privacy_service.encrypt_ipfs_content(content_bytes)
+                encrypted_data = await privacy_service.aencrypt(content_bytes)
                 encryption_metadata = {
                     "encrypted": True,
                     "encryption_method": encrypted_data.get("encryption_method"),
                     "content_integrity_hash": encrypted_data.get("content_hash")
                 }
+                stored_bytes = json.dumps(encrypted_data).encode('utf-8')
                 logger.info("🔒 Content encrypted before blockchain registration")
             except Exception as encrypt_error:
                 logger.warning(f"Encryption failed, proceeding without: {encrypt_error}")
         
+        # Real CID of the stored bytes, with the blocks pushed to the IPFS node when configured
+        dag = await content_resolver.ipfs_service.add_dag(stored_bytes)
+        ipfs_hash = dag["cid"]
+        
+        logger.info(f"📦 Uploading content to blockchain: {ipfs_hash}")
+        
         # Register content on Cosmos blockchain
         result = await cosmos_service.register_content(
             content_hash=ipfs_hash,
             content_type=content_type,
             owner_address=owner_address,
-            encryption_metadata=encryption_metadata
+            encryption_metadata=encryption_metadata,
+            wait=wait
         )
         
         if result["success"]:
@@ -874,7 +1407,9 @@ async def upload_content_to_blockchain(request: Dict[str, Any]):
                 "owner_email": owner_email,
                 "blockchain_tx": result["tx_hash"],
                 "block_height": result.get("block_height"),
+                "tx_status": result.get("status"),
                 "encryption_enabled": encryption_enabled,
+                "ipfs_pushed": dag["pushed"],
                 "fee_info": {
                     "paid_by": "developer", 
                     "user_cost": "FREE",
@@ -893,10 +1428,11 @@ async def upload_content_to_blockchain(request: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.post("/blockchain/messages/send")
-async def send_blockchain_message(request: Dict[str, Any]):
+async def send_blockchain_message(request: Dict[str, Any], wait: bool = False):
     """
     Send secure message with Cosmos blockchain verification
     E2E encryption with blockchain-verified delivery
+    Returns once the transaction is broadcast; wait=true waits for it to be committed
     """
     try:
         from services.cosmos_service import cosmos_service
@@ -917,7 +1453,7 @@ async def send_blockchain_message(request: Dict[str, Any]):
         
         # Encrypt message content
         message_bytes = message_content.encode()
-        encrypted_data = privacy_service.encrypt_ipfs_content(message_bytes)
+        encrypted_data = await privacy_service.aencrypt(message_bytes)
         
         # Create message hash for blockchain
         message_hash = hashlib.sha256(message_bytes).hexdigest()
@@ -928,7 +1464,8 @@ async def send_blockchain_message(request: Dict[str, Any]):
             sender=sender_address,
             recipient=recipient_address,
             message_hash=message_hash,
-            encryption_key_hash=encryption_key_hash
+            encryption_key_hash=encryption_key_hash,
+            wait=wait
         )
         
         if result["success"]:
@@ -940,6 +1477,7 @@ async def send_blockchain_message(request: Dict[str, Any]):
                 "recipient_email": recipient_email,
                 "blockchain_tx": result["tx_hash"],
                 "block_height": result.get("block_height"),
+                "tx_status": result.get("status"),
                 "encryption": "AES-256-CBC with forward secrecy",
                 "fee_info": {
                     "paid_by": "developer",
@@ -958,6 +1496,16 @@ async def send_blockchain_message(request: Dict[str, Any]):
         logger.error(f"Message send API error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/blockchain/tx/{tx_hash}")
+async def get_blockchain_transaction(tx_hash: str):
+    """Lifecycle status of a broadcast transaction: pending, confirmed, failed or timed_out"""
+    from services.cosmos_service import cosmos_service
+    
+    status = await cosmos_service.get_transaction_status(tx_hash)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return status
+
 @api_router.get("/blockchain/status")
 async def get_blockchain_status():
     """
@@ -992,6 +1540,14 @@ async def get_blockchain_status():
                 "dpi_bypass": True
             },
             "chain_info": chain_info,
+            "domain_registry": domain_registry.get_stats(),
+            "domain_search_index": domain_search_index.get_stats(),
+            "domain_resolution_cache": cosmos_service.resolution_cache.get_stats(),
+            "domain_access_recording": access_recorder.get_stats(),
+            "transaction_batching": cosmos_service.tx_batcher.get_stats(),
+            "account_sequence": cosmos_service.sequence_manager.get_stats(),
+            "transaction_tracking": cosmos_service.tx_tracker.get_stats(),
+            "chain_indexer": chain_indexer.get_stats(),
             "last_updated": datetime.now(timezone.utc).isoformat()
         }
         
@@ -1159,6 +1715,16 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    from services.privacy_service import privacy_service
+    await privacy_service.shutdown()
+    # Flush queued domain accesses while the Cosmos client is still open
+    await access_recorder.stop()
+    await chain_indexer.stop()
+    await domain_search_index.stop()
+    from services.cosmos_service import cosmos_service
+    await cosmos_service.close()
+    await http_clients.close()
     from services.working_browser_service import working_browser_service
-    await working_browser_service.stop()
\ No newline at end of file
+    await working_browser_service.stop()
+    # Background services above may still flush to Mongo, so its client closes last
+    client.close()
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Access Recorder - batched, off-the-read-path analytics for .prv domain views
+- Page views are queued in memory without waiting on the chain
+- A background worker aggregates hits per domain over ACCESS_RECORD_WINDOW_SECONDS
+- Each window is written to the chain as one transaction
+- The queue is bounded; when it is full, new views are dropped and counted rather than slowing reads
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class AccessRecorder:
+    def __init__(self, window_seconds: float = None, max_queue: int = None, max_domains_per_batch: int = None):
+        self.window_seconds = window_seconds or float(os.environ.get('ACCESS_RECORD_WINDOW_SECONDS', 30))
+        self.max_queue = max_queue or int(os.environ.get('ACCESS_RECORD_MAX_QUEUE', 10000))
+        self.max_domains_per_batch = max_domains_per_batch or int(os.environ.get('ACCESS_RECORD_MAX_DOMAINS', 500))
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # domain -> aggregated hits for the window being collected
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._window_start: Optional[str] = None
+        self.stats = {
+            'recorded': 0,
+            'dropped': 0,
+            'batches': 0,
+            'batch_failures': 0,
+            'largest_batch': 0
+        }
+
+    def record(self, domain: str, content_hash: str, owner: Optional[str]):
+        """Queue one domain view; never blocks and never touches the chain"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain_loop())
+
+        try:
+            self._queue.put_nowait((domain, content_hash, owner, datetime.now(timezone.utc).isoformat()))
+            self.stats['recorded'] += 1
+        except asyncio.QueueFull:
+            self.stats['dropped'] += 1
+
+    def _aggregate(self, event):
+        domain, content_hash, owner, seen_at = event
+        if self._window_start is None:
+            self._window_start = seen_at
+        entry = self._pending.get(domain)
+        if entry is None:
+            entry = self._pending[domain] = {
+                'domain': domain,
+                'content_hash': content_hash,
+                'owner': owner or 'unknown',
+                'hits': 0
+            }
+        entry['hits'] += 1
+        entry['content_hash'] = content_hash
+        entry['last_access'] = seen_at
+
+    async def _drain_loop(self):
+        while True:
+            # Idle until the first view of a window arrives
+            self._aggregate(await self._queue.get())
+            window_closes = time.monotonic() + self.window_seconds
+
+            while len(self._pending) < self.max_domains_per_batch:
+                remaining = window_closes - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    self._aggregate(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush()
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        from services.cosmos_service import cosmos_service
+
+        accesses = list(self._pending.values())
+        window_start = self._window_start
+        self._pending = {}
+        self._window_start = None
+
+        self.stats['batches'] += 1
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(accesses))
+        try:
+            result = await cosmos_service.record_domain_accesses(
+                accesses, window_start, datetime.now(timezone.utc).isoformat()
+            )
+            if result.get('success'):
+                logger.info(
+                    f"📊 Recorded {sum(a['hits'] for a in accesses)} views of {len(accesses)} domains "
+                    f"on blockchain: {result.get('tx_hash', 'N/A')}"
+                )
+            else:
+                self.stats['batch_failures'] += 1
+                logger.warning(f"Could not record domain access batch: {result.get('error')}")
+        except Exception as e:
+            self.stats['batch_failures'] += 1
+            logger.warning(f"Could not record domain access batch: {str(e)}")
+
+    async def stop(self):
+        """Stop the worker and flush whatever has been collected"""
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            self._aggregate(self._queue.get_nowait())
+        await self._flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'pending_domains': len(self._pending),
+            'window_seconds': self.window_seconds
+        }
+
+# Global access recorder instance
+access_recorder = AccessRecorder()
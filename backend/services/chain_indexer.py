@@ -0,0 +1,424 @@
+"""
+Chain Event Indexer - streams committed privachain transactions into MongoDB
+- Follows the chain head from a persisted checkpoint, fetching up to
+  COSMOS_INDEXER_BATCH_BLOCKS blocks per step with paged tx_search
+- Without a checkpoint, indexing starts at COSMOS_INDEXER_START_HEIGHT or, if that is
+  unset, at the current chain head (never crawling a real chain from genesis)
+- Decodes privachain/* msgs into db.chain_events (one record per msg, history and messages),
+  db.chain_domains and db.chain_contents (current state), written with unordered bulk upserts
+- Records are keyed by tx hash and msg index (events) or by domain / content hash (state),
+  so replaying a range after a crash rewrites the same documents
+- The checkpoint remembers recent block hashes; when the block at the checkpoint changes
+  or is gone, the indexer rolls back to the last matching block and re-indexes from there
+- Reads are only served once the indexer is running and within COSMOS_INDEXER_READY_LAG
+  blocks of the head; callers fall back (or report the index unavailable) otherwise
+- Limitation: privachain msgs are decoded from Amino-JSON transactions, the format
+  benchmarks/mock_chain_node.py commits. There are no protobuf definitions for privachain
+  msgs, so protobuf TxRaw transactions from a real Cosmos SDK node are recognised and
+  counted (protobuf_txs_skipped) but not indexed
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import DeleteOne, ReplaceOne, DESCENDING
+
+from services.domain_registry import normalize_domain
+from services.domain_search import domain_search_index
+
+logger = logging.getLogger(__name__)
+
+# Event types by msg type
+MSG_EVENT_TYPES = {
+    'privachain/RegisterDomain': 'register_domain',
+    'privachain/RegisterContent': 'register_content',
+    'privachain/RegisterMessage': 'register_message',
+    'privachain/RecordDomainAccess': 'record_domain_access'
+}
+
+TX_SEARCH_PAGE_SIZE = 100     # Tendermint's maximum per_page
+RECENT_HASHES = 64            # batch-end block hashes kept for finding a fork point
+
+def decode_tx(encoded: str) -> Optional[Dict[str, Any]]:
+    """
+    Amino JSON transaction from tx_search bytes (bare or wrapped in a StdTx envelope).
+    Only the mock chain node commits this format; protobuf txs decode to None.
+    """
+    try:
+        tx = json.loads(base64.b64decode(encoded))
+    except Exception:
+        return None
+    if not isinstance(tx, dict):
+        return None
+    return tx.get('value', tx) if tx.get('type') == 'cosmos-sdk/StdTx' else tx
+
+def _protobuf_fields(data: bytes) -> Optional[List[Tuple[int, int, Any]]]:
+    """(field number, wire type, value) of a protobuf message; None if data is not one"""
+    fields, position = [], 0
+    try:
+        while position < len(data):
+            key, position = _read_varint(data, position)
+            field, wire_type = key >> 3, key & 7
+            if wire_type == 0:
+                value, position = _read_varint(data, position)
+            elif wire_type == 2:
+                length, position = _read_varint(data, position)
+                value, position = data[position:position + length], position + length
+                if position > len(data):
+                    return None
+            elif wire_type in (1, 5):
+                size = 8 if wire_type == 1 else 4
+                value, position = data[position:position + size], position + size
+            else:
+                return None
+            if field == 0:
+                return None
+            fields.append((field, wire_type, value))
+    except IndexError:
+        return None
+    return fields
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    value, shift = 0, 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+def protobuf_msg_types(encoded: str) -> Optional[List[str]]:
+    """Msg type URLs of a protobuf TxRaw (body_bytes -> TxBody.messages -> Any.type_url)"""
+    try:
+        raw = _protobuf_fields(base64.b64decode(encoded))
+        body = next((value for field, wire, value in raw or [] if field == 1 and wire == 2), None)
+        messages = [value for field, wire, value in _protobuf_fields(body) or [] if field == 1 and wire == 2] if body is not None else None
+        if not messages:
+            return None
+        return [next(value.decode() for field, wire, value in _protobuf_fields(message) if field == 1 and wire == 2)
+                for message in messages]
+    except Exception:
+        return None
+
+def msg_events(tx_hash: str, height: int, tx_index: int, tx: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One event document per privachain msg of a committed transaction"""
+    events = []
+    for msg_index, msg in enumerate(tx.get('msgs') or tx.get('msg') or []):
+        kind = msg.get('type', '')
+        if not kind.startswith('privachain/'):
+            continue
+        value = msg.get('value') or {}
+        event = {
+            '_id': f"{tx_hash}:{msg_index}",
+            'tx_hash': tx_hash,
+            'block_height': height,
+            'tx_index': tx_index,
+            'msg_index': msg_index,
+            'type': MSG_EVENT_TYPES.get(kind, kind),
+            'timestamp': value.get('timestamp'),
+            'details': value
+        }
+        if value.get('domain'):
+            event['domain'] = normalize_domain(value['domain'])
+        for field in ('content_hash', 'owner', 'sender', 'recipient'):
+            if value.get(field):
+                event[field] = value[field]
+        events.append(event)
+    return events
+
+def domain_state(event: Dict[str, Any]) -> Dict[str, Any]:
+    details = event['details']
+    return {
+        'domain': event['domain'],
+        'content_hash': details.get('content_hash'),
+        'owner': details.get('owner'),
+        'metadata': details.get('metadata') or {},
+        'height': event['block_height'],
+        'tx_hash': event['tx_hash'],
+        'registered_at': event.get('timestamp')
+    }
+
+def content_state(event: Dict[str, Any]) -> Dict[str, Any]:
+    details = event['details']
+    return {
+        'content_hash': details.get('content_hash'),
+        'content_type': details.get('content_type'),
+        'owner': details.get('owner'),
+        'encryption_metadata': details.get('encryption_metadata') or {},
+        'height': event['block_height'],
+        'tx_hash': event['tx_hash'],
+        'registered_at': event.get('timestamp')
+    }
+
+class ChainIndexer:
+    def __init__(self, batch_blocks: int = None, poll_interval: float = None, confirmations: int = None):
+        self.batch_blocks = batch_blocks or int(os.environ.get('COSMOS_INDEXER_BATCH_BLOCKS', 1000))
+        self.poll_interval = poll_interval or float(os.environ.get('COSMOS_INDEXER_POLL_SECONDS', 1))
+        # Blocks left between the indexed height and the chain head
+        self.confirmations = confirmations if confirmations is not None else int(os.environ.get('COSMOS_INDEXER_CONFIRMATIONS', 0))
+        self.enabled = os.environ.get('COSMOS_INDEXER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.db = None
+        self.search_txs: Optional[Callable[[int, int, int, int], Awaitable[Dict[str, Any]]]] = None
+        self.block_meta: Optional[Callable[[int], Awaitable[Optional[Dict[str, Any]]]]] = None
+        self.latest_height: Optional[Callable[[], Optional[int]]] = None
+        # 'start' is the height indexing began below; a re-org never rolls back past it
+        self.checkpoint = {'height': 0, 'hash': None, 'recent': [], 'start': 0}
+        self.has_checkpoint = False
+        # First height indexed when there is no checkpoint; None starts at the chain head
+        start_height = os.environ.get('COSMOS_INDEXER_START_HEIGHT')
+        self.start_height = int(start_height) if start_height else None
+        self.target_height = 0
+        # Reads are served from the index only while it is at most this far behind the head
+        self.ready_lag = int(os.environ.get('COSMOS_INDEXER_READY_LAG', 5))
+        self._task: Optional[asyncio.Task] = None
+        self._protobuf_warned = False
+        self.stats = {
+            'batches': 0,
+            'blocks_indexed': 0,
+            'txs_indexed': 0,
+            'events_indexed': 0,
+            'failed_txs_skipped': 0,
+            'undecodable_txs': 0,
+            'protobuf_txs_skipped': 0,
+            'reorgs': 0,
+            'events_rolled_back': 0,
+            'errors': 0,
+            'last_batch_blocks_per_second': 0.0
+        }
+
+    async def initialize(self, db, chain) -> bool:
+        """Load the checkpoint and start following the chain behind a CosmosService"""
+        try:
+            self.db = db
+            self.search_txs = chain.search_block_txs
+            self.block_meta = chain.get_block_meta
+            self.latest_height = lambda: chain.chain_tracker.latest_height() if chain.chain_tracker else None
+            state = await db.chain_indexer_state.find_one({'_id': 'checkpoint'})
+            if state:
+                self.checkpoint = {'height': state['height'], 'hash': state.get('hash'), 'recent': state.get('recent', []),
+                                   'start': state.get('start', 0)}
+                self.has_checkpoint = True
+            if not self.enabled or chain.simulate:
+                logger.info("Chain indexer disabled (no chain to follow)")
+                return False
+            self._task = asyncio.create_task(self._run())
+            if self.has_checkpoint:
+                logger.info(f"Chain indexer following the chain from height {self.checkpoint['height']}")
+            else:
+                logger.info(f"Chain indexer starting at {f'height {self.start_height}' if self.start_height else 'the chain head'}")
+            return True
+        except Exception as e:
+            logger.error(f"Chain indexer initialization error: {str(e)}")
+            return False
+
+    @property
+    def indexed_height(self) -> int:
+        return self.checkpoint['height']
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def ready(self) -> bool:
+        """Running and caught up with the chain head, so index reads are complete"""
+        if self.db is None or not self.running:
+            return False
+        head = self.latest_height() if self.latest_height else None
+        return head is not None and head - self.confirmations - self.indexed_height <= self.ready_lag
+
+    async def _run(self):
+        while True:
+            try:
+                head = self.latest_height()
+                if not self.has_checkpoint and head is not None:
+                    await self._start_checkpoint(head)
+                self.target_height = (head or 0) - self.confirmations
+                if self.has_checkpoint and self.target_height > self.indexed_height:
+                    await self.index_next()
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Chain indexer error: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def index_next(self, target_height: int = None) -> int:
+        """Index the next batch of blocks up to target_height; returns the new indexed height"""
+        target_height = target_height or self.target_height
+        start = self.indexed_height + 1
+        end = min(target_height, start + self.batch_blocks - 1)
+        if end < start:
+            return self.indexed_height
+        started = time.perf_counter()
+
+        if self.checkpoint['hash'] and not await self._checkpoint_on_chain():
+            await self._handle_reorg()
+            return self.indexed_height
+
+        txs, end_meta = await asyncio.gather(self._fetch_txs(start, end), self.block_meta(end))
+        events = []
+        for entry in txs:
+            if int((entry.get('tx_result') or {}).get('code') or 0):
+                self.stats['failed_txs_skipped'] += 1
+                continue
+            tx = decode_tx(entry.get('tx', ''))
+            if tx is None:
+                self._skip_undecodable(entry)
+                continue
+            events.extend(msg_events(entry['hash'].upper(), int(entry['height']), int(entry.get('index', 0)), tx))
+
+        await self._write(events)
+        await self._save_checkpoint(end, (end_meta or {}).get('hash'))
+
+        elapsed = time.perf_counter() - started
+        self.stats['batches'] += 1
+        self.stats['blocks_indexed'] += end - start + 1
+        self.stats['txs_indexed'] += len(txs)
+        self.stats['events_indexed'] += len(events)
+        self.stats['last_batch_blocks_per_second'] = round((end - start + 1) / elapsed, 1) if elapsed else 0.0
+        return end
+
+    def _skip_undecodable(self, entry: Dict[str, Any]):
+        msg_types = protobuf_msg_types(entry.get('tx', ''))
+        if msg_types is None:
+            self.stats['undecodable_txs'] += 1
+            return
+        self.stats['protobuf_txs_skipped'] += 1
+        if not self._protobuf_warned:
+            self._protobuf_warned = True
+            logger.warning(f"Chain indexer skipping protobuf transactions ({', '.join(msg_types)}): "
+                           f"only Amino-JSON privachain txs (mock chain node) are indexed")
+
+    async def _fetch_txs(self, start: int, end: int) -> List[Dict[str, Any]]:
+        first = await self.search_txs(start, end, 1, TX_SEARCH_PAGE_SIZE)
+        txs = list(first.get('txs', []))
+        pages = -(-int(first.get('total_count', 0)) // TX_SEARCH_PAGE_SIZE)
+        if pages > 1:
+            rest = await asyncio.gather(*(self.search_txs(start, end, page, TX_SEARCH_PAGE_SIZE) for page in range(2, pages + 1)))
+            for result in rest:
+                txs.extend(result.get('txs', []))
+        return sorted(txs, key=lambda entry: (int(entry['height']), int(entry.get('index', 0))))
+
+    async def _write(self, events: List[Dict[str, Any]]):
+        if not events:
+            return
+        # Later events win: keep the last state per domain / content hash of this batch
+        domains = {event['domain']: domain_state(event) for event in events if event['type'] == 'register_domain' and 'domain' in event}
+        contents = {event['content_hash']: content_state(event) for event in events if event['type'] == 'register_content' and 'content_hash' in event}
+
+        await self.db.chain_events.bulk_write([ReplaceOne({'_id': event['_id']}, event, upsert=True) for event in events], ordered=False)
+        if domains:
+            await self.db.chain_domains.bulk_write([ReplaceOne({'domain': name}, doc, upsert=True) for name, doc in domains.items()], ordered=False)
+        if contents:
+            await self.db.chain_contents.bulk_write([ReplaceOne({'content_hash': content_hash}, doc, upsert=True) for content_hash, doc in contents.items()], ordered=False)
+        for doc in domains.values():
+            domain_search_index.add(doc['domain'], doc['metadata'], doc['content_hash'], doc['owner'])
+
+    async def _start_checkpoint(self, head: int):
+        """First checkpoint: just below COSMOS_INDEXER_START_HEIGHT, or at the confirmed head"""
+        height = self.start_height - 1 if self.start_height else max(head - self.confirmations, 0)
+        self.checkpoint['start'] = height
+        await self._save_checkpoint(height, None)
+        self.has_checkpoint = True
+        logger.info(f"Chain indexer has no checkpoint, indexing from height {height + 1}")
+
+    async def _save_checkpoint(self, height: int, block_hash: Optional[str]):
+        recent = self.checkpoint['recent']
+        if block_hash:
+            recent = (recent + [[height, block_hash]])[-RECENT_HASHES:]
+        self.checkpoint = {'height': height, 'hash': block_hash, 'recent': recent, 'start': self.checkpoint['start']}
+        await self.db.chain_indexer_state.replace_one(
+            {'_id': 'checkpoint'},
+            {**self.checkpoint, 'updated_at': datetime.now(timezone.utc)},
+            upsert=True
+        )
+
+    async def _checkpoint_on_chain(self) -> bool:
+        # A block that is gone (the chain rewound below it) is a mismatch too
+        meta = await self.block_meta(self.checkpoint['height'])
+        return meta is not None and meta.get('hash') == self.checkpoint['hash']
+
+    async def _handle_reorg(self):
+        """The indexed chain forked: roll back to the newest remembered block still on chain"""
+        self.stats['reorgs'] += 1
+        fork_height, fork_hash, recent = self.checkpoint['start'], None, []
+        for position in range(len(self.checkpoint['recent']) - 2, -1, -1):
+            height, block_hash = self.checkpoint['recent'][position]
+            meta = await self.block_meta(height)
+            if meta and meta.get('hash') == block_hash:
+                fork_height, fork_hash, recent = height, block_hash, self.checkpoint['recent'][:position + 1]
+                break
+        logger.warning(f"Chain reorganisation below indexed height {self.indexed_height}, rolling back to {fork_height}")
+        await self.rollback(fork_height)
+        self.checkpoint = {'height': fork_height, 'hash': fork_hash, 'recent': recent[:-1], 'start': self.checkpoint['start']}
+        await self._save_checkpoint(fork_height, fork_hash)
+
+    async def rollback(self, height: int):
+        """Drop everything indexed above height and rebuild the state it had touched"""
+        domains = await self.db.chain_events.distinct('domain', {'block_height': {'$gt': height}, 'type': 'register_domain'})
+        contents = await self.db.chain_events.distinct('content_hash', {'block_height': {'$gt': height}, 'type': 'register_content'})
+        result = await self.db.chain_events.delete_many({'block_height': {'$gt': height}})
+        self.stats['events_rolled_back'] += result.deleted_count
+
+        domain_ops = []
+        for name in domains:
+            previous = await self._latest_event({'domain': name, 'type': 'register_domain'})
+            if previous:
+                state = domain_state(previous)
+                domain_ops.append(ReplaceOne({'domain': name}, state, upsert=True))
+                domain_search_index.add(name, state['metadata'], state['content_hash'], state['owner'])
+            else:
+                domain_ops.append(DeleteOne({'domain': name}))
+                domain_search_index.remove(name)
+        content_ops = []
+        for content_hash in contents:
+            previous = await self._latest_event({'content_hash': content_hash, 'type': 'register_content'})
+            content_ops.append(ReplaceOne({'content_hash': content_hash}, content_state(previous), upsert=True) if previous
+                               else DeleteOne({'content_hash': content_hash}))
+        if domain_ops:
+            await self.db.chain_domains.bulk_write(domain_ops, ordered=False)
+        if content_ops:
+            await self.db.chain_contents.bulk_write(content_ops, ordered=False)
+
+    async def _latest_event(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        cursor = self.db.chain_events.find(query).sort([('block_height', DESCENDING), ('tx_index', DESCENDING), ('msg_index', DESCENDING)]).limit(1)
+        events = await cursor.to_list(length=1)
+        return events[0] if events else None
+
+    # --- local reads -------------------------------------------------------
+
+    async def get_domain(self, domain: str) -> Optional[Dict[str, Any]]:
+        return await self.db.chain_domains.find_one({'domain': normalize_domain(domain)}, {'_id': 0})
+
+    async def get_domain_history(self, domain: str, limit: int = 100) -> List[Dict[str, Any]]:
+        cursor = self.db.chain_events.find({'domain': normalize_domain(domain)}, {'_id': 0}).sort(
+            [('block_height', DESCENDING), ('tx_index', DESCENDING), ('msg_index', DESCENDING)]
+        ).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'running': self.running,
+            'ready': self.ready,
+            'indexed_height': self.indexed_height,
+            'lag_blocks': max(self.target_height - self.indexed_height, 0)
+        }
+
+# Global chain indexer instance
+chain_indexer = ChainIndexer()
@@ -0,0 +1,168 @@
+"""
+Chain Head Tracker - in-memory snapshot of the Cosmos chain head
+- Refreshes chain ID, latest height and node info from RPC /status on an interval
+- Follows NewBlock events over the Tendermint websocket when available, and forwards
+  Tx events to a listener (the transaction tracker) on the same connection
+- Reads are served from memory with staleness metadata
+- Keeps serving the last-known snapshot while the RPC is unreachable
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    import websockets
+except ImportError:  # websocket following is optional; polling still works
+    websockets = None
+
+logger = logging.getLogger(__name__)
+
+NEW_BLOCK_SUBSCRIPTION = {
+    "jsonrpc": "2.0",
+    "method": "subscribe",
+    "id": 1,
+    "params": {"query": "tm.event='NewBlock'"}
+}
+
+TX_SUBSCRIPTION = {
+    "jsonrpc": "2.0",
+    "method": "subscribe",
+    "id": 2,
+    "params": {"query": "tm.event='Tx'"}
+}
+
+class ChainHeadTracker:
+    def __init__(self, fetch_status: Callable[[], Awaitable[Dict[str, Any]]], websocket_url: Optional[str] = None,
+                 refresh_interval: float = None, stale_after: float = None,
+                 on_tx_event: Optional[Callable[[str, int, int, Optional[str]], None]] = None):
+        self.fetch_status = fetch_status
+        self.on_tx_event = on_tx_event
+        self.websocket_url = websocket_url if websockets is not None else None
+        self.refresh_interval = refresh_interval or float(os.environ.get('COSMOS_STATUS_REFRESH_SECONDS', 5))
+        self.stale_after = stale_after or float(os.environ.get('COSMOS_STATUS_STALE_SECONDS', 30))
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.refreshed_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.websocket_connected = False
+        self._tasks = []
+
+    async def start(self):
+        """Take a first snapshot, then keep it fresh in the background"""
+        await self.refresh()
+        self._tasks.append(asyncio.create_task(self._poll_loop()))
+        if self.websocket_url:
+            self._tasks.append(asyncio.create_task(self._websocket_loop()))
+
+    @property
+    def is_running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def refresh(self) -> bool:
+        """Fetch /status once; on failure the previous snapshot is kept"""
+        try:
+            status = await self.fetch_status()
+            if not status.get("connected"):
+                raise ConnectionError(status.get("error", "RPC status unavailable"))
+            self._update(status, source="rpc_status")
+            self.last_error = None
+            return True
+        except Exception as e:
+            # Warn once per outage rather than on every poll
+            log = logger.warning if self.last_error is None else logger.debug
+            log(f"Chain status refresh failed, serving last-known snapshot: {str(e)}")
+            self.last_error = str(e)
+            return False
+
+    def _update(self, fields: Dict[str, Any], source: str):
+        snapshot = dict(self.snapshot or {})
+        snapshot.update({key: value for key, value in fields.items() if value is not None})
+        snapshot["source"] = source
+        self.snapshot = snapshot
+        self.refreshed_at = time.monotonic()
+
+    async def _poll_loop(self):
+        while True:
+            # With a live websocket, polling only refreshes node info, so it can run less often
+            interval = self.refresh_interval * (6 if self.websocket_connected else 1)
+            await asyncio.sleep(interval)
+            await self.refresh()
+
+    async def _websocket_loop(self):
+        backoff = 1.0
+        while True:
+            try:
+                async with websockets.connect(self.websocket_url, ping_interval=20) as connection:
+                    await connection.send(json.dumps(NEW_BLOCK_SUBSCRIPTION))
+                    if self.on_tx_event:
+                        await connection.send(json.dumps(TX_SUBSCRIPTION))
+                    self.websocket_connected = True
+                    backoff = 1.0
+                    logger.info(f"Following new blocks over {self.websocket_url}")
+                    async for message in connection:
+                        message = json.loads(message)
+                        if self.on_tx_event:
+                            self._dispatch_tx_event(message)
+                        header = self._block_header(message)
+                        if header:
+                            self._update({
+                                "chain_id": header.get("chain_id"),
+                                "latest_block_height": header.get("height"),
+                                "latest_block_time": header.get("time"),
+                                "connected": True
+                            }, source="websocket")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Chain websocket unavailable: {str(e)}")
+            self.websocket_connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    def _block_header(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            return message["result"]["data"]["value"]["block"]["header"]
+        except (KeyError, TypeError):
+            return None
+
+    def _dispatch_tx_event(self, message: Dict[str, Any]):
+        try:
+            result = message["result"]
+            tx_result = result["data"]["value"]["TxResult"]
+            tx_hash = result["events"]["tx.hash"][0]
+        except (KeyError, TypeError, IndexError):
+            return
+        outcome = tx_result.get("result", {})
+        self.on_tx_event(tx_hash, int(tx_result.get("height", 0)), int(outcome.get("code", 0)), outcome.get("log"))
+
+    def latest_height(self) -> Optional[int]:
+        if not self.snapshot or self.snapshot.get("latest_block_height") is None:
+            return None
+        return int(self.snapshot["latest_block_height"])
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Current snapshot with staleness metadata; never touches the network"""
+        if self.snapshot is None:
+            return {"connected": False, "error": self.last_error or "no chain status yet", "stale": True}
+
+        age = time.monotonic() - self.refreshed_at
+        return {
+            **self.snapshot,
+            "snapshot_age_seconds": round(age, 3),
+            "snapshot_time": datetime.fromtimestamp(time.time() - age, timezone.utc).isoformat(),
+            "stale": age > self.stale_after,
+            "rpc_reachable": self.last_error is None,
+            "last_error": self.last_error,
+            "websocket_connected": self.websocket_connected
+        }
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.websocket_connected = False
@@ -0,0 +1,295 @@
+"""
+Content Cache Service - tiered read-through cache for resolved content
+- In-process LRU bounded by bytes in front of the db.content_cache collection
+- Keys derived from URL scheme plus CID, .prv domain or full HTTP URL
+- IPFS CIDs are immutable and cached indefinitely, .prv resolutions briefly
+- HTTP entries follow Cache-Control and are revalidated with ETag/Last-Modified
+- Bodies stored once in db.content_blobs keyed by SHA-256, zstd-compressed;
+  db.content_cache holds a small reference document per URL
+"""
+
+import hashlib
+import logging
+import os
+import re
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Any
+
+import zstandard
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# Fields of a resolver result that are persisted with a cache entry
+RESULT_FIELDS = (
+    'content', 'content_type', 'source', 'metadata', 'privacy_enabled', 'privacy_features',
+    'cid', 'domain', 'blockchain_info', 'status_code'
+)
+
+# Stale HTTP entries are kept this long after expiry so they can be revalidated
+REVALIDATION_GRACE = timedelta(days=1)
+
+# Reference document fields returned by the lightweight cached-content listing
+SUMMARY_PROJECTION = {
+    '_id': 0, 'id': 1, 'url': 1, 'content_type': 1, 'source': 1, 'timestamp': 1, 'metadata': 1,
+    'privacy_enabled': 1, 'privacy_features': 1, 'content_digest': 1, 'size': 1, 'expires_at': 1
+}
+
+BLOB_CODEC = 'zstd'
+
+class ContentCache:
+    def __init__(self, max_bytes: int = None, prv_ttl: int = None):
+        self.max_bytes = max_bytes or int(os.environ.get('CONTENT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        self.prv_ttl = prv_ttl if prv_ttl is not None else int(os.environ.get('CONTENT_CACHE_PRV_TTL', 60))
+        self.collection = None
+        self.blobs = None
+        self._compressor = zstandard.ZstdCompressor(level=int(os.environ.get('CONTENT_CACHE_ZSTD_LEVEL', 3)))
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.stats = {
+            'memory_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'revalidations': 0,
+            'stores': 0,
+            'evictions': 0,
+            'blobs_written': 0,
+            'blobs_deduplicated': 0
+        }
+
+    async def initialize(self, db):
+        """Attach the Mongo tier (its indexes are declared in services.index_service)"""
+        try:
+            self.collection = db.content_cache
+            self.blobs = db.content_blobs
+            logger.info(f"Content cache ready ({self.max_bytes // (1024 * 1024)} MiB in-process tier)")
+            return True
+        except Exception as e:
+            logger.error(f"Content cache initialization error: {str(e)}")
+            return False
+
+    def key_for(self, url: str) -> Optional[str]:
+        """Derive the cache key for a URL, or None if the scheme is not cacheable"""
+        if url.startswith('ipfs://'):
+            return f"ipfs:{url.replace('ipfs://', '').split('/')[0]}"
+        if url.endswith('.prv'):
+            return f"prv:{url.lower()}"
+        if url.startswith('http://') or url.startswith('https://'):
+            return f"http:{url}"
+        return None
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        expires_at = entry.get('expires_at')
+        if expires_at is None:
+            return True
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return expires_at > datetime.now(timezone.utc)
+
+    def to_result(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Rebuild a resolver result from a cache entry"""
+        result = {field: entry[field] for field in RESULT_FIELDS if field in entry}
+        result['cache_status'] = 'hit'
+        return result
+
+    def validators(self, entry: Dict[str, Any]) -> Dict[str, str]:
+        """Conditional request headers for revalidating a stale HTTP entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    async def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Look up an entry in memory, then in Mongo. Stale entries are returned for revalidation."""
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            self._entries.move_to_end(cache_key)
+            self._count_lookup('memory_hits', entry)
+            return entry
+
+        if self.collection is not None:
+            try:
+                entry = await self.collection.find_one({'cache_key': cache_key}, {'_id': 0})
+                if entry is not None and 'content' not in entry:
+                    entry['content'] = await self._load_blob(entry.get('content_digest'))
+                    if entry['content'] is None:
+                        entry = None
+            except Exception as e:
+                logger.warning(f"Content cache lookup failed for {cache_key}: {str(e)}")
+                entry = None
+            if entry is not None:
+                self._remember(cache_key, entry)
+                self._count_lookup('db_hits', entry)
+                return entry
+
+        self.stats['misses'] += 1
+        return None
+
+    def _count_lookup(self, counter: str, entry: Dict[str, Any]):
+        if self.is_fresh(entry):
+            self.stats[counter] += 1
+        else:
+            self.stats['stale'] += 1
+
+    async def put(self, cache_key: str, url: str, result: Dict[str, Any], exact_bytes: bool = False):
+        """
+        Store a freshly resolved result if its source allows caching
+        exact_bytes marks content that encodes back to the original body byte for byte
+        (resolver text may have been decoded lossily and must not be served as raw bytes)
+        """
+        expires_at = self._expiry_for(cache_key, result)
+        if expires_at is False:
+            return
+
+        now = datetime.now(timezone.utc)
+        entry = {field: result[field] for field in RESULT_FIELDS if field in result}
+        headers = {k.lower(): v for k, v in (result.get('headers') or {}).items()}
+        content_bytes = (entry.get('content') or '').encode('utf-8')
+        entry.update({
+            'id': str(uuid.uuid4()),
+            'cache_key': cache_key,
+            'url': url,
+            'timestamp': now,
+            'expires_at': expires_at,
+            'purge_at': None if expires_at is None else max(expires_at, now) + REVALIDATION_GRACE,
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'content_digest': hashlib.sha256(content_bytes).hexdigest(),
+            'size': len(content_bytes),
+            'exact_bytes': exact_bytes
+        })
+
+        self._remember(cache_key, entry)
+        self.stats['stores'] += 1
+
+        if self.collection is not None:
+            try:
+                await self._store_blob(entry['content_digest'], content_bytes, entry['purge_at'], now)
+                reference = {field: value for field, value in entry.items() if field != 'content'}
+                await self.collection.replace_one({'cache_key': cache_key}, reference, upsert=True)
+            except Exception as e:
+                logger.warning(f"Content cache store failed for {cache_key}: {str(e)}")
+
+    async def _store_blob(self, digest: str, content_bytes: bytes, purge_at: Optional[datetime], now: datetime):
+        """Write a body once per digest; blobs live as long as their longest-lived reference"""
+        if await self.blobs.count_documents({'_id': digest}, limit=1):
+            self.stats['blobs_deduplicated'] += 1
+            if purge_at is None:
+                await self.blobs.update_one({'_id': digest}, {'$set': {'pinned': True}, '$unset': {'purge_at': ''}})
+            else:
+                await self.blobs.update_one({'_id': digest, 'pinned': {'$ne': True}}, {'$max': {'purge_at': purge_at}})
+            return
+
+        compressed = self._compressor.compress(content_bytes)
+        blob = {
+            '_id': digest,
+            'codec': BLOB_CODEC,
+            'data': compressed,
+            'size': len(content_bytes),
+            'compressed_size': len(compressed),
+            'created_at': now
+        }
+        if purge_at is None:
+            blob['pinned'] = True
+        else:
+            blob['purge_at'] = purge_at
+        try:
+            await self.blobs.insert_one(blob)
+            self.stats['blobs_written'] += 1
+        except DuplicateKeyError:
+            # Another request stored the same body concurrently
+            self.stats['blobs_deduplicated'] += 1
+
+    async def _load_blob(self, digest: Optional[str]) -> Optional[str]:
+        if not digest:
+            return None
+        blob = await self.blobs.find_one({'_id': digest})
+        if blob is None:
+            return None
+        return self._decompressor.decompress(blob['data']).decode('utf-8')
+
+    async def list_recent(self, limit: int = 50, include_content: bool = False) -> List[Dict[str, Any]]:
+        """Most recently cached entries; bodies are only loaded when asked for"""
+        if self.collection is None:
+            return []
+
+        projection = {'_id': 0, 'cache_key': 0} if include_content else SUMMARY_PROJECTION
+        items = await self.collection.find({}, projection).sort('timestamp', DESCENDING).limit(limit).to_list(length=None)
+        if include_content:
+            for item in items:
+                if 'content' not in item:
+                    item['content'] = await self._load_blob(item.get('content_digest')) or ''
+        return items
+
+    def record_revalidation(self):
+        self.stats['revalidations'] += 1
+
+    def _expiry_for(self, cache_key: str, result: Dict[str, Any]):
+        """Expiry time for a result: None caches forever, False means do not cache"""
+        now = datetime.now(timezone.utc)
+        if cache_key.startswith('ipfs:'):
+            # CIDs are content addresses - the bytes behind them never change
+            return None
+        if cache_key.startswith('prv:'):
+            if result.get('available_for_registration') or self.prv_ttl <= 0:
+                return False
+            return now + timedelta(seconds=self.prv_ttl)
+        return self._http_expiry(result, now)
+
+    def _http_expiry(self, result: Dict[str, Any], now: datetime):
+        headers = {k.lower(): v for k, v in (result.get('headers') or {}).items()}
+        cache_control = headers.get('cache-control', '').lower()
+        has_validators = 'etag' in headers or 'last-modified' in headers
+
+        if 'no-store' in cache_control:
+            return False
+        if 'no-cache' in cache_control:
+            # Stored, but must be revalidated before every use
+            return now if has_validators else False
+
+        match = re.search(r's-maxage=(\d+)', cache_control) or re.search(r'max-age=(\d+)', cache_control)
+        if match:
+            return now + timedelta(seconds=int(match.group(1)))
+        return now if has_validators else False
+
+    def _remember(self, cache_key: str, entry: Dict[str, Any]):
+        size = self._entry_size(entry)
+        if size > self.max_bytes:
+            return
+
+        previous = self._entries.pop(cache_key, None)
+        if previous is not None:
+            self._bytes -= self._entry_size(previous)
+
+        self._entries[cache_key] = entry
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(evicted)
+            self.stats['evictions'] += 1
+
+    def _entry_size(self, entry: Dict[str, Any]) -> int:
+        if entry.get('size') is None:
+            entry['size'] = len((entry.get('content') or '').encode('utf-8'))
+        return entry['size']
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats['memory_hits'] + self.stats['db_hits']
+        lookups = hits + self.stats['misses'] + self.stats['stale']
+        return {
+            **self.stats,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes
+        }
+
+# Global content cache instance
+content_cache = ContentCache()
@@ -12,31 +12,61 @@ import base64
 import hashlib
 import os
 from datetime import datetime, timezone
+from services.chain_tracker import ChainHeadTracker
+from services.domain_registry import domain_registry, normalize_domain
+from services.domain_search import domain_search_index
+from services.chain_indexer import chain_indexer
+from services.resolution_cache import ResolutionCache, UpstreamError
+from services.tx_batcher import TxBatcher
+from services.sequence_manager import SequenceManager, sequence_mismatch
+from services.cosmos_signer import CosmosSigner, canonical_json, sign_doc_bytes
+from services.tx_tracker import TxTracker, CONFIRMED, PENDING
 
 logger = logging.getLogger(__name__)
 
 class CosmosService:
-    def __init__(self, rpc_endpoint: str = None, chain_id: str = None):
+    def __init__(self, rpc_endpoint: str = None, chain_id: str = None, simulate: bool = None):
         # Use testnet configuration by default
-        self.rpc_endpoint = rpc_endpoint or "https://rpc.sentry-01.theta-testnet.polypore.xyz:443"
-        self.chain_id = chain_id or "theta-testnet-001"
+        self.rpc_endpoint = rpc_endpoint or os.environ.get('COSMOS_RPC_ENDPOINT') or "https://rpc.sentry-01.theta-testnet.polypore.xyz:443"
+        self.chain_id = chain_id or os.environ.get('COSMOS_CHAIN_ID', "theta-testnet-001")
+        # Simulated broadcasts never reach the node; real broadcasts only with COSMOS_SIMULATE_TRANSACTIONS=false
+        if simulate is None:
+            simulate = os.environ.get('COSMOS_SIMULATE_TRANSACTIONS', 'true').lower() not in ('0', 'false', 'no')
+        self.simulate = simulate
         self.client = None
         self.developer_wallet_key = "df449cf7393c69c5ffc164a3fb4f1095f1b923e61762624aa0351e38de9fb306"
         self.developer_address = None
+        # Key material is parsed once; signing runs on the signer's thread pool
+        self.signer = CosmosSigner(self.developer_wallet_key)
         self.transaction_count = 0
+        self.chain_tracker = None
+        self.resolution_cache = ResolutionCache()
+        self.sequence_manager = SequenceManager(self._query_account)
+        self.tx_batcher = TxBatcher(self._submit_transaction)
+        self.sequence_retries = int(os.environ.get('COSMOS_SEQUENCE_RETRIES', 3))
+        self.tx_tracker = TxTracker(self._fetch_tx)
+        # BROADCAST_MODE_SYNC waits for CheckTx (and so catches sequence mismatches); ASYNC does not
+        self.broadcast_mode = f"BROADCAST_MODE_{os.environ.get('COSMOS_BROADCAST_MODE', 'sync').upper()}"
         
     async def initialize(self):
         """Initialize Cosmos connection with developer wallet"""
         try:
-            self.client = httpx.AsyncClient(timeout=10.0)
+            if self.client is None:
+                self.client = httpx.AsyncClient(timeout=10.0)
             
             # Initialize developer wallet for transaction payments
             self.developer_address = self._derive_cosmos_address_from_key(self.developer_wallet_key)
             
+            # Start tracking the chain head; its first refresh doubles as the connection test
+            self.chain_tracker = ChainHeadTracker(
+                self._fetch_chain_status, self._websocket_url(), on_tx_event=self.tx_tracker.on_tx_event
+            )
+            self.tx_tracker.events_connected = lambda: self.chain_tracker.websocket_connected
+            
             # Try to test connection, but don't fail if testnet is unavailable
             try:
-                response = await self.client.get(f"{self.rpc_endpoint}/status")
-                if response.status_code == 200:
+                await self.chain_tracker.start()
+                if self.chain_tracker.last_error is None:
                     logger.info(f"✅ Connected to Cosmos testnet: {self.rpc_endpoint}")
                     logger.info(f"✅ Developer wallet initialized: {self.developer_address}")
                     logger.info(f"✅ Chain ID: {self.chain_id}")
@@ -52,7 +82,7 @@ class CosmosService:
                     logger.info("✅ ALL TRANSACTIONS GO THROUGH COSMOS BLOCKCHAIN FOR MAXIMUM SECURITY")
                     return True
                 else:
-                    logger.warning(f"Cosmos RPC returned status {response.status_code}, using offline mode")
+                    logger.warning(f"Cosmos RPC status unavailable ({self.chain_tracker.last_error}), using offline mode")
             except Exception as conn_error:
                 logger.warning(f"Cosmos testnet connection issue: {conn_error}")
             
@@ -71,14 +101,11 @@ class CosmosService:
             return True
     
     def _derive_cosmos_address_from_key(self, private_key_hex: str) -> str:
-        """Derive Cosmos bech32 address from private key"""
+        """Derive Cosmos bech32 address from a secp256k1 private key"""
         try:
-            # This is a simplified address derivation
-            # In production, use proper secp256k1 key derivation and bech32 encoding
-            import hashlib
-            key_hash = hashlib.sha256(private_key_hex.encode()).hexdigest()
-            # Create a mock cosmos address for testnet
-            return f"cosmos1{key_hash[:39]}"
+            if private_key_hex == self.developer_wallet_key:
+                return self.signer.address
+            return CosmosSigner(private_key_hex).address
         except Exception as e:
             logger.error(f"Address derivation failed: {str(e)}")
             return "cosmos1developer_wallet_address_placeholder"
@@ -103,8 +130,9 @@ class CosmosService:
 
     async def resolve_prv_domain(self, domain: str) -> Optional[Dict]:
         """
-        Resolve .prv domain to IPFS content hash via Cosmos chain
-        This would query a smart contract or module that stores domain->IPFS mappings
+        Resolve .prv domain to IPFS content hash
+        Domains in the local registry are answered from memory; unknown or stale ones
+        are looked up on the Cosmos chain
         """
         try:
             if not domain.endswith('.prv'):
@@ -113,19 +141,44 @@ class CosmosService:
             # Remove .prv extension for lookup
             domain_name = domain.replace('.prv', '')
             
-            # Query the Cosmos chain for domain registration
-            # In a real implementation, this would query a specific module or smart contract
-            domain_info = await self._query_domain_registry(domain_name)
+            # First tier: local registry, trusted until the chain head moves too far past it
+            chain_height = self.chain_tracker.latest_height() if self.chain_tracker else None
+            local_entry = await domain_registry.get(domain_name)
+            if local_entry and not domain_registry.is_stale(local_entry, chain_height):
+                return self._domain_record(domain, local_entry)
+            
+            # Query the Cosmos chain for domain registration, through the TTL cache so
+            # repeated and concurrent lookups (including misses) share one abci_query
+            try:
+                domain_info = await self.resolution_cache.resolve(normalize_domain(domain_name), self._query_domain_registry)
+            except UpstreamError as e:
+                # Chain unreachable: not an answer, so nothing was cached and the next lookup retries
+                logger.warning(f"Chain lookup for {domain} failed, not treating it as missing: {str(e)}")
+                return self._domain_record(domain, local_entry) if local_entry else None
+            
+            if local_entry:
+                if not domain_info:
+                    # Chain has no answer (yet) - keep serving our own registration
+                    return self._domain_record(domain, local_entry)
+                if (domain_info.get("content_hash"), domain_info.get("owner")) == (local_entry.get("content_hash"), local_entry.get("owner")):
+                    await domain_registry.mark_verified(domain_name, chain_height)
+                else:
+                    logger.info(f"Local registry entry for {domain} superseded on chain, refreshing")
+                    await domain_registry.put(
+                        domain_name,
+                        domain_info.get("content_hash"),
+                        domain_info.get("owner"),
+                        tx_hash=domain_info.get("tx_hash"),
+                        height=domain_info.get("height"),
+                        verified_height=chain_height,
+                        expiry=domain_info.get("expiry"),
+                        metadata=domain_info.get("metadata"),
+                        source="chain"
+                    )
+                    domain_search_index.add(domain_name, domain_info.get("metadata"), domain_info.get("content_hash"), domain_info.get("owner"))
             
             if domain_info:
-                return {
-                    "domain": domain,
-                    "ipfs_hash": domain_info.get("content_hash"),
-                    "owner": domain_info.get("owner"),
-                    "registration_height": domain_info.get("height"),
-                    "expiry": domain_info.get("expiry"),
-                    "metadata": domain_info.get("metadata", {})
-                }
+                return self._domain_record(domain, domain_info)
             
             return None
             
@@ -133,10 +186,21 @@ class CosmosService:
             logger.error(f"PRV domain resolution error for {domain}: {str(e)}")
             return None
 
+    def _domain_record(self, domain: str, domain_info: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "domain": domain,
+            "ipfs_hash": domain_info.get("content_hash"),
+            "owner": domain_info.get("owner"),
+            "registration_height": domain_info.get("height"),
+            "expiry": domain_info.get("expiry"),
+            "metadata": domain_info.get("metadata", {})
+        }
+
     async def _query_domain_registry(self, domain_name: str) -> Optional[Dict]:
         """
         Query the Cosmos chain for domain registration information
         This is a simplified implementation - in practice would use CosmWasm or custom module
+        None means the chain has no such domain; UpstreamError means it could not be asked
         """
         try:
             # For demonstration, simulate a domain registry query
@@ -153,7 +217,11 @@ class CosmosService:
             }
             
             # Simulate querying blockchain state
-            response = await self._cosmos_query("custom/privachain/domain", query_data)
+            upstream_error = None
+            try:
+                response = await self._cosmos_query("custom/privachain/domain", query_data)
+            except UpstreamError as e:
+                upstream_error, response = e, None
             
             if response and response.get("result"):
                 return response["result"]
@@ -182,11 +250,16 @@ class CosmosService:
                 }
             }
             
-            return demo_domains.get(domain_name)
+            # Demo domains answer even while the chain is unreachable
+            if domain_name in demo_domains or upstream_error is None:
+                return demo_domains.get(domain_name)
+            raise upstream_error
             
+        except UpstreamError:
+            raise
         except Exception as e:
             logger.error(f"Domain registry query error: {str(e)}")
-            return None
+            raise UpstreamError(str(e)) from e
 
     async def _cosmos_query(self, path: str, data: Dict) -> Optional[Dict]:
         """Execute a query against the Cosmos chain"""
@@ -208,13 +281,15 @@ class CosmosService:
                 result = response.json()
                 return result.get("result", {})
             
-            return None
+            raise UpstreamError(f"abci_query returned HTTP {response.status_code}")
             
+        except UpstreamError:
+            raise
         except Exception as e:
             logger.error(f"Cosmos query error: {str(e)}")
-            return None
+            raise UpstreamError(str(e)) from e
 
-    async def register_domain(self, domain_name: str, content_hash: str, owner_address: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def register_domain(self, domain_name: str, content_hash: str, owner_address: str, metadata: Dict[str, Any] = None, wait: bool = False) -> Dict[str, Any]:
         """
         Register a .prv domain with developer-paid transaction
         All fees are transparent to the user
@@ -239,19 +314,23 @@ class CosmosService:
             result = await self._create_and_broadcast_transaction(
                 tx_payload,
                 f"Domain registration: {domain_name}",
-                "domain_registration"
+                "domain_registration",
+                wait=wait
             )
             
             if result["success"]:
                 logger.info(f"✅ Domain registered successfully: {domain_name} (tx: {result['tx_hash']})")
                 
-                # Store domain in local registry for quick lookups
-                await self._store_domain_locally(domain_name, content_hash, owner_address, result["tx_hash"])
+                # Store domain in local registry for quick lookups; drop any cached (negative) resolution
+                self.resolution_cache.invalidate(normalize_domain(domain_name))
+                await self._store_domain_locally(domain_name, content_hash, owner_address, result["tx_hash"], result.get("block_height"), metadata)
+                self.tx_tracker.add_callback(result["tx_hash"], lambda status: self._settle_domain_registration(domain_name, status))
                 
                 return {
                     "success": True,
                     "tx_hash": result["tx_hash"],
                     "block_height": result.get("block_height"),
+                    "status": result.get("status"),
                     "domain": domain_name,
                     "owner": owner_address,
                     "content_hash": content_hash,
@@ -274,7 +353,7 @@ class CosmosService:
                 "domain": domain_name
             }
     
-    async def register_content(self, content_hash: str, content_type: str, owner_address: str, encryption_metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def register_content(self, content_hash: str, content_type: str, owner_address: str, encryption_metadata: Dict[str, Any] = None, wait: bool = False) -> Dict[str, Any]:
         """
         Register content on Cosmos blockchain with developer-paid transaction
         Links IPFS content with blockchain verification
@@ -299,7 +378,8 @@ class CosmosService:
             result = await self._create_and_broadcast_transaction(
                 tx_payload,
                 f"Content registration: {content_hash[:12]}...",
-                "content_registration"
+                "content_registration",
+                wait=wait
             )
             
             if result["success"]:
@@ -309,6 +389,7 @@ class CosmosService:
                     "success": True,
                     "tx_hash": result["tx_hash"],
                     "block_height": result.get("block_height"),
+                    "status": result.get("status"),
                     "content_hash": content_hash,
                     "owner": owner_address,
                     "fee_paid_by": self.developer_address,
@@ -330,7 +411,45 @@ class CosmosService:
                 "content_hash": content_hash
             }
     
-    async def register_message(self, sender: str, recipient: str, message_hash: str, encryption_key_hash: str) -> Dict[str, Any]:
+    async def record_domain_accesses(self, accesses: List[Dict[str, Any]], window_start: str, window_end: str) -> Dict[str, Any]:
+        """
+        Record aggregated .prv domain views for one time window in a single transaction
+        Each access entry carries domain, content_hash, owner and hit count
+        """
+        try:
+            tx_payload = {
+                "type": "privachain/RecordDomainAccess",
+                "value": {
+                    "accesses": accesses,
+                    "window_start": window_start,
+                    "window_end": window_end,
+                    "registered_by": self.developer_address,
+                    "timestamp": datetime.now(timezone.utc).isoformat()
+                }
+            }
+            
+            result = await self._create_and_broadcast_transaction(
+                tx_payload,
+                f"Domain access batch: {len(accesses)} domains",
+                "domain_access_batch"
+            )
+            
+            if result["success"]:
+                return {
+                    "success": True,
+                    "tx_hash": result["tx_hash"],
+                    "block_height": result.get("block_height"),
+                    "status": result.get("status"),
+                    "domains": len(accesses),
+                    "fee_paid_by": self.developer_address
+                }
+            return {"success": False, "error": result["error"]}
+            
+        except Exception as e:
+            logger.error(f"Domain access recording error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    async def register_message(self, sender: str, recipient: str, message_hash: str, encryption_key_hash: str, wait: bool = False) -> Dict[str, Any]:
         """
         Register secure message metadata on Cosmos blockchain
         Maintains message privacy while providing blockchain verification
@@ -355,7 +474,8 @@ class CosmosService:
             result = await self._create_and_broadcast_transaction(
                 tx_payload,
                 "Secure message metadata registration",
-                "message_registration"
+                "message_registration",
+                wait=wait
             )
             
             if result["success"]:
@@ -365,6 +485,7 @@ class CosmosService:
                     "success": True,
                     "tx_hash": result["tx_hash"],
                     "block_height": result.get("block_height"),
+                    "status": result.get("status"),
                     "sender": sender,
                     "recipient": recipient,
                     "message_hash": message_hash,
@@ -385,69 +506,160 @@ class CosmosService:
                 "error": str(e)
             }
     
-    async def _create_and_broadcast_transaction(self, payload: Dict[str, Any], memo: str, tx_type: str) -> Dict[str, Any]:
+    async def _create_and_broadcast_transaction(self, payload: Dict[str, Any], memo: str, tx_type: str, wait: bool = False) -> Dict[str, Any]:
         """
-        Create, sign, and broadcast transaction using developer wallet
+        Queue a msg for the next batched transaction and return its pending handle,
+        or with wait=True the settled outcome
         All fees are paid by the developer wallet transparently
         """
         try:
-            self.transaction_count += 1
-            
-            # Create transaction with developer wallet as fee payer
-            transaction = {
-                "chain_id": self.chain_id,
-                "account_number": "0",  # Would be queried in production
-                "sequence": str(self.transaction_count),
-                "fee": {
-                    "amount": [{"denom": "uatom", "amount": "5000"}],  # Developer pays fee
-                    "gas": "200000"
-                },
-                "msgs": [payload],
-                "memo": memo,
-                "timeout_height": "0"
-            }
-            
-            # Sign transaction with developer wallet (simplified)
-            signed_tx = await self._sign_transaction(transaction)
-            
-            # Broadcast transaction to network
-            result = await self._broadcast_transaction(signed_tx, tx_type)
+            result = await self.tx_batcher.submit(payload, memo)
+            if not (wait and result.get("success")):
+                return result
             
-            return result
+            status = await self.tx_tracker.wait(result["tx_hash"])
+            if status["status"] in (CONFIRMED, PENDING):
+                return {**result, **status}
+            return {**result, **status, "success": False, "error": status.get("error") or f"transaction {status['status']}"}
             
         except Exception as e:
-            logger.error(f"Transaction creation/broadcast failed: {str(e)}")
+            logger.error(f"Transaction creation/broadcast failed for {tx_type}: {str(e)}")
             return {
                 "success": False,
                 "error": str(e)
             }
     
-    async def _sign_transaction(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
+    async def _submit_transaction(self, msgs: List[Dict[str, Any]], memo: str) -> Dict[str, Any]:
+        """
+        Create, sign, and broadcast one transaction carrying a batch of msgs
+        using the developer wallet as fee payer
+        Sequences come from the sequence manager; a mismatch resyncs and retries
+        """
+        self.transaction_count += 1
+        tx_type = ",".join(sorted({msg.get("type", "unknown") for msg in msgs}))
+        
+        # Gas (and so the fee) grows with the msg count, but signing and broadcast are paid once
+        gas = 100000 + 100000 * len(msgs)
+        fee = {
+            "amount": [{"denom": "uatom", "amount": str(int(gas * 0.025))}],  # Developer pays fee
+            "gas": str(gas)
+        }
+        
+        # Serialise the parts of the sign doc that do not change between sequence retries once
+        fee_json = canonical_json(fee)
+        msgs_json = canonical_json(msgs)
+        
+        mismatches = 0
+        while True:
+            async with await self.sequence_manager.lease() as lease:
+                transaction = {
+                    "chain_id": self.chain_id,
+                    "account_number": str(lease.account_number),
+                    "sequence": str(lease.sequence),
+                    "fee": fee,
+                    "msgs": msgs,
+                    "memo": memo,
+                    "timeout_height": "0"
+                }
+                sign_doc = sign_doc_bytes(self.chain_id, lease.account_number, lease.sequence, fee_json, msgs_json, memo)
+                
+                # Sign while earlier sequences are still broadcasting
+                signed_tx = await self._sign_transaction(transaction, sign_doc)
+                
+                # Broadcasts leave in sequence order; a resync while signing voids this lease,
+                # which is re-signed with a fresh sequence without counting as a retry
+                if not await self.sequence_manager.wait_turn(lease):
+                    continue
+                
+                result = await self._broadcast_transaction(signed_tx, tx_type)
+                if result.get("success"):
+                    lease.accepted = True
+                    break
+                
+                mismatch, expected_sequence = sequence_mismatch(result)
+                if not mismatch or mismatches >= self.sequence_retries:
+                    break
+                mismatches += 1
+                logger.warning(f"Sequence {lease.sequence} rejected (retry {mismatches}): {result.get('error')}")
+                await self.sequence_manager.resync(lease, expected_sequence)
+        
+        if result.get("success"):
+            # Track confirmation in the background; the simulated network commits after its delay
+            result.update(self.tx_tracker.track(result["tx_hash"], tx_type, simulated_height=result.pop("simulated_height", None)))
+        
+        return result
+    
+    async def _fetch_tx(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """tx_response of a committed transaction, or None while it is not (yet) in a block"""
+        response = await self.client.get(f"{self.rpc_endpoint}/cosmos/tx/v1beta1/txs/{tx_hash}")
+        if response.status_code == 200:
+            return response.json().get("tx_response")
+        return None
+    
+    async def search_block_txs(self, min_height: int, max_height: int, page: int = 1, per_page: int = 100) -> Dict[str, Any]:
+        """One page of the transactions committed in a height range (Tendermint tx_search)"""
+        response = await self.client.get(f"{self.rpc_endpoint}/tx_search", params={
+            "query": f'"tx.height>={min_height} AND tx.height<={max_height}"',
+            "page": str(page),
+            "per_page": str(per_page),
+            "order_by": '"asc"'
+        })
+        response.raise_for_status()
+        return response.json().get("result", {})
+    
+    async def get_block_meta(self, height: int) -> Optional[Dict[str, Any]]:
+        """Hash and time of the block at a height"""
+        response = await self.client.get(f"{self.rpc_endpoint}/blockchain", params={"minHeight": str(height), "maxHeight": str(height)})
+        response.raise_for_status()
+        metas = response.json().get("result", {}).get("block_metas", [])
+        if not metas:
+            return None
+        return {"height": int(metas[0]["header"]["height"]), "hash": metas[0]["block_id"]["hash"], "time": metas[0]["header"].get("time")}
+    
+    async def get_transaction_status(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """Lifecycle status of a transaction by hash"""
+        try:
+            return await self.tx_tracker.lookup(tx_hash)
+        except Exception as e:
+            logger.error(f"Transaction status error: {str(e)}")
+            return None
+    
+    async def _settle_domain_registration(self, domain_name: str, status: Dict[str, Any]):
+        """Keep the local registry in line with what the chain committed"""
+        if status["status"] == CONFIRMED:
+            await domain_registry.confirm(domain_name, status["block_height"], simulated=self.simulate)
+        else:
+            logger.warning(f"Registration of {domain_name} {status['status']}, removing local entry")
+            await domain_registry.remove(domain_name)
+            domain_search_index.remove(domain_name)
+            self.resolution_cache.invalidate(normalize_domain(domain_name))
+    
+    async def _query_account(self):
+        """Account number and current sequence of the developer wallet"""
+        response = await self.client.get(f"{self.rpc_endpoint}/cosmos/auth/v1beta1/accounts/{self.developer_address}")
+        response.raise_for_status()
+        account = response.json().get("account", {})
+        # Vesting and module accounts nest the BaseAccount
+        account = account.get("base_account", account.get("base_vesting_account", {}).get("base_account", account))
+        return int(account.get("account_number", 0)), int(account.get("sequence", 0))
+    
+    async def _sign_transaction(self, transaction: Dict[str, Any], sign_doc: bytes = None) -> Dict[str, Any]:
         """
         Sign transaction with developer private key
-        Implements secure signing for blockchain transactions
+        secp256k1 signature over the Amino JSON sign doc, computed off the event loop
         """
         try:
-            # Create signature using developer private key
-            tx_bytes = json.dumps(transaction, sort_keys=True).encode()
-            tx_hash = hashlib.sha256(tx_bytes).hexdigest()
-            
-            # In production, use proper secp256k1 signing
-            signature = {
-                "signature": base64.b64encode(
-                    hashlib.sha256(f"{self.developer_wallet_key}{tx_hash}".encode()).digest()
-                ).decode(),
-                "pub_key": {
-                    "type": "tendermint/PubKeySecp256k1",
-                    "value": base64.b64encode(
-                        hashlib.sha256(self.developer_wallet_key.encode()).digest()[:33]
-                    ).decode()
-                }
-            }
+            if sign_doc is None:
+                sign_doc = sign_doc_bytes(
+                    transaction["chain_id"], transaction["account_number"], transaction["sequence"],
+                    canonical_json(transaction["fee"]), canonical_json(transaction["msgs"]), transaction["memo"]
+                )
+            
+            signature = await self.signer.asign(sign_doc)
             
             signed_transaction = {
                 **transaction,
-                "signatures": [signature],
+                "signatures": [self.signer.signature_json(signature)],
                 "signed_by": self.developer_address
             }
             
@@ -466,12 +678,12 @@ class CosmosService:
             # Prepare transaction for broadcast
             tx_data = {
                 "tx": signed_tx,
-                "mode": "BROADCAST_MODE_SYNC"
+                "mode": self.broadcast_mode
             }
             
-            # For testnet, simulate successful broadcast
-            # In production, would use actual Cosmos RPC broadcast endpoint
-            if "testnet" in self.rpc_endpoint:
+            # Simulated mode (COSMOS_SIMULATE_TRANSACTIONS) fakes a successful broadcast;
+            # otherwise the transaction goes to the node's broadcast endpoint
+            if self.simulate:
                 # Simulate successful transaction broadcast
                 mock_tx_hash = hashlib.sha256(
                     json.dumps(signed_tx, sort_keys=True).encode()
@@ -479,17 +691,18 @@ class CosmosService:
                 
                 logger.info(f"📡 Broadcasting transaction to testnet: {mock_tx_hash[:16]}...")
                 
-                # Simulate network delay
-                await asyncio.sleep(0.5)
-                
+                # The simulated network delay is applied by the caller once the broadcast
+                # turn is released, so pipelined transactions do not queue behind it
                 return {
                     "success": True,
                     "tx_hash": mock_tx_hash,
-                    "block_height": 12345678 + self.transaction_count,
-                    "gas_used": 150000,
-                    "gas_wanted": 200000,
-                    "fee_paid": 5000,
-                    "network": "testnet"
+                    "block_height": None,
+                    "simulated_height": 12345678 + self.transaction_count,
+                    "gas_used": int(int(signed_tx["fee"]["gas"]) * 0.75),
+                    "gas_wanted": int(signed_tx["fee"]["gas"]),
+                    "fee_paid": int(signed_tx["fee"]["amount"][0]["amount"]),
+                    "network": "testnet",
+                    "simulated": True
                 }
             else:
                 # Real network broadcast
@@ -499,13 +712,21 @@ class CosmosService:
                 )
                 
                 if response.status_code == 200:
-                    result = response.json()
+                    tx_response = response.json().get("tx_response", {})
+                    if tx_response.get("code", 0) != 0:
+                        # CheckTx rejected the transaction (e.g. code 32: account sequence mismatch)
+                        return {
+                            "success": False,
+                            "error": tx_response.get("raw_log") or f"Broadcast rejected with code {tx_response.get('code')}",
+                            "code": tx_response.get("code"),
+                            "tx_hash": tx_response.get("txhash")
+                        }
                     return {
                         "success": True,
-                        "tx_hash": result.get("tx_response", {}).get("txhash"),
-                        "block_height": result.get("tx_response", {}).get("height"),
-                        "gas_used": result.get("tx_response", {}).get("gas_used"),
-                        "gas_wanted": result.get("tx_response", {}).get("gas_wanted")
+                        "tx_hash": tx_response.get("txhash"),
+                        "block_height": int(tx_response["height"]) if tx_response.get("height") not in (None, "0") else None,
+                        "gas_used": tx_response.get("gas_used"),
+                        "gas_wanted": tx_response.get("gas_wanted")
                     }
                 else:
                     return {
@@ -520,21 +741,22 @@ class CosmosService:
                 "error": str(e)
             }
     
-    async def _store_domain_locally(self, domain_name: str, content_hash: str, owner_address: str, tx_hash: str):
-        """Store domain registration locally for fast lookups"""
+    async def _store_domain_locally(self, domain_name: str, content_hash: str, owner_address: str, tx_hash: str,
+                                    block_height: int = None, metadata: Dict[str, Any] = None):
+        """Store domain registration in the persistent local registry for fast lookups"""
         try:
-            # In production, this would store in a database
-            # For now, we'll use a simple in-memory store
-            if not hasattr(self, '_local_domain_registry'):
-                self._local_domain_registry = {}
-            
-            self._local_domain_registry[domain_name] = {
-                "content_hash": content_hash,
-                "owner": owner_address,
-                "tx_hash": tx_hash,
-                "registration_time": datetime.now(timezone.utc).isoformat(),
-                "height": 12345678 + self.transaction_count
-            }
+            # Until the transaction is committed, count the entry as verified at the current head
+            verified_height = block_height or (self.chain_tracker.latest_height() if self.chain_tracker else None)
+            await domain_registry.put(
+                domain_name,
+                content_hash,
+                owner_address,
+                tx_hash=tx_hash,
+                height=block_height,
+                verified_height=verified_height,
+                metadata=metadata
+            )
+            domain_search_index.add(domain_name, metadata, content_hash, owner_address)
             
             logger.info(f"📝 Domain stored locally: {domain_name}")
             
@@ -543,66 +765,48 @@ class CosmosService:
 
     async def search_domains(self, query: str, limit: int = 10) -> List[Dict]:
         """
-        Search for registered .prv domains on the Cosmos chain
+        Search registered .prv domains by name, title and description
+        Answered from the in-memory BM25 index, best match first
         """
         try:
-            # Query the chain for domains matching the search criteria
-            search_results = []
-            
-            # In real implementation, this would query an index or iterate through registered domains
-            query_lower = query.lower()
-            
-            # Simulate search results
-            demo_results = [
-                {
-                    "domain": f"{query_lower}.prv",
-                    "content_hash": "QmExample123",
-                    "owner": "cosmos1owner1...",
-                    "title": f"Domain for {query}",
-                    "description": f"Decentralized content related to {query}"
-                },
-                {
-                    "domain": f"{query_lower}-storage.prv",
-                    "content_hash": "QmExample456", 
-                    "owner": "cosmos1owner2...",
-                    "title": f"{query} Storage Service",
-                    "description": f"Decentralized storage solution for {query}"
-                }
-            ]
-            
-            return demo_results[:limit]
+            return domain_search_index.search(query, limit)
             
         except Exception as e:
             logger.error(f"Domain search error: {str(e)}")
             return []
 
-    async def get_domain_history(self, domain: str) -> List[Dict]:
-        """Get the transaction history for a domain"""
+    async def get_domain_history(self, domain: str) -> Optional[List[Dict]]:
+        """
+        Get the transaction history for a domain, newest first, from the chain event index
+        None when the index is unavailable (indexer not running or behind the chain head)
+        """
         try:
-            # Query blockchain for all transactions involving this domain
-            # This would search through transaction history
+            if not chain_indexer.ready:
+                logger.warning(f"Domain history for {domain} unavailable: chain indexer not running or not caught up")
+                return None
             
             return [
                 {
-                    "tx_hash": "ABC123...",
-                    "block_height": 12345678,
-                    "timestamp": "2024-01-01T00:00:00Z",
-                    "type": "register_domain",
-                    "details": {
-                        "domain": domain,
-                        "content_hash": "QmExample..."
-                    }
+                    "tx_hash": event["tx_hash"],
+                    "block_height": event["block_height"],
+                    "timestamp": event.get("timestamp"),
+                    "type": event["type"],
+                    "details": event["details"]
                 }
+                for event in await chain_indexer.get_domain_history(domain)
             ]
             
         except Exception as e:
             logger.error(f"Domain history error: {str(e)}")
-            return []
+            return None
 
     async def validate_domain_ownership(self, domain: str, address: str) -> bool:
         """Validate that an address owns a specific domain"""
         try:
-            domain_info = await self.resolve_prv_domain(domain)
+            # Indexed chain state first; domains not indexed yet resolve through the registry
+            domain_info = await chain_indexer.get_domain(domain) if chain_indexer.ready else None
+            if domain_info is None:
+                domain_info = await self.resolve_prv_domain(domain)
             
             if domain_info:
                 return domain_info.get("owner") == address
@@ -613,8 +817,27 @@ class CosmosService:
             logger.error(f"Domain ownership validation error: {str(e)}")
             return False
 
+    def _websocket_url(self) -> Optional[str]:
+        """Tendermint websocket endpoint for NewBlock events (COSMOS_WEBSOCKET_URL=off disables)"""
+        configured = os.environ.get('COSMOS_WEBSOCKET_URL')
+        if configured:
+            return None if configured.lower() == 'off' else configured
+        if self.rpc_endpoint.startswith('https://'):
+            return 'wss://' + self.rpc_endpoint[len('https://'):].rstrip('/') + '/websocket'
+        if self.rpc_endpoint.startswith('http://'):
+            return 'ws://' + self.rpc_endpoint[len('http://'):].rstrip('/') + '/websocket'
+        return None
+
     async def get_chain_info(self) -> Dict:
-        """Get information about the connected Cosmos chain"""
+        """Get information about the connected Cosmos chain from the in-memory chain head snapshot"""
+        if self.chain_tracker is not None and self.chain_tracker.is_running:
+            return self.chain_tracker.get_snapshot()
+        
+        # Tracker not started (service used without initialize) - ask the node directly
+        return await self._fetch_chain_status()
+
+    async def _fetch_chain_status(self) -> Dict:
+        """Query RPC /status for chain ID, latest height and node info"""
         try:
             response = await self.client.get(f"{self.rpc_endpoint}/status")
             
@@ -634,7 +857,12 @@ class CosmosService:
             return {"connected": False, "error": str(e)}
 
     async def close(self):
-        """Close the Cosmos client connection"""
+        """Send queued transactions, stop background tracking and close the Cosmos client connection"""
+        await self.tx_batcher.close()
+        await self.tx_tracker.stop()
+        self.signer.shutdown()
+        if self.chain_tracker:
+            await self.chain_tracker.stop()
         if self.client:
             await self.client.aclose()
 
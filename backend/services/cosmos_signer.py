@@ -0,0 +1,110 @@
+"""
+Cosmos Signer - secp256k1 transaction signing for the developer wallet
+- The private key is parsed once; compressed public key and bech32 address are cached
+- Amino JSON sign docs are assembled from pre-serialised msgs and fee fragments,
+  so retries with a new sequence do not re-serialise the whole transaction
+- Signing runs on a small thread pool off the event loop
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import coincurve
+import coincurve.ecdsa
+
+logger = logging.getLogger(__name__)
+
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+
+def _bech32_polymod(values: List[int]) -> int:
+    generator = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
+    checksum = 1
+    for value in values:
+        top = checksum >> 25
+        checksum = (checksum & 0x1ffffff) << 5 ^ value
+        for i in range(5):
+            checksum ^= generator[i] if (top >> i) & 1 else 0
+    return checksum
+
+def _convert_bits(data: bytes, from_bits: int, to_bits: int) -> List[int]:
+    accumulator, bits, result = 0, 0, []
+    max_value = (1 << to_bits) - 1
+    for value in data:
+        accumulator = (accumulator << from_bits) | value
+        bits += from_bits
+        while bits >= to_bits:
+            bits -= to_bits
+            result.append((accumulator >> bits) & max_value)
+    if bits:
+        result.append((accumulator << (to_bits - bits)) & max_value)
+    return result
+
+def bech32_encode(hrp: str, data: bytes) -> str:
+    """BIP-173 bech32 encoding of raw bytes"""
+    words = _convert_bits(data, 8, 5)
+    expanded_hrp = [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+    polymod = _bech32_polymod(expanded_hrp + words + [0] * 6) ^ 1
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return hrp + "1" + "".join(BECH32_CHARSET[word] for word in words + checksum)
+
+def address_from_public_key(public_key: bytes, hrp: str = "cosmos") -> str:
+    """Cosmos account address: bech32(RIPEMD160(SHA256(compressed public key)))"""
+    return bech32_encode(hrp, hashlib.new("ripemd160", hashlib.sha256(public_key).digest()).digest())
+
+def canonical_json(value: Any) -> str:
+    """Amino JSON encoding: sorted keys, no whitespace"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+def sign_doc_bytes(chain_id: str, account_number: str, sequence: str, fee_json: str, msgs_json: str, memo: str) -> bytes:
+    """StdSignDoc bytes from pre-serialised fee and msgs; fields are already in sorted order"""
+    return (
+        '{"account_number":' + json.dumps(str(account_number)) +
+        ',"chain_id":' + json.dumps(chain_id, ensure_ascii=False) +
+        ',"fee":' + fee_json +
+        ',"memo":' + json.dumps(memo, ensure_ascii=False) +
+        ',"msgs":' + msgs_json +
+        ',"sequence":' + json.dumps(str(sequence)) + '}'
+    ).encode()
+
+class CosmosSigner:
+    def __init__(self, private_key_hex: str, hrp: str = "cosmos", workers: int = None):
+        self._private_key = coincurve.PrivateKey(bytes.fromhex(private_key_hex))
+        self.public_key = self._private_key.public_key.format(compressed=True)
+        self.address = address_from_public_key(self.public_key, hrp)
+        self.pub_key_json = {
+            "type": "tendermint/PubKeySecp256k1",
+            "value": base64.b64encode(self.public_key).decode()
+        }
+        self.workers = workers or int(os.environ.get('COSMOS_SIGNER_WORKERS', 2))
+        self._pool = None
+
+    def sign(self, sign_bytes: bytes) -> bytes:
+        """64-byte r||s signature over SHA-256(sign_bytes); libsecp256k1 always emits low-S"""
+        return self._private_key.sign_recoverable(sign_bytes)[:64]
+
+    async def asign(self, sign_bytes: bytes) -> bytes:
+        """sign() on the signer thread pool"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='cosmos-signer')
+        return await asyncio.get_running_loop().run_in_executor(self._pool, self.sign, sign_bytes)
+
+    def signature_json(self, signature: bytes) -> Dict[str, Any]:
+        return {
+            "signature": base64.b64encode(signature).decode(),
+            "pub_key": self.pub_key_json
+        }
+
+    def verify(self, signature: bytes, sign_bytes: bytes) -> bool:
+        der_signature = coincurve.ecdsa.cdata_to_der(coincurve.ecdsa.deserialize_compact(signature))
+        return coincurve.PublicKey(self.public_key).verify(der_signature, sign_bytes)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
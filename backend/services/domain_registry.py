@@ -0,0 +1,176 @@
+"""
+Local Domain Registry - durable first tier for .prv resolution
+- Registrations are persisted in db.prv_domains (indexed by domain, owner and content hash)
+- The registry is warm-loaded into memory at startup, so resolving a known domain is one dict lookup
+- Entries remember the chain height they were last verified at and are re-verified against
+  the chain once the head has moved more than DOMAIN_REGISTRY_MAX_HEIGHT_AGE blocks past it
+- Registrations confirmed by the simulator carry no real height, so they are never
+  height-stale
+"""
+
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+def normalize_domain(domain: str) -> str:
+    """Registry key for a domain: lowercase name without the .prv suffix"""
+    domain = domain.strip().lower()
+    return domain[:-len('.prv')] if domain.endswith('.prv') else domain
+
+class LocalDomainRegistry:
+    def __init__(self, max_height_age: int = None, warm_limit: int = None):
+        self.max_height_age = max_height_age if max_height_age is not None else int(
+            os.environ.get('DOMAIN_REGISTRY_MAX_HEIGHT_AGE', 100)
+        )
+        self.warm_limit = warm_limit or int(os.environ.get('DOMAIN_REGISTRY_WARM_LIMIT', 100000))
+        self.collection = None
+        self._domains: Dict[str, Dict[str, Any]] = {}
+        # True when every persisted domain is in memory, so a memory miss is authoritative
+        self.fully_loaded = True
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'db_lookups': 0,
+            'stores': 0
+        }
+
+    async def initialize(self, db):
+        """Attach db.prv_domains and warm-load it (indexes live in services.index_service)"""
+        try:
+            self.collection = db.prv_domains
+            entries = await self.collection.find({}, {'_id': 0}).limit(self.warm_limit + 1).to_list(length=None)
+            self.fully_loaded = len(entries) <= self.warm_limit
+            self._domains = {entry['domain']: entry for entry in entries[:self.warm_limit]}
+            logger.info(
+                f"Local domain registry loaded {len(self._domains)} domains"
+                f"{'' if self.fully_loaded else ' (partial, misses fall back to MongoDB)'}"
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Local domain registry initialization error: {str(e)}")
+            return False
+
+    def is_stale(self, entry: Dict[str, Any], chain_height: Optional[int]) -> bool:
+        """An entry is stale once the chain head is too far past its last verification"""
+        if chain_height is None or self.max_height_age <= 0 or entry.get('simulated'):
+            return False
+        verified_height = entry.get('verified_height') or entry.get('height') or 0
+        stale = chain_height - int(verified_height) > self.max_height_age
+        if stale:
+            self.stats['stale'] += 1
+        return stale
+
+    async def get(self, domain: str) -> Optional[Dict[str, Any]]:
+        """Registry entry for a domain, from memory or (after a partial warm load) MongoDB"""
+        key = normalize_domain(domain)
+        entry = self._domains.get(key)
+        if entry is None and not self.fully_loaded and self.collection is not None:
+            self.stats['db_lookups'] += 1
+            try:
+                entry = await self.collection.find_one({'domain': key}, {'_id': 0})
+                if entry:
+                    self._domains[key] = entry
+            except Exception as e:
+                logger.error(f"Local domain registry lookup error: {str(e)}")
+
+        self.stats['hits' if entry else 'misses'] += 1
+        return entry
+
+    async def put(self, domain: str, content_hash: str, owner: str, tx_hash: str = None, height: int = None,
+                  verified_height: int = None, expiry: str = None, metadata: Dict[str, Any] = None,
+                  source: str = 'local') -> Dict[str, Any]:
+        """Insert or replace a domain's entry in memory and in MongoDB"""
+        key = normalize_domain(domain)
+        entry = {
+            'domain': key,
+            'content_hash': content_hash,
+            'owner': owner,
+            'tx_hash': tx_hash,
+            'height': height,
+            'verified_height': verified_height if verified_height is not None else height,
+            'expiry': expiry,
+            'metadata': metadata or {},
+            'registration_time': datetime.now(timezone.utc).isoformat(),
+            'source': source
+        }
+        self._domains[key] = entry
+        self.stats['stores'] += 1
+        if self.collection is not None:
+            try:
+                await self.collection.replace_one({'domain': key}, dict(entry), upsert=True)
+            except Exception as e:
+                logger.error(f"Local domain registry store error: {str(e)}")
+        return entry
+
+    async def mark_verified(self, domain: str, height: int):
+        """Record that the chain still agrees with an entry at this height"""
+        key = normalize_domain(domain)
+        entry = self._domains.get(key)
+        if entry is None:
+            return
+        entry['verified_height'] = height
+        if self.collection is not None:
+            try:
+                await self.collection.update_one({'domain': key}, {'$set': {'verified_height': height}})
+            except Exception as e:
+                logger.error(f"Local domain registry update error: {str(e)}")
+
+    async def confirm(self, domain: str, height: int, simulated: bool = False):
+        """
+        Record the block height a local registration was committed at. A simulated height
+        is not comparable to the chain head, so it does not count as a verification.
+        """
+        key = normalize_domain(domain)
+        entry = self._domains.get(key)
+        if entry is None:
+            return
+        update = {'height': height, 'simulated': True} if simulated else {'height': height, 'verified_height': height, 'simulated': False}
+        entry.update(update)
+        if self.collection is not None:
+            try:
+                await self.collection.update_one({'domain': key}, {'$set': update})
+            except Exception as e:
+                logger.error(f"Local domain registry update error: {str(e)}")
+
+    async def remove(self, domain: str):
+        """Drop a registration whose transaction never made it on chain"""
+        key = normalize_domain(domain)
+        self._domains.pop(key, None)
+        if self.collection is not None:
+            try:
+                await self.collection.delete_one({'domain': key})
+            except Exception as e:
+                logger.error(f"Local domain registry delete error: {str(e)}")
+
+    async def find_by_owner(self, owner: str, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self._find({'owner': owner}, limit)
+
+    async def find_by_content_hash(self, content_hash: str, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self._find({'content_hash': content_hash}, limit)
+
+    async def _find(self, query: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        if self.collection is None:
+            field, value = next(iter(query.items()))
+            return [entry for entry in self._domains.values() if entry.get(field) == value][:limit]
+        try:
+            return await self.collection.find(query, {'_id': 0}).limit(limit).to_list(length=None)
+        except Exception as e:
+            logger.error(f"Local domain registry query error: {str(e)}")
+            return []
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'domains_in_memory': len(self._domains),
+            'fully_loaded': self.fully_loaded,
+            'hit_ratio': round(self.stats['hits'] / lookups, 4) if lookups else 0.0,
+            'max_height_age': self.max_height_age
+        }
+
+# Global local domain registry instance
+domain_registry = LocalDomainRegistry()
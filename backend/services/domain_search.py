@@ -0,0 +1,315 @@
+"""
+Domain Search Index - ranked search over registered .prv domains
+- Inverted index over domain name, title and description tokens, scored with BM25
+  (name matches weigh more than title, title more than description)
+- Postings are compact parallel arrays kept in impact order, so a query only walks
+  the best postings of each term
+- The last query token also matches as a prefix, through bisect over a sorted term list
+  and a small sorted side list of recently added terms, merged in once it grows past a
+  share of the main list (or when a rebuild finishes)
+- Updated incrementally from local registrations and the chain indexer; re-adding an
+  unchanged domain is a no-op, and postings of replaced domains are compacted away once
+  they make up a large share of the index
+- Rebuilt from the persisted domain collections in a background task at startup
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import re
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Field weights folded into a single weighted term frequency (BM25F-style)
+FIELD_WEIGHTS = {'name': 3.0, 'title': 2.0, 'description': 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Query-time budgets that bound latency regardless of index size
+TERM_CANDIDATES = 300         # best postings walked per exact query term
+PREFIX_EXPANSIONS = 32        # terms a trailing prefix may expand to
+PREFIX_CANDIDATES = 50        # best postings walked per prefix expansion
+PREFIX_WEIGHT = 0.6           # prefix matches count less than whole-word matches
+EXACT_NAME_BONUS = 10.0       # query equal to a domain name ranks it first
+UNSORTED_TAIL_LIMIT = 1024    # postings appended since the last re-sort
+
+# New terms wait in a sorted side list until it holds this many, or 1/NEW_TERMS_MERGE_SHARE
+# of the main term list, so a merge (O(terms)) runs rarely and never inside a query
+NEW_TERMS_MIN_MERGE = 4096
+NEW_TERMS_MERGE_SHARE = 16
+
+# Replaced docs are compacted away once there are this many and they exceed this share
+COMPACT_MIN_DEAD_DOCS = 10000
+COMPACT_DEAD_RATIO = 0.25
+REBUILD_BATCH_SIZE = 1000
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def normalize_name(domain: str) -> str:
+    domain = domain.strip().lower()
+    return domain[:-len('.prv')] if domain.endswith('.prv') else domain
+
+class _Postings:
+    """Doc ids and BM25 term weights; [0, sorted_count) is in descending weight order"""
+    __slots__ = ('ids', 'weights', 'sorted_count', 'live')
+
+    def __init__(self):
+        self.ids = array('I')
+        self.weights = array('f')
+        self.sorted_count = 0
+        # Postings whose doc has not been replaced: the document frequency
+        self.live = 0
+
+    def append(self, doc_id: int, weight: float):
+        self.ids.append(doc_id)
+        self.weights.append(weight)
+        self.live += 1
+
+    def resort(self):
+        order = sorted(range(len(self.ids)), key=self.weights.__getitem__, reverse=True)
+        self.ids = array('I', (self.ids[i] for i in order))
+        self.weights = array('f', (self.weights[i] for i in order))
+        self.sorted_count = len(self.ids)
+
+    def best(self, count: int, docs: List[Optional[tuple]]) -> Iterable[Tuple[int, float]]:
+        """The count best postings of live docs, plus any not yet in impact order"""
+        if len(self.ids) - self.sorted_count > UNSORTED_TAIL_LIMIT:
+            self.resort()
+        ids, weights = self.ids, self.weights
+        taken = 0
+        for position in range(self.sorted_count):
+            if taken == count:
+                break
+            if docs[ids[position]] is not None:
+                taken += 1
+                yield ids[position], weights[position]
+        # Recent postings are not in impact order yet; consider all of them
+        for position in range(self.sorted_count, len(ids)):
+            if docs[ids[position]] is not None:
+                yield ids[position], weights[position]
+
+    def keep(self, remap: array):
+        """Drop postings of replaced docs and renumber the rest, preserving order"""
+        ids, weights, sorted_count = array('I'), array('f'), 0
+        for position, (doc_id, weight) in enumerate(zip(self.ids, self.weights)):
+            new_id = remap[doc_id]
+            if new_id >= 0:
+                ids.append(new_id)
+                weights.append(weight)
+                sorted_count += position < self.sorted_count
+        self.ids, self.weights, self.sorted_count = ids, weights, sorted_count
+
+class DomainSearchIndex:
+    def __init__(self):
+        self._postings: Dict[str, _Postings] = {}
+        # doc id -> (domain name, title, description, content_hash, owner); None once replaced
+        self._docs: List[Optional[Tuple[str, str, str, str, str]]] = []
+        self._doc_ids: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._new_terms: List[str] = []
+        self._total_length = 0.0
+        self._live_docs = 0
+        # Names updated live while a rebuild runs; the rebuild must not overwrite them
+        self._updated_during_rebuild: Optional[set] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self.stats = {'queries': 0, 'updates': 0, 'unchanged': 0, 'compactions': 0}
+
+    def start_rebuild(self, db, collections: Tuple[str, ...] = ('prv_domains',)) -> asyncio.Task:
+        """Rebuild in the background; search answers from what is indexed so far meanwhile"""
+        self._rebuild_task = asyncio.create_task(self.initialize(db, collections))
+        return self._rebuild_task
+
+    async def initialize(self, db, collections: Tuple[str, ...] = ('prv_domains',)):
+        """Rebuild the index from the persisted domain collections"""
+        self._updated_during_rebuild = set()
+        try:
+            count = 0
+            projection = {'_id': 0, 'domain': 1, 'content_hash': 1, 'owner': 1, 'metadata.title': 1, 'metadata.description': 1}
+            for collection_name in collections:
+                async for entry in db[collection_name].find({}, projection).batch_size(REBUILD_BATCH_SIZE):
+                    if normalize_name(entry['domain']) not in self._updated_during_rebuild:
+                        self._index(entry['domain'], entry.get('metadata') or {}, entry.get('content_hash'), entry.get('owner'))
+                    count += 1
+            self._merge_new_terms()
+            logger.info(f"Domain search index built from {count} records ({self._live_docs} domains, {len(self._terms)} terms)")
+            return True
+        except Exception as e:
+            logger.error(f"Domain search index initialization error: {str(e)}")
+            return False
+        finally:
+            self._updated_during_rebuild = None
+
+    async def stop(self):
+        if self._rebuild_task:
+            self._rebuild_task.cancel()
+            await asyncio.gather(self._rebuild_task, return_exceptions=True)
+            self._rebuild_task = None
+
+    @property
+    def rebuilding(self) -> bool:
+        return self._updated_during_rebuild is not None
+
+    def add(self, domain: str, metadata: Dict[str, Any] = None, content_hash: str = None, owner: str = None):
+        """Index a domain, replacing any previous version of it"""
+        if self._updated_during_rebuild is not None:
+            self._updated_during_rebuild.add(normalize_name(domain))
+        self._index(domain, metadata, content_hash, owner)
+
+    def _index(self, domain: str, metadata: Dict[str, Any], content_hash: Optional[str], owner: Optional[str]):
+        name = normalize_name(domain)
+        metadata = metadata or {}
+        doc = (name, str(metadata.get('title') or ''), str(metadata.get('description') or ''), content_hash or '', owner or '')
+        doc_id = self._doc_ids.get(name)
+        if doc_id is not None and self._docs[doc_id] == doc:
+            self.stats['unchanged'] += 1
+            return
+        self.remove(name)
+
+        weighted = self._weighted_terms(doc)
+        length = sum(weighted.values()) or 1.0
+
+        doc_id = len(self._docs)
+        self._docs.append(doc)
+        self._doc_ids[name] = doc_id
+        self._total_length += length
+        self._live_docs += 1
+        average_length = self._total_length / self._live_docs
+
+        for term, tf in weighted.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings()
+                insort(self._new_terms, term)
+            # Length normalisation uses the average at insert time; idf is applied per query
+            postings.append(doc_id, tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)))
+        if len(self._new_terms) > max(NEW_TERMS_MIN_MERGE, len(self._terms) // NEW_TERMS_MERGE_SHARE):
+            self._merge_new_terms()
+        self.stats['updates'] += 1
+
+    def remove(self, domain: str):
+        doc_id = self._doc_ids.pop(normalize_name(domain), None)
+        if doc_id is None:
+            return
+        weighted = self._weighted_terms(self._docs[doc_id])
+        for term in weighted:
+            self._postings[term].live -= 1
+        self._total_length -= sum(weighted.values()) or 1.0
+        # Postings of replaced docs are skipped at query time via the None slot until compaction
+        self._docs[doc_id] = None
+        self._live_docs -= 1
+        dead_docs = len(self._docs) - self._live_docs
+        if dead_docs >= COMPACT_MIN_DEAD_DOCS and dead_docs > COMPACT_DEAD_RATIO * len(self._docs):
+            self.compact()
+
+    def compact(self):
+        """Renumber live docs densely and drop the postings of replaced ones"""
+        remap = array('i', [-1]) * len(self._docs)
+        docs = []
+        for doc_id, doc in enumerate(self._docs):
+            if doc is not None:
+                remap[doc_id] = len(docs)
+                docs.append(doc)
+        for term in list(self._postings):
+            postings = self._postings[term]
+            if postings.live:
+                postings.keep(remap)
+            else:
+                del self._postings[term]
+        self._docs = docs
+        self._doc_ids = {doc[0]: doc_id for doc_id, doc in enumerate(docs)}
+        self._terms = sorted(self._postings)
+        self._new_terms = []
+        self.stats['compactions'] += 1
+
+    @staticmethod
+    def _weighted_terms(doc: Tuple[str, str, str, str, str]) -> Dict[str, float]:
+        """Field-weighted term frequencies; the whole name without separators is a term too"""
+        name, title, description = doc[:3]
+        weighted: Dict[str, float] = {}
+        name_tokens = tokenize(name)
+        if len(name_tokens) > 1:
+            name_tokens.append(''.join(name_tokens))
+        for field, tokens in (('name', name_tokens), ('title', tokenize(title)), ('description', tokenize(description))):
+            for token in tokens:
+                weighted[token] = weighted.get(token, 0.0) + FIELD_WEIGHTS[field]
+        return weighted
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Top-k domains for a query, best first"""
+        self.stats['queries'] += 1
+        terms = tokenize(query)
+        if not terms or not self._live_docs:
+            return []
+
+        scores: Dict[int, float] = {}
+        for position, term in enumerate(terms):
+            expansions = [(term, 1.0, TERM_CANDIDATES)] if term in self._postings else []
+            if position == len(terms) - 1:
+                expansions += [(match, PREFIX_WEIGHT, PREFIX_CANDIDATES) for match in self._prefix_terms(term) if match != term]
+            for match, factor, candidates in expansions:
+                postings = self._postings[match]
+                if not postings.live:
+                    continue
+                idf = math.log(1 + (self._live_docs - postings.live + 0.5) / (postings.live + 0.5))
+                for doc_id, weight in postings.best(candidates, self._docs):
+                    scores[doc_id] = scores.get(doc_id, 0.0) + factor * idf * weight
+
+        exact = self._doc_ids.get(normalize_name(query).replace(' ', ''))
+        if exact is not None:
+            scores[exact] = scores.get(exact, 0.0) + EXACT_NAME_BONUS
+
+        results = []
+        for doc_id, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+            name, title, description, content_hash, owner = self._docs[doc_id]
+            results.append({
+                'domain': f"{name}.prv",
+                'title': title or None,
+                'description': description or None,
+                'content_hash': content_hash or None,
+                'owner': owner or None,
+                'score': round(score, 4)
+            })
+        return results
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        if len(prefix) < 2:
+            return []
+        matches = heapq.merge(self._prefix_range(self._terms, prefix), self._prefix_range(self._new_terms, prefix))
+        return list(itertools.islice(matches, PREFIX_EXPANSIONS))
+
+    @staticmethod
+    def _prefix_range(terms: List[str], prefix: str) -> List[str]:
+        matches = []
+        index = bisect_left(terms, prefix)
+        while index < len(terms) and len(matches) < PREFIX_EXPANSIONS and terms[index].startswith(prefix):
+            matches.append(terms[index])
+            index += 1
+        return matches
+
+    def _merge_new_terms(self):
+        if self._new_terms:
+            # Two sorted runs: Timsort merges them in one linear pass
+            self._terms.extend(self._new_terms)
+            self._terms.sort()
+            self._new_terms = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'domains': self._live_docs,
+            'terms': len(self._postings),
+            'pending_terms': len(self._new_terms),
+            'replaced_docs': len(self._docs) - self._live_docs,
+            'rebuilding': self.rebuilding
+        }
+
+# Global domain search index instance
+domain_search_index = DomainSearchIndex()
@@ -0,0 +1,143 @@
+"""
+Egress Scheduler - timing obfuscation for outbound requests without per-request stalls
+- Requests of a class wait for that class's next dispatch window instead of sleeping
+  a random delay each; windows are jittered and never longer than the class latency budget
+- Each window releases its whole batch at once in shuffled order, so outbound timing
+  follows the window schedule rather than individual user actions
+- Optional cover traffic fills empty windows with decoy requests
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, List, Any
+
+logger = logging.getLogger(__name__)
+
+# Request class -> maximum added latency in seconds
+DEFAULT_LATENCY_BUDGETS = {
+    'interactive': 0.15,
+    'prefetch': 1.0,
+    'background': 3.0
+}
+
+# Dispatchers without cover traffic stop after this many empty windows
+IDLE_WINDOWS_BEFORE_SLEEP = 20
+
+def _parse_budgets(value: str) -> Dict[str, float]:
+    """Parse 'interactive=0.15,background=3' into a budget mapping"""
+    budgets = {}
+    for item in value.split(','):
+        if '=' in item:
+            name, seconds = item.split('=', 1)
+            budgets[name.strip()] = float(seconds)
+    return budgets
+
+class EgressScheduler:
+    def __init__(self, budgets: Dict[str, float] = None, cover_traffic_urls: List[str] = None, cover_traffic_probability: float = None):
+        self.budgets = dict(DEFAULT_LATENCY_BUDGETS)
+        self.budgets.update(budgets or _parse_budgets(os.environ.get('EGRESS_LATENCY_BUDGETS', '')))
+        if cover_traffic_urls is None:
+            cover_traffic_urls = [url for url in os.environ.get('EGRESS_COVER_TRAFFIC_URLS', '').split(',') if url]
+        self.cover_traffic_urls = cover_traffic_urls
+        if cover_traffic_probability is None:
+            cover_traffic_probability = float(os.environ.get('EGRESS_COVER_TRAFFIC_PROBABILITY', 0.3))
+        self.cover_traffic_probability = cover_traffic_probability
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._dispatchers: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            'requests': 0,
+            'windows': 0,
+            'batches': 0,
+            'largest_batch': 0,
+            'cover_requests': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0
+        }
+
+    async def acquire(self, request_class: str = 'interactive') -> float:
+        """Wait for the next dispatch window of a request class; returns the time waited"""
+        if request_class not in self.budgets:
+            request_class = 'interactive'
+        if self.budgets[request_class] <= 0:
+            return 0.0
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(request_class, []).append(future)
+        self._ensure_dispatcher(request_class)
+        await future
+
+        waited = time.monotonic() - started
+        self.stats['requests'] += 1
+        self.stats['total_wait'] += waited
+        self.stats['max_wait'] = max(self.stats['max_wait'], waited)
+        return waited
+
+    def _ensure_dispatcher(self, request_class: str):
+        task = self._dispatchers.get(request_class)
+        if task is None or task.done():
+            self._dispatchers[request_class] = asyncio.create_task(self._dispatch_loop(request_class))
+
+    async def _dispatch_loop(self, request_class: str):
+        idle_windows = 0
+        try:
+            while True:
+                # Jittered window, bounded by the class budget so no request waits longer
+                budget = self.budgets[request_class]
+                await asyncio.sleep(random.uniform(budget * 0.25, budget))
+                self.stats['windows'] += 1
+
+                batch = self._pending.pop(request_class, [])
+                if batch:
+                    idle_windows = 0
+                    self._release(batch)
+                    continue
+
+                idle_windows += 1
+                if self.cover_traffic_urls:
+                    if random.random() < self.cover_traffic_probability:
+                        asyncio.create_task(self._send_cover_request())
+                elif idle_windows >= IDLE_WINDOWS_BEFORE_SLEEP and not self._pending.get(request_class):
+                    return
+        except asyncio.CancelledError:
+            self._release(self._pending.pop(request_class, []))
+            raise
+
+    def _release(self, batch: List[asyncio.Future]):
+        random.shuffle(batch)
+        for future in batch:
+            if not future.done():
+                future.set_result(None)
+        self.stats['batches'] += 1
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+
+    async def _send_cover_request(self):
+        """Decoy request on the privacy pool; its response is discarded"""
+        from services.http_client_service import http_clients
+        try:
+            await http_clients.get('http_private').head(random.choice(self.cover_traffic_urls))
+            self.stats['cover_requests'] += 1
+        except Exception as e:
+            logger.debug(f"Cover traffic request failed: {str(e)}")
+
+    async def stop(self):
+        """Cancel dispatchers, releasing anything still waiting"""
+        for task in self._dispatchers.values():
+            task.cancel()
+        await asyncio.gather(*self._dispatchers.values(), return_exceptions=True)
+        self._dispatchers.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        requests = self.stats['requests']
+        return {
+            **self.stats,
+            'mean_wait': round(self.stats['total_wait'] / requests, 4) if requests else 0.0,
+            'latency_budgets': self.budgets,
+            'cover_traffic': bool(self.cover_traffic_urls)
+        }
+
+# Global egress scheduler instance
+egress_scheduler = EgressScheduler()
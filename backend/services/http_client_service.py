@@ -0,0 +1,173 @@
+"""
+HTTP Client Service - application-scoped pooled httpx clients
+- One long-lived AsyncClient per upstream so TCP/TLS connections are reused
+- Per-pool connection limits and keep-alive tuning (overridable via environment)
+- HTTP/2 when the h2 package is installed
+- Privacy-header traffic and plain traffic never share connections
+- Clients never store cookies, so nothing one caller receives is replayed for another
+- Each pool reports open, idle and active connections plus requests still waiting for
+  response headers
+"""
+
+import http.cookiejar
+import importlib.util
+import logging
+import os
+from typing import Dict, Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Pool name -> client settings. Limits can be overridden per pool with
+# HTTP_POOL_<NAME>_MAX_CONNECTIONS / _MAX_KEEPALIVE / _KEEPALIVE_EXPIRY
+DEFAULT_POOLS = {
+    'ipfs_gateway': {
+        'max_connections': 50,
+        'max_keepalive': 20,
+        'keepalive_expiry': 60.0,
+        'timeout': 10.0,
+        'follow_redirects': True
+    },
+    'ipfs_rpc': {
+        'max_connections': 20,
+        'max_keepalive': 10,
+        'keepalive_expiry': 60.0,
+        'timeout': 30.0,
+        'follow_redirects': False
+    },
+    'http_private': {
+        'max_connections': 100,
+        'max_keepalive': 20,
+        'keepalive_expiry': 15.0,
+        'timeout': 30.0,
+        'follow_redirects': True
+    },
+    'http_plain': {
+        'max_connections': 100,
+        'max_keepalive': 20,
+        'keepalive_expiry': 30.0,
+        'timeout': 30.0,
+        'follow_redirects': True
+    }
+}
+
+def _stateless_cookie_jar() -> http.cookiejar.CookieJar:
+    """Cookie jar that refuses every Set-Cookie: shared clients serve many users"""
+    return http.cookiejar.CookieJar(policy=http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+
+class PoolTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that counts its requests and reports its connection pool"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = 0
+        # Requests queued in the pool for a connection
+        self.waiting = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.waiting += 1
+        queued = True
+
+        def dequeue():
+            nonlocal queued
+            if queued:
+                queued = False
+                self.waiting -= 1
+
+        # httpcore's first trace event (connecting, or sending on a reused connection)
+        # means the pool has handed the request a connection
+        previous_trace = request.extensions.get('trace')
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            dequeue()
+            if previous_trace is not None:
+                await previous_trace(event_name, info)
+
+        request.extensions = {**request.extensions, 'trace': trace}
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            dequeue()
+
+    def connection_counts(self) -> Dict[str, int]:
+        open_connections = idle = 0
+        for connection in list(self._pool.connections):
+            if connection.is_closed():
+                continue
+            open_connections += 1
+            idle += connection.is_idle()
+        return {'open': open_connections, 'idle': idle, 'active': open_connections - idle}
+
+class HTTPClientRegistry:
+    def __init__(self, pools: Dict[str, Dict[str, Any]] = None):
+        self.pools = {name: self._apply_env_overrides(name, dict(config)) for name, config in (pools or DEFAULT_POOLS).items()}
+        self.http2_available = importlib.util.find_spec('h2') is not None
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, PoolTransport] = {}
+
+    def _apply_env_overrides(self, name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        prefix = f"HTTP_POOL_{name.upper()}_"
+        for key, cast in (('max_connections', int), ('max_keepalive', int), ('keepalive_expiry', float)):
+            value = os.environ.get(prefix + key.upper())
+            if value:
+                config[key] = cast(value)
+        return config
+
+    async def initialize(self):
+        """Create every configured pool up front"""
+        for name in self.pools:
+            self.get(name)
+        logger.info(f"HTTP client pools ready: {', '.join(self.pools)} (http2={'on' if self.http2_available else 'off'})")
+        return True
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Return the shared client for a pool, creating it on first use"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            config = self.pools[name]
+            transport = PoolTransport(
+                http2=self.http2_available,
+                limits=httpx.Limits(
+                    max_connections=config['max_connections'],
+                    max_keepalive_connections=config['max_keepalive'],
+                    keepalive_expiry=config['keepalive_expiry']
+                )
+            )
+            client = httpx.AsyncClient(
+                transport=transport,
+                cookies=_stateless_cookie_jar(),
+                timeout=config['timeout'],
+                follow_redirects=config['follow_redirects']
+            )
+            self._clients[name] = client
+            self._transports[name] = transport
+        return client
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics per upstream (open, idle, active, waiting requests)"""
+        stats = {}
+        for name, config in self.pools.items():
+            transport = self._transports.get(name)
+            client = self._clients.get(name)
+            live = transport is not None and client is not None and not client.is_closed
+            stats[name] = {
+                **(transport.connection_counts() if live else {'open': 0, 'idle': 0, 'active': 0}),
+                'waiting': transport.waiting if live else 0,
+                'requests': transport.requests if transport is not None else 0,
+                'max_connections': config['max_connections'],
+                'max_keepalive': config['max_keepalive'],
+                'keepalive_expiry': config['keepalive_expiry']
+            }
+        return {'http2': self.http2_available, 'pools': stats}
+
+    async def close(self):
+        """Close every pooled client"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._transports.clear()
+
+# Global HTTP client registry
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,169 @@
+"""
+Index Service - declarative MongoDB index bootstrap and query plan guardrails
+- Declares the compound and TTL indexes the API's queries depend on
+- Applies them idempotently at startup, rebuilding indexes whose options changed
+- In debug mode, explains the hot queries and warns when one falls back to COLLSCAN
+"""
+
+import logging
+import os
+from typing import Dict, List, Any
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+SEARCH_ANALYTICS_TTL_SECONDS = int(os.environ.get('SEARCH_ANALYTICS_TTL_DAYS', 30)) * 86400
+
+# Collection -> indexes. Names are fixed so re-applying is a no-op.
+INDEX_SPECS: Dict[str, List[IndexModel]] = {
+    'messages': [
+        # Inbox branches: {sender} / {recipient} walked by (timestamp, id) desc for keyset paging
+        IndexModel([('sender', ASCENDING), ('timestamp', DESCENDING), ('id', DESCENDING)], name='messages_sender_timestamp'),
+        IndexModel([('recipient', ASCENDING), ('timestamp', DESCENDING), ('id', DESCENDING)], name='messages_recipient_timestamp'),
+    ],
+    'content_cache': [
+        IndexModel([('timestamp', DESCENDING)], name='content_cache_timestamp'),
+        IndexModel(
+            [('cache_key', ASCENDING)],
+            name='content_cache_key',
+            unique=True,
+            partialFilterExpression={'cache_key': {'$exists': True}}
+        ),
+        IndexModel([('purge_at', ASCENDING)], name='content_cache_purge_ttl', expireAfterSeconds=0),
+    ],
+    'content_blobs': [
+        IndexModel([('purge_at', ASCENDING)], name='content_blobs_purge_ttl', expireAfterSeconds=0),
+    ],
+    'prv_domains': [
+        IndexModel([('domain', ASCENDING)], name='prv_domains_domain', unique=True),
+        IndexModel([('owner', ASCENDING)], name='prv_domains_owner'),
+        IndexModel([('content_hash', ASCENDING)], name='prv_domains_content_hash'),
+    ],
+    'chain_events': [
+        # Domain history walked newest first; rollbacks and range scans by height
+        IndexModel([('domain', ASCENDING), ('block_height', DESCENDING)], name='chain_events_domain_height',
+                   partialFilterExpression={'domain': {'$exists': True}}),
+        IndexModel([('block_height', ASCENDING)], name='chain_events_height'),
+        IndexModel([('content_hash', ASCENDING), ('block_height', DESCENDING)], name='chain_events_content_hash',
+                   partialFilterExpression={'content_hash': {'$exists': True}}),
+        IndexModel([('sender', ASCENDING), ('block_height', DESCENDING)], name='chain_events_sender',
+                   partialFilterExpression={'sender': {'$exists': True}}),
+        IndexModel([('recipient', ASCENDING), ('block_height', DESCENDING)], name='chain_events_recipient',
+                   partialFilterExpression={'recipient': {'$exists': True}}),
+    ],
+    'chain_domains': [
+        IndexModel([('domain', ASCENDING)], name='chain_domains_domain', unique=True),
+        IndexModel([('owner', ASCENDING)], name='chain_domains_owner'),
+    ],
+    'chain_contents': [
+        IndexModel([('content_hash', ASCENDING)], name='chain_contents_content_hash', unique=True),
+        IndexModel([('owner', ASCENDING)], name='chain_contents_owner'),
+    ],
+    'search_queries': [
+        IndexModel([('timestamp', ASCENDING)], name='search_queries_ttl', expireAfterSeconds=SEARCH_ANALYTICS_TTL_SECONDS),
+    ],
+}
+
+# Options that make two indexes with the same name different
+COMPARED_OPTIONS = ('unique', 'expireAfterSeconds', 'partialFilterExpression', 'sparse')
+
+class IndexManager:
+    def __init__(self, specs: Dict[str, List[IndexModel]] = None, explain_queries: bool = None):
+        self.specs = specs or INDEX_SPECS
+        if explain_queries is None:
+            explain_queries = os.environ.get('DB_EXPLAIN_HOT_QUERIES', '').lower() in ('1', 'true', 'yes')
+        self.explain_queries = explain_queries
+        self.last_report: Dict[str, Any] = {}
+
+    async def initialize(self, db):
+        """Apply all declared indexes, then check query plans when debugging"""
+        try:
+            self.last_report = await self.apply(db)
+            if self.explain_queries:
+                self.last_report['query_plans'] = await self.check_query_plans(db)
+            return True
+        except Exception as e:
+            logger.error(f"Index bootstrap error: {str(e)}")
+            return False
+
+    async def apply(self, db) -> Dict[str, Any]:
+        """Create missing indexes and rebuild ones whose definition changed"""
+        report = {'created': [], 'rebuilt': [], 'unchanged': []}
+
+        for collection_name, models in self.specs.items():
+            collection = db[collection_name]
+            existing = await collection.index_information()
+            to_create = []
+
+            for model in models:
+                spec = model.document
+                name = spec['name']
+                current = existing.get(name)
+
+                if current is None:
+                    to_create.append(model)
+                    report['created'].append(f"{collection_name}.{name}")
+                elif self._matches(current, spec):
+                    report['unchanged'].append(f"{collection_name}.{name}")
+                else:
+                    logger.warning(f"Index {collection_name}.{name} definition changed, rebuilding")
+                    await collection.drop_index(name)
+                    to_create.append(model)
+                    report['rebuilt'].append(f"{collection_name}.{name}")
+
+            if to_create:
+                await collection.create_indexes(to_create)
+
+        logger.info(
+            f"MongoDB indexes applied: {len(report['created'])} created, "
+            f"{len(report['rebuilt'])} rebuilt, {len(report['unchanged'])} unchanged"
+        )
+        return report
+
+    def _matches(self, current: Dict[str, Any], spec: Dict[str, Any]) -> bool:
+        if list(current.get('key', [])) != list(spec['key'].items()):
+            return False
+        return all(current.get(option) == spec.get(option) for option in COMPARED_OPTIONS)
+
+    def hot_queries(self, db) -> Dict[str, Any]:
+        """Cursors for the queries every page load depends on"""
+        sample_user = '__index_probe__'
+        return {
+            'messages.inbox_sent': db.messages.find({'sender': sample_user}).sort(
+                [('timestamp', DESCENDING), ('id', DESCENDING)]
+            ).limit(50),
+            'messages.inbox_received': db.messages.find({'recipient': sample_user}).sort(
+                [('timestamp', DESCENDING), ('id', DESCENDING)]
+            ).limit(50),
+            'content_cache.recent': db.content_cache.find().sort('timestamp', DESCENDING).limit(50),
+            'content_cache.lookup': db.content_cache.find({'cache_key': 'ipfs:__index_probe__'}).limit(1),
+        }
+
+    async def check_query_plans(self, db) -> Dict[str, List[str]]:
+        """Explain each hot query and warn when its winning plan scans a whole collection"""
+        plans = {}
+        for name, cursor in self.hot_queries(db).items():
+            try:
+                explanation = await cursor.explain()
+                stages = self._plan_stages(explanation.get('queryPlanner', {}).get('winningPlan', {}))
+                plans[name] = stages
+                if 'COLLSCAN' in stages:
+                    logger.warning(f"Query plan guardrail: {name} uses COLLSCAN ({' -> '.join(stages)})")
+                else:
+                    logger.info(f"Query plan for {name}: {' -> '.join(stages)}")
+            except Exception as e:
+                logger.warning(f"Could not explain {name}: {str(e)}")
+        return plans
+
+    def _plan_stages(self, plan: Dict[str, Any]) -> List[str]:
+        stages = [plan['stage']] if 'stage' in plan else []
+        for child_key in ('inputStage', 'queryPlan'):
+            if isinstance(plan.get(child_key), dict):
+                stages.extend(self._plan_stages(plan[child_key]))
+        for child in plan.get('inputStages', []):
+            stages.extend(self._plan_stages(child))
+        return stages
+
+# Global index manager instance
+index_manager = IndexManager()
@@ -0,0 +1,260 @@
+"""
+IPFS Gateway Pool - health-scored, hedged retrieval across several IPFS gateways
+- Gateways come from IPFS_GATEWAYS (comma-separated), by default a local Kubo node
+  followed by public gateways
+- Each gateway keeps a rolling window of response latencies and an error rate;
+  requests go to the gateway with the best latency/error score
+- Hedging: if the chosen gateway has not answered within its own p95 latency,
+  the next best gateway is raced against it and the first good answer wins
+- Circuit breakers eject a gateway after consecutive failures and let a single
+  trial request through once the cool-down has passed
+- Paths are checked before any request: the first segment must be a valid CID and
+  every segment is percent-encoded, so no request can leave the gateway's /ipfs/ tree
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote, unquote
+
+import httpx
+
+from services.unixfs import parse_cid
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GATEWAYS = "http://127.0.0.1:8080,https://ipfs.io,https://dweb.link"
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Statuses that are the content's answer rather than a gateway fault
+DEFINITIVE_STATUSES = (200, 206, 304, 400, 404, 410, 416)
+
+class GatewayUnavailable(Exception):
+    """No gateway produced an answer"""
+
+class InvalidContentPath(ValueError):
+    """The requested path is not a CID followed by plain path segments"""
+
+def gateway_path(path: str) -> str:
+    """Validated, percent-encoded CID[/segments] for use under a gateway's /ipfs/"""
+    cid, *segments = path.split('/')
+    if parse_cid(cid) is None:
+        raise InvalidContentPath(f"Not a valid CID: {cid[:64]}")
+    for segment in segments:
+        # Decode repeatedly so %2e%2e and %252e%252e are caught as well
+        decoded, previous = segment, None
+        while decoded != previous:
+            decoded, previous = unquote(decoded), decoded
+        if decoded in ('.', '..') or '/' in decoded or '\\' in decoded:
+            raise InvalidContentPath(f"Invalid path segment: {segment[:64]}")
+    return '/'.join([cid] + [quote(unquote(segment), safe='') for segment in segments])
+
+class GatewayHealth:
+    def __init__(self, url: str, window: int, failure_threshold: int, cooldown: float, prior_latency: float):
+        self.url = url.rstrip('/')
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.prior_latency = prior_latency
+        self.latencies: deque = deque(maxlen=window)
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.stats = {'requests': 0, 'successes': 0, 'failures': 0, 'hedge_wins': 0, 'ejections': 0}
+
+    def _percentile(self, fraction: float, min_samples: int) -> float:
+        if len(self.latencies) < min_samples:
+            return self.prior_latency
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+    def latency(self) -> float:
+        """Median of recent latencies (the tail is hedging's job); untried gateways use a prior"""
+        return self._percentile(0.5, 1)
+
+    def p95(self) -> float:
+        return self._percentile(0.95, 5)
+
+    def score(self) -> float:
+        # Lower is better; errors weigh like a multiple of the latency
+        return self.latency() * (1 + 4 * self.error_rate)
+
+    def available(self, now: float) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+        return self.state == HALF_OPEN and not self.trial_in_flight
+
+    def record_success(self, latency: float):
+        self.latencies.append(latency)
+        self.error_rate *= 0.9
+        self.consecutive_failures = 0
+        self.stats['successes'] += 1
+        if self.state != CLOSED:
+            logger.info(f"IPFS gateway {self.url} recovered, closing circuit")
+        self.state = CLOSED
+        self.trial_in_flight = False
+
+    def record_failure(self, now: float):
+        self.error_rate = self.error_rate * 0.9 + 0.1
+        self.consecutive_failures += 1
+        self.stats['failures'] += 1
+        self.trial_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.stats['ejections'] += 1
+                logger.warning(f"IPFS gateway {self.url} ejected after {self.consecutive_failures} failures")
+            self.state = OPEN
+            self.opened_at = now
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'url': self.url,
+            'state': self.state,
+            'latency_ms': round(self.latency() * 1000, 1),
+            'p95_ms': round(self.p95() * 1000, 1),
+            'error_rate': round(self.error_rate, 4),
+            'consecutive_failures': self.consecutive_failures
+        }
+
+class IPFSGatewayPool:
+    def __init__(self, gateways: List[str] = None, client_factory: Callable[[], httpx.AsyncClient] = None,
+                 timeout: float = None, max_attempts: int = None, hedge_min: float = None):
+        gateways = gateways or [url.strip() for url in os.environ.get('IPFS_GATEWAYS', DEFAULT_GATEWAYS).split(',') if url.strip()]
+        window = int(os.environ.get('IPFS_GATEWAY_LATENCY_WINDOW', 100))
+        failure_threshold = int(os.environ.get('IPFS_GATEWAY_FAILURE_THRESHOLD', 5))
+        cooldown = float(os.environ.get('IPFS_GATEWAY_COOLDOWN_SECONDS', 30))
+        prior_latency = float(os.environ.get('IPFS_GATEWAY_PRIOR_LATENCY_SECONDS', 1.0))
+        self.gateways = [GatewayHealth(url, window, failure_threshold, cooldown, prior_latency) for url in gateways]
+        self.client_factory = client_factory
+        self.timeout = timeout or float(os.environ.get('IPFS_GATEWAY_TIMEOUT_SECONDS', 10))
+        self.max_attempts = max_attempts or int(os.environ.get('IPFS_GATEWAY_MAX_ATTEMPTS', 3))
+        # Floor for the hedge delay so a burst of fast answers does not hedge every request
+        self.hedge_min = hedge_min if hedge_min is not None else float(os.environ.get('IPFS_GATEWAY_HEDGE_MIN_SECONDS', 0.05))
+        self.stats = {'requests': 0, 'hedged': 0, 'failovers': 0, 'exhausted': 0}
+
+    def _client(self) -> httpx.AsyncClient:
+        if self.client_factory is None:
+            from services.http_client_service import http_clients
+            return http_clients.get('ipfs_gateway')
+        return self.client_factory()
+
+    def ranked(self) -> List[GatewayHealth]:
+        """Available gateways, best score first (configuration order breaks ties)"""
+        now = time.monotonic()
+        return sorted((gateway for gateway in self.gateways if gateway.available(now)), key=GatewayHealth.score)
+
+    async def fetch(self, path: str, headers: Dict[str, str] = None, stream: bool = False) -> httpx.Response:
+        """
+        GET /ipfs/{path} from the pool. With stream=True the race is won on response
+        headers and the body is left unread; the caller must aclose() the response.
+        Raises InvalidContentPath unless path is a CID followed by plain segments.
+        """
+        path = gateway_path(path)
+        self.stats['requests'] += 1
+        candidates = self.ranked()
+        if not candidates:
+            # Every circuit is open: try the least bad gateway rather than fail outright
+            candidates = sorted(self.gateways, key=lambda gateway: gateway.opened_at)[:1]
+        candidates = candidates[:self.max_attempts]
+
+        pending: Dict[asyncio.Task, GatewayHealth] = {}
+        hedges = set()
+        deadline = time.monotonic() + self.timeout
+        last_error: Optional[str] = None
+
+        def launch() -> asyncio.Task:
+            gateway = candidates.pop(0)
+            if gateway.state == HALF_OPEN:
+                gateway.trial_in_flight = True
+            task = asyncio.create_task(self._attempt(gateway, path, headers, stream))
+            pending[task] = gateway
+            return task
+
+        launch()
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # Hedge once the fastest in-flight gateway is past its usual p95
+                hedge_delay = max(min(gateway.p95() for gateway in pending.values()), self.hedge_min)
+                done, _ = await asyncio.wait(pending, timeout=min(hedge_delay, remaining) if candidates else remaining,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if candidates:
+                        self.stats['hedged'] += 1
+                        hedges.add(launch())
+                    continue
+
+                for task in done:
+                    gateway = pending.pop(task)
+                    response, error = task.result()
+                    if response is not None:
+                        if task in hedges:
+                            gateway.stats['hedge_wins'] += 1
+                        return response
+                    last_error = error
+                if candidates and not pending:
+                    # Fail over right away instead of waiting out the hedge delay
+                    self.stats['failovers'] += 1
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(self._discard)
+
+        self.stats['exhausted'] += 1
+        raise GatewayUnavailable(last_error or f"no IPFS gateway answered within {self.timeout:.0f}s")
+
+    async def _attempt(self, gateway: GatewayHealth, path: str, headers: Optional[Dict[str, str]], stream: bool):
+        """One gateway request; returns (response, None) or (None, error)"""
+        gateway.stats['requests'] += 1
+        started = time.monotonic()
+        client = self._client()
+        try:
+            request = client.build_request("GET", f"{gateway.url}/ipfs/{path}", headers=headers)
+            response = await client.send(request, stream=stream)
+        except asyncio.CancelledError:
+            # Lost the race: still let a slow answer count against the gateway
+            elapsed = time.monotonic() - started
+            if elapsed > gateway.p95():
+                gateway.latencies.append(elapsed)
+            gateway.trial_in_flight = False
+            raise
+        except Exception as e:
+            gateway.record_failure(time.monotonic())
+            return None, f"{gateway.url}: {type(e).__name__} {str(e)}"
+
+        if response.status_code in DEFINITIVE_STATUSES:
+            gateway.record_success(time.monotonic() - started)
+            return response, None
+        await response.aclose()
+        gateway.record_failure(time.monotonic())
+        return None, f"{gateway.url}: HTTP {response.status_code}"
+
+    def _discard(self, task: asyncio.Task):
+        # A hedged request that answered after the race was decided
+        if task.cancelled() or task.exception() is not None:
+            return
+        response, _ = task.result()
+        if response is not None:
+            asyncio.ensure_future(response.aclose())
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'gateways': [gateway.snapshot() for gateway in self.gateways]
+        }
+
+# Global IPFS gateway pool instance
+ipfs_gateways = IPFSGatewayPool()
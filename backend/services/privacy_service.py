@@ -3,7 +3,7 @@ Privacy Service - Comprehensive privacy and security by default
 - DPI Bypass with traffic obfuscation
 - TOR Network integration
 - Zero-Knowledge proofs for queries and identity
-- IPFS content encryption
+- IPFS content encryption (whole envelopes, or chunked AEAD streams for large uploads)
 - Anonymous routing and fingerprint masking
 """
 
@@ -13,11 +13,17 @@ import base64
 import hashlib
 import secrets
 import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import OrderedDict
 from typing import Dict, Optional, List, Any
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.backends import default_backend
 import requests
 import random
@@ -26,6 +32,7 @@ from datetime import datetime, timezone
 import aiohttp
 import socket
 from urllib.parse import urlparse
+from services.egress_scheduler import egress_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -103,16 +110,164 @@ class TORService:
         ]
         return random.choice(browsers)
 
+# Key derivation functions recorded in the encryption envelope. Envelopes written
+# before the key schedule existed carry no 'kdf' field and use LEGACY_KDF.
+HKDF_KDF = 'HKDF-SHA256'
+LEGACY_KDF = 'PBKDF2-SHA256'
+LEGACY_PBKDF2_ITERATIONS = 100000
+HKDF_CONTENT_INFO = b'privachain/ipfs-content/v1'
+
+# Chunked AEAD streams (STREAM construction): AES-256-GCM per segment, with the nonce
+# built from a random prefix, the segment counter and a final-segment flag. The header
+# (magic, segment size, salt, nonce prefix) is authenticated with every segment.
+STREAM_MAGIC = b'PCS1'
+STREAM_METHOD = 'AES-256-GCM-STREAM'
+STREAM_SEGMENT_BYTES = int(os.environ.get('ENCRYPTION_STREAM_SEGMENT_BYTES', 64 * 1024))
+# The segment size in a header is only authenticated once the first segment opens, so a
+# decryptor never buffers more than this for one segment
+STREAM_MAX_SEGMENT_BYTES = 1024 * 1024
+STREAM_NONCE_PREFIX_BYTES = 7
+STREAM_TAG_BYTES = 16
+STREAM_HEADER_BYTES = len(STREAM_MAGIC) + 4 + 16 + STREAM_NONCE_PREFIX_BYTES
+
+class StreamEncryptor:
+    """Encrypts a byte stream segment by segment; truncated or reordered streams fail to decrypt"""
+    
+    def __init__(self, key: bytes, salt: bytes, segment_size: int = STREAM_SEGMENT_BYTES):
+        if not 0 < segment_size <= STREAM_MAX_SEGMENT_BYTES:
+            raise ValueError(f"Stream segment size must be between 1 and {STREAM_MAX_SEGMENT_BYTES} bytes")
+        self.segment_size = segment_size
+        self.header = STREAM_MAGIC + segment_size.to_bytes(4, 'big') + salt + secrets.token_bytes(STREAM_NONCE_PREFIX_BYTES)
+        self._aead = AESGCM(key)
+        self._buffer = bytearray()
+        self._counter = 0
+        self._plaintext_hash = hashlib.sha256()
+    
+    def update(self, data: bytes) -> bytes:
+        """Ciphertext of the segments completed by data (the header comes separately)"""
+        self._plaintext_hash.update(data)
+        self._buffer.extend(data)
+        sealed = []
+        # A full segment is only sealed once more data follows, so finalize() always has the last one
+        while len(self._buffer) > self.segment_size:
+            sealed.append(_seal_segment(self._aead, self.header, self._counter, bytes(self._buffer[:self.segment_size]), False))
+            del self._buffer[:self.segment_size]
+            self._counter += 1
+        return b''.join(sealed)
+    
+    def finalize(self) -> bytes:
+        final = _seal_segment(self._aead, self.header, self._counter, bytes(self._buffer), True)
+        self._buffer.clear()
+        return final
+    
+    @property
+    def content_hash(self) -> str:
+        return self._plaintext_hash.hexdigest()
+
+class StreamDecryptor:
+    """Inverse of StreamEncryptor, fed the header and ciphertext in any split"""
+    
+    def __init__(self, derive_key):
+        self._derive_key = derive_key
+        self._aead = None
+        self.header = None
+        self.segment_size = None
+        self._buffer = bytearray()
+        self._counter = 0
+    
+    def update(self, data: bytes) -> bytes:
+        self._buffer.extend(data)
+        if self._aead is None:
+            if len(self._buffer) < STREAM_HEADER_BYTES:
+                return b''
+            self.header = bytes(self._buffer[:STREAM_HEADER_BYTES])
+            if not self.header.startswith(STREAM_MAGIC):
+                raise ValueError("Not an encrypted content stream")
+            self.segment_size = int.from_bytes(self.header[4:8], 'big')
+            if not 0 < self.segment_size <= STREAM_MAX_SEGMENT_BYTES:
+                raise ValueError(f"Invalid segment size {self.segment_size} in content stream header")
+            self._aead = AESGCM(self._derive_key(self.header[8:24], HKDF_KDF))
+            del self._buffer[:STREAM_HEADER_BYTES]
+        
+        opened = []
+        sealed_size = self.segment_size + STREAM_TAG_BYTES
+        while len(self._buffer) > sealed_size:
+            opened.append(_open_segment(self._aead, self.header, self._counter, bytes(self._buffer[:sealed_size]), False))
+            del self._buffer[:sealed_size]
+            self._counter += 1
+        return b''.join(opened)
+    
+    def finalize(self) -> bytes:
+        if self._aead is None:
+            raise ValueError("Truncated content stream")
+        return _open_segment(self._aead, self.header, self._counter, bytes(self._buffer), True)
+
+def _stream_nonce(header: bytes, counter: int, final: bool) -> bytes:
+    return header[24:] + counter.to_bytes(4, 'big') + (b'\x01' if final else b'\x00')
+
+def _seal_segment(aead: AESGCM, header: bytes, counter: int, segment: bytes, final: bool) -> bytes:
+    return aead.encrypt(_stream_nonce(header, counter, final), segment, header)
+
+def _open_segment(aead: AESGCM, header: bytes, counter: int, segment: bytes, final: bool) -> bytes:
+    return aead.decrypt(_stream_nonce(header, counter, final), segment, header)
+
+class DerivedKeyCache:
+    """Bounded LRU of per-object keys derived from the master key, keyed by KDF and salt"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._keys: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, kdf: str, salt: bytes) -> Optional[bytes]:
+        with self._lock:
+            key = self._keys.get((kdf, salt))
+            if key is None:
+                self.misses += 1
+                return None
+            self._keys.move_to_end((kdf, salt))
+            self.hits += 1
+            return key
+
+    def put(self, kdf: str, salt: bytes, key: bytes):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._keys[(kdf, salt)] = key
+            self._keys.move_to_end((kdf, salt))
+            while len(self._keys) > self.max_entries:
+                self._keys.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._keys),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
 class IPFSEncryptionService:
-    def __init__(self):
+    def __init__(self, key_cache_size: int = 4096):
         self.encryption_enabled = True
         self.master_key = None
+        self.kdf = HKDF_KDF
+        self.key_cache = DerivedKeyCache(key_cache_size)
         
     async def initialize(self):
         """Initialize IPFS encryption service"""
         try:
             # Generate or load master encryption key
             self.master_key = self.generate_master_key()
+            self.key_cache.clear()
             logger.info("IPFS encryption enabled by default")
             return True
         except Exception as e:
@@ -123,19 +278,42 @@ class IPFSEncryptionService:
         """Generate master encryption key"""
         return secrets.token_bytes(32)  # 256-bit key
     
+    def derive_key(self, salt: bytes, kdf: str = HKDF_KDF) -> bytes:
+        """Derive the per-object key for a salt, reusing cached derivations"""
+        key = self.key_cache.get(kdf, salt)
+        if key is not None:
+            return key
+        
+        if kdf == HKDF_KDF:
+            # One HMAC extract/expand off the master key - cheap enough for the hot path
+            key = HKDF(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=salt,
+                info=HKDF_CONTENT_INFO,
+                backend=default_backend()
+            ).derive(self.master_key)
+        elif kdf == LEGACY_KDF:
+            # Kept so envelopes written before the HKDF key schedule still decrypt
+            key = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=salt,
+                iterations=LEGACY_PBKDF2_ITERATIONS,
+                backend=default_backend()
+            ).derive(self.master_key)
+        else:
+            raise ValueError(f"Unsupported key derivation function: {kdf}")
+        
+        self.key_cache.put(kdf, salt, key)
+        return key
+    
     def encrypt_content(self, content: bytes, content_id: str = None) -> Dict[str, Any]:
         """Encrypt IPFS content"""
         try:
             # Generate unique key for this content
             salt = secrets.token_bytes(16)
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=100000,
-                backend=default_backend()
-            )
-            key = kdf.derive(self.master_key)
+            key = self.derive_key(salt, self.kdf)
             
             # Generate IV for AES
             iv = secrets.token_bytes(16)
@@ -151,54 +329,87 @@ class IPFSEncryptionService:
             
             encrypted_content = encryptor.update(padded_content) + encryptor.finalize()
             
-            return {
+            envelope = {
                 'encrypted_content': base64.b64encode(encrypted_content).decode(),
                 'salt': base64.b64encode(salt).decode(),
                 'iv': base64.b64encode(iv).decode(),
                 'encryption_method': 'AES-256-CBC',
                 'content_hash': hashlib.sha256(content).hexdigest()
             }
+            if self.kdf != LEGACY_KDF:
+                envelope['kdf'] = self.kdf
+            
+            return envelope
             
         except Exception as e:
             logger.error(f"IPFS encryption error: {str(e)}")
             raise e
     
+    def stream_encryptor(self, segment_size: int = STREAM_SEGMENT_BYTES) -> StreamEncryptor:
+        """Chunked AEAD encryptor for one object, under a fresh per-object key"""
+        salt = secrets.token_bytes(16)
+        return StreamEncryptor(self.derive_key(salt, HKDF_KDF), salt, segment_size)
+    
+    def stream_decryptor(self) -> StreamDecryptor:
+        return StreamDecryptor(self.derive_key)
+    
     def decrypt_content(self, encrypted_data: Dict[str, Any]) -> bytes:
         """Decrypt IPFS content"""
         try:
-            # Reconstruct key
+            # Reconstruct key - envelopes without a 'kdf' field predate the key schedule
             salt = base64.b64decode(encrypted_data['salt'])
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=100000,
-                backend=default_backend()
-            )
-            key = kdf.derive(self.master_key)
-            
-            # Decrypt content
-            iv = base64.b64decode(encrypted_data['iv'])
-            encrypted_content = base64.b64decode(encrypted_data['encrypted_content'])
-            
-            cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
-            decryptor = cipher.decryptor()
-            
-            padded_content = decryptor.update(encrypted_content) + decryptor.finalize()
-            
-            # Remove padding
-            padding_length = padded_content[-1]
-            content = padded_content[:-padding_length]
+            key = self.derive_key(salt, encrypted_data.get('kdf', LEGACY_KDF))
             
-            # Verify hash
-            if hashlib.sha256(content).hexdigest() != encrypted_data['content_hash']:
-                raise ValueError("Content integrity check failed")
-            
-            return content
+            # Decrypt content, strip padding and verify integrity hash
+            return self._decrypt_with_key(key, encrypted_data)
             
         except Exception as e:
             logger.error(f"IPFS decryption error: {str(e)}")
             raise e
+    
+    def decrypt_many(self, envelopes: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Decrypt a batch of envelopes in one pass, deriving each distinct key once.
+        Results are returned in input order; an item that fails holds its exception.
+        """
+        results: List[Any] = [None] * len(envelopes)
+        groups: Dict[tuple, List[int]] = {}
+        
+        for index, envelope in enumerate(envelopes):
+            try:
+                group_key = (envelope.get('kdf', LEGACY_KDF), base64.b64decode(envelope['salt']))
+                groups.setdefault(group_key, []).append(index)
+            except Exception as e:
+                results[index] = e
+        
+        for (kdf, salt), indexes in groups.items():
+            try:
+                key = self.derive_key(salt, kdf)
+            except Exception as e:
+                for index in indexes:
+                    results[index] = e
+                continue
+            
+            for index in indexes:
+                try:
+                    results[index] = self._decrypt_with_key(key, envelopes[index])
+                except Exception as e:
+                    results[index] = e
+        
+        return results
+    
+    def _decrypt_with_key(self, key: bytes, encrypted_data: Dict[str, Any]) -> bytes:
+        iv = base64.b64decode(encrypted_data['iv'])
+        encrypted_content = base64.b64decode(encrypted_data['encrypted_content'])
+        
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend()).decryptor()
+        padded_content = decryptor.update(encrypted_content) + decryptor.finalize()
+        content = padded_content[:-padded_content[-1]]
+        
+        if hashlib.sha256(content).hexdigest() != encrypted_data['content_hash']:
+            raise ValueError("Content integrity check failed")
+        
+        return content
 
 class ZKProofService:
     def __init__(self):
@@ -398,12 +609,109 @@ class DPIBypassService:
             'max_requests': random.randint(10, 100)
         }
 
+# Key material held by each crypto worker. Thread workers share the live service
+# objects; process workers rebuild them once from the state passed to the initializer.
+_worker_encryption: Optional[IPFSEncryptionService] = None
+_worker_zk_proof: Optional[ZKProofService] = None
+
+def _init_thread_worker(encryption: IPFSEncryptionService, zk_proof: ZKProofService):
+    global _worker_encryption, _worker_zk_proof
+    _worker_encryption = encryption
+    _worker_zk_proof = zk_proof
+
+def _init_process_worker(master_key: bytes, kdf: str, private_key_pem: bytes, proof_nonce: str):
+    global _worker_encryption, _worker_zk_proof
+    _worker_encryption = IPFSEncryptionService()
+    _worker_encryption.master_key = master_key
+    _worker_encryption.kdf = kdf
+    
+    private_key = serialization.load_pem_private_key(private_key_pem, password=None, backend=default_backend())
+    _worker_zk_proof = ZKProofService()
+    _worker_zk_proof.user_credentials = {
+        'private_key': private_key,
+        'public_key': private_key.public_key(),
+        'proof_nonce': proof_nonce
+    }
+
+def _worker_encrypt_many(contents: List[bytes]) -> List[Any]:
+    results = []
+    for content in contents:
+        try:
+            results.append(_worker_encryption.encrypt_content(content))
+        except Exception as e:
+            results.append(e)
+    return results
+
+def _worker_decrypt_many(envelopes: List[Dict[str, Any]]) -> List[Any]:
+    return _worker_encryption.decrypt_many(envelopes)
+
+def _worker_sign_many(messages: List[str]) -> List[Dict[str, Any]]:
+    return [_worker_zk_proof.generate_query_proof(message) for message in messages]
+
+class CryptoExecutor:
+    """Runs CPU-bound crypto off the event loop on a thread or process pool"""
+    
+    def __init__(self, mode: str = None, max_workers: int = None, batch_size: int = 16):
+        self.mode = (mode or os.environ.get('CRYPTO_EXECUTOR', 'thread')).lower()
+        self.max_workers = max_workers or int(os.environ.get('CRYPTO_WORKERS', min(4, os.cpu_count() or 1)))
+        self.batch_size = batch_size
+        self._pool = None
+    
+    def start(self, encryption: IPFSEncryptionService, zk_proof: ZKProofService):
+        """Create the worker pool with the current key material loaded in every worker"""
+        self.shutdown()
+        
+        if self.mode == 'process':
+            private_key_pem = zk_proof.user_credentials['private_key'].private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption()
+            )
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_process_worker,
+                initargs=(encryption.master_key, encryption.kdf, private_key_pem, zk_proof.user_credentials['proof_nonce'])
+            )
+        else:
+            self.mode = 'thread'
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='crypto',
+                initializer=_init_thread_worker,
+                initargs=(encryption, zk_proof)
+            )
+        
+        logger.info(f"Crypto executor started: {self.mode} pool with {self.max_workers} workers")
+    
+    @property
+    def is_running(self) -> bool:
+        return self._pool is not None
+    
+    async def map_batched(self, fn, items: List[Any]) -> List[Any]:
+        """Split items into batches, run them concurrently on the pool and flatten results in order"""
+        if not items:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        batch_results = await asyncio.gather(
+            *(loop.run_in_executor(self._pool, fn, batch) for batch in batches)
+        )
+        return [result for batch in batch_results for result in batch]
+    
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
 class PrivacyService:
     def __init__(self):
         self.tor_service = TORService()
         self.ipfs_encryption = IPFSEncryptionService()
         self.zk_proof = ZKProofService()
         self.dpi_bypass = DPIBypassService()
+        self.crypto_executor = CryptoExecutor()
+        self.egress_scheduler = egress_scheduler
         self.privacy_enabled = True
         
     async def initialize(self):
@@ -428,6 +736,9 @@ class PrivacyService:
                 else:
                     logger.info(f"{services[i]} initialized successfully")
             
+            # Workers take a copy of the key material, so start them once keys exist
+            self.crypto_executor.start(self.ipfs_encryption, self.zk_proof)
+            
             logger.info("Privacy services initialization complete - ALL privacy features enabled by default")
             return True
             
@@ -435,11 +746,11 @@ class PrivacyService:
             logger.error(f"Privacy service initialization error: {str(e)}")
             return False
     
-    async def create_private_request(self, url: str, method: str = 'GET', data: Any = None) -> Dict[str, Any]:
+    async def create_private_request(self, url: str, method: str = 'GET', data: Any = None, request_class: str = 'interactive') -> Dict[str, Any]:
         """Create privacy-enhanced request with all protections"""
         try:
             # Generate ZK proof for the request
-            zk_proof = self.zk_proof.generate_query_proof(f"{method}_{url}")
+            zk_proof = await self.asign_commitment(f"{method}_{url}")
             
             # Apply DPI bypass obfuscation
             obfuscation = self.dpi_bypass.obfuscate_request(url)
@@ -447,8 +758,9 @@ class PrivacyService:
             # Get TOR session if available
             session = self.tor_service.get_tor_session()
             
-            # Add privacy timing
-            await asyncio.sleep(obfuscation['timing']['pre_request_delay'])
+            # Privacy timing: wait for the next jittered egress window of this request class
+            # (bounded by the class latency budget) rather than a per-request random sleep
+            await self.egress_scheduler.acquire(request_class)
             
             return {
                 'session': session,
@@ -472,12 +784,62 @@ class PrivacyService:
         """Decrypt content from IPFS"""
         return self.ipfs_encryption.decrypt_content(encrypted_data)
     
+    def decrypt_many(self, envelopes: List[Dict[str, Any]]) -> List[Any]:
+        """Decrypt a batch of envelopes grouped by key; failed items hold their exception"""
+        return self.ipfs_encryption.decrypt_many(envelopes)
+    
+    def _ensure_crypto_executor(self):
+        if not self.crypto_executor.is_running:
+            self.crypto_executor.start(self.ipfs_encryption, self.zk_proof)
+    
+    async def aencrypt(self, content: bytes) -> Dict[str, Any]:
+        """Encrypt content on the crypto executor without blocking the event loop"""
+        result = (await self.aencrypt_many([content]))[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    async def adecrypt(self, encrypted_data: Dict[str, Any]) -> bytes:
+        """Decrypt content on the crypto executor without blocking the event loop"""
+        result = (await self.adecrypt_many([encrypted_data]))[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    async def asign_commitment(self, message: str) -> Dict[str, Any]:
+        """Generate a signed ZK commitment on the crypto executor"""
+        return (await self.asign_commitments([message]))[0]
+    
+    async def aencrypt_many(self, contents: List[bytes]) -> List[Any]:
+        """Encrypt a batch; failed items are returned as exceptions in their slot"""
+        self._ensure_crypto_executor()
+        return await self.crypto_executor.map_batched(_worker_encrypt_many, contents)
+    
+    async def adecrypt_many(self, envelopes: List[Dict[str, Any]]) -> List[Any]:
+        """Decrypt a batch; failed items are returned as exceptions in their slot"""
+        self._ensure_crypto_executor()
+        return await self.crypto_executor.map_batched(_worker_decrypt_many, envelopes)
+    
+    async def asign_commitments(self, messages: List[str]) -> List[Dict[str, Any]]:
+        """Generate signed ZK commitments for a batch of messages"""
+        self._ensure_crypto_executor()
+        return await self.crypto_executor.map_batched(_worker_sign_many, messages)
+    
+    async def shutdown(self):
+        """Stop crypto workers and the egress scheduler"""
+        self.crypto_executor.shutdown()
+        await self.egress_scheduler.stop()
+    
     def get_privacy_status(self) -> Dict[str, Any]:
         """Get comprehensive privacy status"""
         return {
             'privacy_enabled': self.privacy_enabled,
             'tor_available': self.tor_service.is_available,
             'ipfs_encryption': self.ipfs_encryption.encryption_enabled,
+            'key_derivation': self.ipfs_encryption.kdf,
+            'derived_key_cache': self.ipfs_encryption.key_cache.get_stats(),
+            'crypto_executor': {'mode': self.crypto_executor.mode, 'workers': self.crypto_executor.max_workers},
+            'egress_scheduler': self.egress_scheduler.get_stats(),
             'zk_proofs': self.zk_proof.zk_enabled,
             'dpi_bypass': self.dpi_bypass.bypass_enabled,
             'anonymous_identity': self.zk_proof.user_credentials.get('identity_hash', 'not_generated'),
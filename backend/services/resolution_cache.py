@@ -0,0 +1,105 @@
+"""
+Resolution Cache - TTL cache with single-flight loading for .prv lookups
+- Found domains are cached for DOMAIN_CACHE_POSITIVE_TTL seconds, missing ones
+  (NXDOMAIN-style) for the shorter DOMAIN_CACHE_NEGATIVE_TTL
+- Concurrent lookups of the same key share one upstream query
+- A loader that cannot get an answer raises UpstreamError; that is passed to every
+  waiting caller and never cached, so an RPC outage does not turn into NXDOMAIN
+- Entries are dropped on local registration so new domains resolve immediately
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class UpstreamError(Exception):
+    """The upstream could not answer; unlike a None result this is not a miss"""
+
+class ResolutionCache:
+    def __init__(self, positive_ttl: float = None, negative_ttl: float = None, max_entries: int = None):
+        self.positive_ttl = positive_ttl if positive_ttl is not None else float(os.environ.get('DOMAIN_CACHE_POSITIVE_TTL', 300))
+        self.negative_ttl = negative_ttl if negative_ttl is not None else float(os.environ.get('DOMAIN_CACHE_NEGATIVE_TTL', 30))
+        self.max_entries = max_entries or int(os.environ.get('DOMAIN_CACHE_MAX_ENTRIES', 10000))
+        # key -> (expires_at, value); value None is a cached miss
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'upstream_queries': 0,
+            'upstream_errors': 0,
+            'invalidations': 0,
+            'evictions': 0
+        }
+
+    async def resolve(self, key: str, loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        """Cached value for key, loading it once no matter how many callers are waiting"""
+        cached = self._entries.get(key)
+        if cached is not None:
+            expires_at, value = cached
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats['hits' if value is not None else 'negative_hits'] += 1
+                return value
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats['coalesced'] += 1
+        else:
+            self.stats['misses'] += 1
+            task = asyncio.create_task(self._load(key, loader))
+            self._inflight[key] = task
+        # Shield so one cancelled caller does not cancel the shared query
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        task = asyncio.current_task()
+        try:
+            self.stats['upstream_queries'] += 1
+            try:
+                value = await loader(key)
+            except UpstreamError:
+                self.stats['upstream_errors'] += 1
+                raise
+            # An invalidation while loading means this answer may already be out of date
+            if self._inflight.get(key) is task:
+                self._store(key, value)
+            return value
+        finally:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    def _store(self, key: str, value: Optional[Dict[str, Any]]):
+        ttl = self.positive_ttl if value is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def invalidate(self, key: str):
+        """Forget a key, including any lookup of it still in flight"""
+        self._entries.pop(key, None)
+        self._inflight.pop(key, None)
+        self.stats['invalidations'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['negative_hits'] + self.stats['misses'] + self.stats['coalesced']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'inflight': len(self._inflight),
+            'hit_ratio': round((self.stats['hits'] + self.stats['negative_hits']) / lookups, 4) if lookups else 0.0,
+            'positive_ttl': self.positive_ttl,
+            'negative_ttl': self.negative_ttl
+        }
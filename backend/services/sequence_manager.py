@@ -0,0 +1,160 @@
+"""
+Sequence Manager - account number and sequence allocation for the developer wallet
+- Account number and sequence are queried once, then sequences are handed out atomically
+- Up to COSMOS_MAX_INFLIGHT_TXS transactions are signed and awaiting inclusion at once;
+  broadcasts leave in sequence order so the node never sees a gap
+- A sequence mismatch reported by the node resynchronises the counter (from the expected
+  value in the error when present) and invalidates every lease issued before it
+"""
+
+import asyncio
+import logging
+import os
+import re
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cosmos SDK ErrWrongSequence (codespace "sdk")
+SEQUENCE_MISMATCH_CODE = 32
+SEQUENCE_MISMATCH_PATTERN = re.compile(r"account sequence mismatch, expected (\d+), got (\d+)")
+
+def sequence_mismatch(result: Dict[str, Any]) -> Tuple[bool, Optional[int]]:
+    """Whether a broadcast result is a sequence mismatch, and the sequence the node expected"""
+    error = str(result.get("error") or result.get("raw_log") or "")
+    match = SEQUENCE_MISMATCH_PATTERN.search(error)
+    if match:
+        return True, int(match.group(1))
+    return result.get("code") == SEQUENCE_MISMATCH_CODE or "incorrect account sequence" in error, None
+
+class SequenceLease:
+    """One allocated sequence; must be accepted or returned when the broadcast settles"""
+
+    def __init__(self, manager: "SequenceManager", account_number: int, sequence: int, generation: int):
+        self.manager = manager
+        self.account_number = account_number
+        self.sequence = sequence
+        self.generation = generation
+        self.accepted = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.manager._settle(self)
+        return False
+
+class SequenceManager:
+    def __init__(self, fetch_account: Callable[[], Awaitable[Tuple[int, int]]], max_inflight: int = None):
+        self.fetch_account = fetch_account
+        self.max_inflight = max_inflight or int(os.environ.get('COSMOS_MAX_INFLIGHT_TXS', 8))
+        self.account_number: Optional[int] = None
+        self._next_sequence: Optional[int] = None
+        # Sequence whose broadcast may leave next; later leases wait their turn
+        self._next_to_broadcast: Optional[int] = None
+        # Bumped on every resync; leases from an older generation are void
+        self.generation = 0
+        self._lock = asyncio.Lock()
+        self._turn = asyncio.Condition()
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self._in_flight = 0
+        self.stats = {
+            'allocated': 0,
+            'accepted': 0,
+            'returned': 0,
+            'mismatches': 0,
+            'resyncs': 0,
+            'account_queries': 0
+        }
+
+    async def lease(self) -> SequenceLease:
+        """Allocate the next sequence, waiting for a free in-flight slot first"""
+        await self._slots.acquire()
+        self._in_flight += 1
+        try:
+            async with self._lock:
+                if self._next_sequence is None:
+                    await self._sync_locked()
+                lease = SequenceLease(self, self.account_number, self._next_sequence, self.generation)
+                self._next_sequence += 1
+                self.stats['allocated'] += 1
+                return lease
+        except BaseException:
+            self._in_flight -= 1
+            self._slots.release()
+            raise
+
+    async def wait_turn(self, lease: SequenceLease) -> bool:
+        """Wait until every earlier sequence has been broadcast; False if the lease was voided meanwhile"""
+        async with self._turn:
+            await self._turn.wait_for(
+                lambda: lease.generation != self.generation or self._next_to_broadcast == lease.sequence
+            )
+            return lease.generation == self.generation
+
+    async def resync(self, lease: SequenceLease, expected_sequence: Optional[int] = None):
+        """Handle a sequence mismatch on a lease; only the first report per generation resyncs"""
+        self.stats['mismatches'] += 1
+        async with self._lock:
+            if lease.generation != self.generation:
+                return
+            if expected_sequence is not None:
+                self._reset(expected_sequence)
+            else:
+                await self._sync_locked()
+            logger.warning(f"Account sequence resynchronised to {self._next_sequence}")
+        await self._notify()
+
+    async def _settle(self, lease: SequenceLease):
+        try:
+            if lease.accepted:
+                self.stats['accepted'] += 1
+                async with self._turn:
+                    if lease.generation == self.generation and self._next_to_broadcast == lease.sequence:
+                        self._next_to_broadcast += 1
+                    self._turn.notify_all()
+            else:
+                # The node never took this sequence: hand it back and void the leases issued after it
+                self.stats['returned'] += 1
+                async with self._lock:
+                    if lease.generation == self.generation:
+                        self._reset(lease.sequence)
+                await self._notify()
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def _sync_locked(self):
+        self.stats['account_queries'] += 1
+        try:
+            account_number, sequence = await self.fetch_account()
+            self.account_number = account_number
+            self._reset(sequence)
+            logger.info(f"Developer account {account_number} synchronised at sequence {sequence}")
+        except Exception as e:
+            if self._next_sequence is None:
+                logger.warning(f"Could not query developer account, starting from sequence 0: {str(e)}")
+                self.account_number = 0
+                self._reset(0)
+            else:
+                logger.warning(f"Could not query developer account, keeping local sequence: {str(e)}")
+                self._reset(self._next_to_broadcast)
+
+    def _reset(self, sequence: int):
+        self._next_sequence = sequence
+        self._next_to_broadcast = sequence
+        self.generation += 1
+        self.stats['resyncs'] += 1
+
+    async def _notify(self):
+        async with self._turn:
+            self._turn.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'account_number': self.account_number,
+            'next_sequence': self._next_sequence,
+            'in_flight': self._in_flight,
+            'max_inflight': self.max_inflight
+        }
@@ -0,0 +1,145 @@
+"""
+Transaction Batcher - packs concurrent registrations into multi-msg Cosmos transactions
+- Payloads queue until TX_BATCH_MAX_MSGS are waiting or TX_BATCH_MAX_WAIT_MS has passed
+- Each batch is signed and broadcast once, so fees, signing and broadcast are paid per batch
+- The resulting tx hash and height are fanned back out to every waiting caller
+- Transport failures (node unreachable, HTTP errors: no CheckTx code) are retried with
+  exponential backoff; once retries run out the whole batch fails fast
+- A deterministic CheckTx rejection (non-zero code) splits the batch in halves, each sent
+  on its own, so one bad msg does not fail every caller in the batch
+- Sequence mismatches are retried (with a resync) by the submit function only; one that
+  still reaches the batcher fails the batch without a split
+"""
+
+import asyncio
+import logging
+import os
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.sequence_manager import sequence_mismatch
+
+logger = logging.getLogger(__name__)
+
+# (payload, memo, future) for one pending msg
+PendingMsg = Tuple[Dict[str, Any], str, asyncio.Future]
+
+def transport_failure(result: Dict[str, Any]) -> bool:
+    """Failures worth retrying as they are: no CheckTx verdict (transport, HTTP status)"""
+    return result.get("code") is None and not sequence_mismatch(result)[0]
+
+def msg_rejection(result: Dict[str, Any]) -> bool:
+    """A CheckTx verdict against the batch contents, which a split can isolate"""
+    return result.get("code") not in (None, 0) and not sequence_mismatch(result)[0]
+
+class TxBatcher:
+    def __init__(self, submit_batch: Callable[[List[Dict[str, Any]], str], Awaitable[Dict[str, Any]]],
+                 max_msgs: int = None, max_wait_ms: float = None,
+                 retries: int = None, retry_backoff_ms: float = None):
+        self.submit_batch = submit_batch
+        self.retries = retries if retries is not None else int(os.environ.get('TX_BATCH_RETRIES', 3))
+        self.retry_backoff = (retry_backoff_ms if retry_backoff_ms is not None else float(os.environ.get('TX_BATCH_RETRY_BACKOFF_MS', 200))) / 1000
+        self.max_msgs = max_msgs or int(os.environ.get('TX_BATCH_MAX_MSGS', 32))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.environ.get('TX_BATCH_MAX_WAIT_MS', 50))) / 1000
+        self._pending: List[PendingMsg] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._inflight = set()
+        self.stats = {
+            'msgs': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'failed_msgs': 0,
+            'retries': 0,
+            'splits': 0,
+            'largest_batch': 0
+        }
+
+    async def submit(self, payload: Dict[str, Any], memo: str) -> Dict[str, Any]:
+        """Queue one msg and wait for the result of the transaction that carries it"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, memo, future))
+        self.stats['msgs'] += 1
+
+        if len(self._pending) >= self.max_msgs:
+            self._flush()
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_after_wait())
+        return await future
+
+    async def _flush_after_wait(self):
+        await asyncio.sleep(self.max_wait)
+        self._timer = None
+        self._flush()
+
+    def _flush(self):
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_msgs], self._pending[self.max_msgs:]
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+        if self._pending:
+            self._timer = asyncio.create_task(self._flush_after_wait())
+
+    async def _send(self, batch: List[PendingMsg]):
+        self.stats['batches'] += 1
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+        await self._deliver(batch)
+
+    async def _deliver(self, batch: List[PendingMsg]):
+        """Submit a batch (with retries) and resolve its callers; split it if CheckTx rejects it"""
+        result = await self._submit_with_retries(batch)
+        if not result.get("success") and msg_rejection(result) and len(batch) > 1:
+            self.stats['splits'] += 1
+            middle = len(batch) // 2
+            logger.warning(f"Batch of {len(batch)} msgs failed ({result.get('error')}), retrying as two halves")
+            await asyncio.gather(self._deliver(batch[:middle]), self._deliver(batch[middle:]))
+            return
+        if not result.get("success"):
+            self.stats['failed_batches'] += 1
+            self.stats['failed_msgs'] += len(batch)
+
+        for index, (_, _, future) in enumerate(batch):
+            if not future.done():
+                future.set_result({**result, "msg_index": index, "batch_size": len(batch)})
+
+    async def _submit_with_retries(self, batch: List[PendingMsg]) -> Dict[str, Any]:
+        payloads = [payload for payload, _, _ in batch]
+        memo = batch[0][1] if len(batch) == 1 else f"PrivaChain batch: {len(batch)} msgs"
+        attempt = 0
+        while True:
+            try:
+                result = await self.submit_batch(payloads, memo)
+            except Exception as e:
+                logger.error(f"Batched transaction failed: {str(e)}")
+                result = {"success": False, "error": str(e)}
+            if result.get("success") or not transport_failure(result) or attempt >= self.retries:
+                return result
+
+            attempt += 1
+            self.stats['retries'] += 1
+            # Exponential backoff with jitter so retried batches do not arrive together
+            await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.0))
+
+    async def close(self):
+        """Send anything still queued and wait for in-flight batches"""
+        while self._pending:
+            self._flush()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await asyncio.gather(*list(self._inflight), return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'queued': len(self._pending),
+            'inflight_batches': len(self._inflight),
+            'mean_batch_size': round(self.stats['msgs'] / batches, 2) if batches else 0.0,
+            'max_msgs': self.max_msgs,
+            'retries_per_batch': self.retries,
+            'max_wait_ms': self.max_wait * 1000
+        }
@@ -0,0 +1,207 @@
+"""
+Transaction Tracker - lifecycle of broadcast transactions after they leave the node's mempool check
+- Broadcasts return a pending handle immediately; confirmation is tracked in the background
+- Pending transactions are polled by hash every COSMOS_TX_POLL_SECONDS, less often while
+  websocket Tx events are arriving (those settle transactions as soon as they are committed)
+- Callers can wait for the outcome with a timeout or look the status up later by hash
+- Unconfirmed transactions are marked timed_out after COSMOS_TX_CONFIRM_TIMEOUT seconds
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+CONFIRMED = 'confirmed'
+FAILED = 'failed'
+TIMED_OUT = 'timed_out'
+
+# Fields of a tracked transaction that are returned to clients
+PUBLIC_FIELDS = ('tx_hash', 'status', 'tx_type', 'block_height', 'code', 'error', 'submitted_at', 'settled_at')
+
+class TxTracker:
+    def __init__(self, fetch_tx: Callable[[str], Awaitable[Optional[Dict[str, Any]]]], poll_interval: float = None,
+                 confirm_timeout: float = None, max_tracked: int = None):
+        self.fetch_tx = fetch_tx
+        self.poll_interval = poll_interval or float(os.environ.get('COSMOS_TX_POLL_SECONDS', 2))
+        self.confirm_timeout = confirm_timeout or float(os.environ.get('COSMOS_TX_CONFIRM_TIMEOUT', 60))
+        self.max_tracked = max_tracked or int(os.environ.get('COSMOS_TX_MAX_TRACKED', 10000))
+        # Returns True while websocket Tx events are being received
+        self.events_connected: Callable[[], bool] = lambda: False
+        self._txs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._callbacks: Dict[str, List[Callable[[Dict[str, Any]], Any]]] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self.stats = {
+            'tracked': 0,
+            'confirmed': 0,
+            'failed': 0,
+            'timed_out': 0,
+            'confirmed_by_event': 0,
+            'confirmed_by_poll': 0,
+            'polls': 0
+        }
+
+    def track(self, tx_hash: str, tx_type: str, simulated_height: int = None, simulated_delay: float = 0.5) -> Dict[str, Any]:
+        """Start tracking a broadcast transaction and return its pending handle"""
+        record = self._txs.get(tx_hash)
+        if record is None:
+            record = {
+                'tx_hash': tx_hash,
+                'status': PENDING,
+                'tx_type': tx_type,
+                'block_height': None,
+                'submitted_at': datetime.now(timezone.utc).isoformat(),
+                '_submitted': time.monotonic()
+            }
+            self._txs[tx_hash] = record
+            self.stats['tracked'] += 1
+            self._evict()
+
+        if simulated_height is not None:
+            # No node to ask: the simulated network commits the transaction after a delay
+            asyncio.get_running_loop().call_later(simulated_delay, self.settle, tx_hash, CONFIRMED, simulated_height)
+        elif self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_loop())
+        return self._public(record)
+
+    def add_callback(self, tx_hash: str, callback: Callable[[Dict[str, Any]], Any]):
+        """Call callback(status) once the transaction settles (immediately if it already has)"""
+        record = self._txs.get(tx_hash)
+        if record is not None and record['status'] != PENDING:
+            self._run_callback(callback, self._public(record))
+        else:
+            self._callbacks.setdefault(tx_hash, []).append(callback)
+
+    def settle(self, tx_hash: str, status: str, block_height: int = None, code: int = None, error: str = None, source: str = None):
+        record = self._txs.get(tx_hash)
+        if record is None or record['status'] != PENDING:
+            return
+        record.update({
+            'status': status,
+            'block_height': int(block_height) if block_height else None,
+            'code': code,
+            'error': error,
+            'settled_at': datetime.now(timezone.utc).isoformat()
+        })
+        self.stats[status] += 1
+        if status == CONFIRMED and source:
+            self.stats[f'confirmed_by_{source}'] += 1
+        if status != CONFIRMED:
+            logger.warning(f"Transaction {tx_hash[:16]}... {status}: {error or code}")
+
+        public = self._public(record)
+        for future in self._waiters.pop(tx_hash, []):
+            if not future.done():
+                future.set_result(public)
+        for callback in self._callbacks.pop(tx_hash, []):
+            self._run_callback(callback, public)
+
+    def on_tx_event(self, tx_hash: str, block_height: int, code: int, log: str = None):
+        """Websocket Tx event for a committed transaction"""
+        tx_hash = tx_hash.upper()
+        for candidate in (tx_hash, tx_hash.lower()):
+            if candidate in self._txs:
+                if code:
+                    self.settle(candidate, FAILED, block_height, code, log, source='event')
+                else:
+                    self.settle(candidate, CONFIRMED, block_height, source='event')
+                return
+
+    async def wait(self, tx_hash: str, timeout: float = None) -> Optional[Dict[str, Any]]:
+        """Wait for a tracked transaction to settle; returns its (possibly still pending) status"""
+        record = self._txs.get(tx_hash)
+        if record is None:
+            return None
+        if record['status'] != PENDING:
+            return self._public(record)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(tx_hash, []).append(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.confirm_timeout)
+        except asyncio.TimeoutError:
+            return self._public(record)
+
+    def get(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        record = self._txs.get(tx_hash) or self._txs.get(tx_hash.upper()) or self._txs.get(tx_hash.lower())
+        return self._public(record) if record else None
+
+    async def lookup(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """Status of a tracked transaction, or of any transaction the node knows about"""
+        status = self.get(tx_hash)
+        if status is not None:
+            return status
+        tx_response = await self.fetch_tx(tx_hash)
+        if tx_response is None:
+            return None
+        return {
+            'tx_hash': tx_response.get('txhash', tx_hash),
+            'status': FAILED if tx_response.get('code') else CONFIRMED,
+            'block_height': int(tx_response['height']) if tx_response.get('height') else None,
+            'code': tx_response.get('code'),
+            'error': tx_response.get('raw_log') if tx_response.get('code') else None
+        }
+
+    async def _poll_loop(self):
+        while True:
+            # Websocket events settle transactions as they commit; polling is then only a backstop
+            await asyncio.sleep(self.poll_interval * (5 if self.events_connected() else 1))
+            pending = [tx_hash for tx_hash, record in self._txs.items() if record['status'] == PENDING]
+            if not pending:
+                return
+            self.stats['polls'] += 1
+            await asyncio.gather(*(self._poll_one(tx_hash) for tx_hash in pending[:100]))
+
+    async def _poll_one(self, tx_hash: str):
+        record = self._txs.get(tx_hash)
+        try:
+            tx_response = await self.fetch_tx(tx_hash)
+        except Exception as e:
+            logger.debug(f"Transaction poll failed for {tx_hash[:16]}...: {str(e)}")
+            tx_response = None
+
+        if tx_response is not None:
+            if tx_response.get('code'):
+                self.settle(tx_hash, FAILED, tx_response.get('height'), tx_response.get('code'), tx_response.get('raw_log'), source='poll')
+            else:
+                self.settle(tx_hash, CONFIRMED, tx_response.get('height'), source='poll')
+        elif record is not None and time.monotonic() - record['_submitted'] > self.confirm_timeout:
+            self.settle(tx_hash, TIMED_OUT, error=f"not committed within {self.confirm_timeout:.0f}s")
+
+    def _run_callback(self, callback: Callable[[Dict[str, Any]], Any], status: Dict[str, Any]):
+        try:
+            result = callback(status)
+            if asyncio.iscoroutine(result):
+                asyncio.create_task(result)
+        except Exception as e:
+            logger.error(f"Transaction callback error: {str(e)}")
+
+    def _evict(self):
+        # Forget the oldest settled transactions once the table is full
+        if len(self._txs) <= self.max_tracked:
+            return
+        for tx_hash in [h for h, r in self._txs.items() if r['status'] != PENDING][:len(self._txs) - self.max_tracked]:
+            del self._txs[tx_hash]
+
+    def _public(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: record.get(field) for field in PUBLIC_FIELDS}
+
+    async def stop(self):
+        if self._poller:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'pending': sum(1 for record in self._txs.values() if record['status'] == PENDING),
+            'events_connected': self.events_connected()
+        }
@@ -0,0 +1,243 @@
+"""
+UnixFS DAG builder - computes IPFS content identifiers locally, as data streams past
+- Same DAG as `ipfs add`: fixed-size 256 KiB chunks and a balanced layout with at most
+  174 links per node
+- CIDv0 (dag-pb leaves wrapping UnixFS File data, base58btc) or CIDv1 (raw leaves,
+  dag-pb parents, base32), matching `ipfs add --cid-version=1`
+- Single pass and incremental: only a partial chunk and one pending link list per tree
+  level are held, so memory stays constant however large the input is
+- Completed blocks can be handed to a callback as they are produced, e.g. to push them
+  to a node with BlockPusher while hashing continues
+"""
+
+import asyncio
+import base64
+import hashlib
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+DEFAULT_CHUNK_SIZE = 262144
+DEFAULT_MAX_LINKS = 174
+
+UNIXFS_FILE = 2
+
+# Multicodec codes used in CIDv1
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+SHA2_256 = 0x12
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+def base58btc(data: bytes) -> str:
+    number = int.from_bytes(data, 'big')
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + encoded
+
+def base58btc_decode(text: str) -> bytes:
+    number = 0
+    for char in text:
+        number = number * 58 + BASE58_ALPHABET.index(char)
+    decoded = number.to_bytes((number.bit_length() + 7) // 8, 'big')
+    return b"\0" * (len(text) - len(text.lstrip("1"))) + decoded
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _field_bytes(field: int, value: bytes) -> bytes:
+    return _varint(field << 3 | 2) + _varint(len(value)) + value
+
+def _field_varint(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+def sha256_multihash(block: bytes) -> bytes:
+    return bytes((SHA2_256, 32)) + hashlib.sha256(block).digest()
+
+def binary_cid(block: bytes, codec: int, cid_version: int) -> bytes:
+    """Binary CID of a block: the bare multihash for v0, version + codec + multihash for v1"""
+    if cid_version == 0:
+        return sha256_multihash(block)
+    return _varint(1) + _varint(codec) + sha256_multihash(block)
+
+def cid_to_string(cid: bytes) -> str:
+    """Canonical text form: base58btc for CIDv0, multibase base32 ('b...') for CIDv1"""
+    if cid[0] == SHA2_256:
+        return base58btc(cid)
+    return "b" + base64.b32encode(cid).decode().rstrip("=").lower()
+
+def parse_cid(text: str) -> Optional[bytes]:
+    """Binary form of a CIDv0 (Qm...) or base32 CIDv1 (b...) string, None if it is not one"""
+    try:
+        if text.startswith("Qm") and len(text) == 46:
+            cid = base58btc_decode(text)
+            return cid if len(cid) == 34 and cid[:2] == bytes((SHA2_256, 32)) else None
+        if text.startswith("b") and text[1:].islower() and text[1:].isalnum():
+            encoded = text[1:].upper()
+            cid = base64.b32decode(encoded + "=" * (-len(encoded) % 8))
+            # Version 1, a one-byte codec and a multihash whose length matches the rest
+            if len(cid) > 4 and cid[0] == 1 and cid[1] < 0x80 and cid[3] < 0x80 and len(cid) == 4 + cid[3]:
+                return cid
+    except ValueError:
+        pass
+    return None
+
+def cid_codec(cid: bytes) -> int:
+    return CODEC_DAG_PB if cid[0] == SHA2_256 else cid[1]
+
+def unixfs_data(data: Optional[bytes], filesize: int, blocksizes: List[int] = ()) -> bytes:
+    """UnixFS Data message of a File node"""
+    encoded = _field_varint(1, UNIXFS_FILE)
+    if data:
+        encoded += _field_bytes(2, data)
+    encoded += _field_varint(3, filesize)
+    for blocksize in blocksizes:
+        encoded += _field_varint(4, blocksize)
+    return encoded
+
+def dag_pb_node(links: List[Tuple[bytes, int]], data: bytes) -> bytes:
+    """dag-pb PBNode: links (binary CID, cumulative size) with empty names, then data"""
+    encoded = b""
+    for link_hash, tsize in links:
+        link = _field_bytes(1, link_hash) + _field_bytes(2, b"") + _field_varint(3, tsize)
+        encoded += _field_bytes(2, link)
+    return encoded + _field_bytes(1, data)
+
+class UnixFSBuilder:
+    """Feed bytes with update(); finalize() returns the root CID"""
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, max_links: int = DEFAULT_MAX_LINKS,
+                 on_block: Callable[[bytes, bytes], None] = None, cid_version: int = 0,
+                 raw_leaves: bool = None):
+        self.chunk_size = chunk_size
+        self.max_links = max_links
+        self.cid_version = cid_version
+        # Raw leaves need CIDv1; like `ipfs add`, CIDv1 uses them unless told otherwise
+        self.raw_leaves = cid_version == 1 if raw_leaves is None else raw_leaves
+        if self.raw_leaves and cid_version == 0:
+            raise ValueError("Raw leaves require CIDv1")
+        # Called with (binary CID, block bytes) for every block of the DAG
+        self.on_block = on_block
+        self._buffer = bytearray()
+        # Per tree level: pending (binary CID, cumulative size, file bytes) of finished nodes
+        self._levels: List[List[Tuple[bytes, int, int]]] = [[]]
+        self.size = 0
+        self.blocks = 0
+
+    def update(self, data: bytes):
+        view = memoryview(data)
+        self.size += len(view)
+        if self._buffer:
+            fill = self.chunk_size - len(self._buffer)
+            self._buffer += view[:fill]
+            view = view[fill:]
+            if len(self._buffer) < self.chunk_size:
+                return
+            self._add_leaf(bytes(self._buffer))
+            self._buffer.clear()
+        # Whole chunks are hashed straight from the input, without a copy through the buffer
+        while len(view) >= self.chunk_size:
+            self._add_leaf(view[:self.chunk_size])
+            view = view[self.chunk_size:]
+        self._buffer += view
+
+    def finalize(self) -> str:
+        """Root CID of everything fed so far"""
+        if self._buffer or not self._levels[0] and len(self._levels) == 1:
+            self._add_leaf(bytes(self._buffer))
+            self._buffer.clear()
+
+        level = 0
+        while True:
+            is_top = all(not pending for pending in self._levels[level + 1:])
+            nodes = self._levels[level]
+            if is_top and len(nodes) == 1:
+                return cid_to_string(nodes[0][0])
+            if nodes:
+                self._push(level + 1, self._parent(nodes))
+                self._levels[level] = []
+            level += 1
+
+    def _add_leaf(self, chunk: bytes):
+        if self.raw_leaves:
+            self._push(0, (self._emit(chunk, CODEC_RAW), len(chunk), len(chunk)))
+        else:
+            block = dag_pb_node([], unixfs_data(chunk, len(chunk)))
+            self._push(0, (self._emit(block, CODEC_DAG_PB), len(block), len(chunk)))
+
+    def _push(self, level: int, node: Tuple[bytes, int, int]):
+        if level == len(self._levels):
+            self._levels.append([])
+        pending = self._levels[level]
+        if len(pending) == self.max_links:
+            # Level is full and more data follows: close it as a complete subtree
+            self._levels[level] = []
+            self._push(level + 1, self._parent(pending))
+            pending = self._levels[level]
+        pending.append(node)
+
+    def _parent(self, children: List[Tuple[bytes, int, int]]) -> Tuple[bytes, int, int]:
+        filesize = sum(child[2] for child in children)
+        block = dag_pb_node([(child[0], child[1]) for child in children],
+                            unixfs_data(None, filesize, [child[2] for child in children]))
+        return self._emit(block, CODEC_DAG_PB), len(block) + sum(child[1] for child in children), filesize
+
+    def _emit(self, block: bytes, codec: int) -> bytes:
+        cid = binary_cid(block, codec, self.cid_version)
+        self.blocks += 1
+        if self.on_block is not None:
+            self.on_block(cid, bytes(block))
+        return cid
+
+def compute_cid(data: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE, cid_version: int = 0) -> str:
+    """CID `ipfs add` (with --cid-version) would assign to data"""
+    builder = UnixFSBuilder(chunk_size, cid_version=cid_version)
+    builder.update(data)
+    return builder.finalize()
+
+class BlockPusher:
+    """
+    Uploads DAG blocks through put_block(cid, block) with bounded concurrency;
+    submit() waits for a free slot, so blocks in flight stay bounded as well
+    """
+
+    def __init__(self, put_block: Callable[[bytes, bytes], Awaitable], concurrency: int = 8):
+        self.put_block = put_block
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+        self._error: Optional[BaseException] = None
+        self.pushed = 0
+
+    async def submit(self, cid: bytes, block: bytes):
+        if self._error is not None:
+            raise self._error
+        await self._slots.acquire()
+        task = asyncio.create_task(self._put(cid, block))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _put(self, cid: bytes, block: bytes):
+        try:
+            await self.put_block(cid, block)
+            self.pushed += 1
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+        finally:
+            self._slots.release()
+
+    async def drain(self):
+        """Wait for every submitted block; re-raises the first failed push"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+        if self._error is not None:
+            raise self._error
+
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
@@ -160,7 +160,7 @@ class PrivaChainTester:
             for query_data in search_queries:
                 async with self.session.post(f"{BASE_URL}/search", json=query_data) as response:
                     if response.status == 200:
-                        data = await response.json()
+                        data = (await response.json()).get("results")
                         if isinstance(data, list):
                             self.log_result(f"Search ({query_data['search_type']})", True, 
                                           f"Found {len(data)} results for '{query_data['query']}'", {
@@ -476,7 +476,7 @@ class PrivaChainTester:
             for query_data in search_queries:
                 async with self.session.post(f"{BASE_URL}/search", json=query_data) as response:
                     if response.status == 200:
-                        results = await response.json()
+                        results = (await response.json()).get("results")
                         
                         if isinstance(results, list):
                             # Check if search was processed with privacy features
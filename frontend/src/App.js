@@ -316,8 +316,8 @@ const PrivaChainBrowser = () => {
           limit: 10
         });
         
-        // Combine and deduplicate results
-        const combinedResults = [...results, ...backendResponse.data];
+        // Combine and deduplicate results (backend may return partial results if a source timed out)
+        const combinedResults = [...results, ...backendResponse.data.results];
         const uniqueResults = combinedResults.filter((result, index, self) =>
           index === self.findIndex(r => r.url === result.url)
         );
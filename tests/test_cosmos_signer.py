@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import hmac
+
+import coincurve
+import pytest
+
+from services.cosmos_signer import CosmosSigner, bech32_encode, canonical_json, sign_doc_bytes
+
+SECP256K1_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+HARDENED = 0x80000000
+
+# (mnemonic, expected address at m/44'/118'/0'/0/0)
+MNEMONIC_VECTORS = [
+    ("abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about",
+     "cosmos19rl4cm2hmr8afy4kldpxz3fka4jguq0auqdal4"),
+]
+
+# BIP-173 bech32 vectors whose data is whole bytes: (hrp, data hex, expected encoding)
+BECH32_VECTORS = [
+    ("a", "", "a12uel5l"),
+    ("abcdef", "00443214c74254b635cf84653a56d7c675be77df", "abcdef1qpzry9x8gf2tvdw0s3jn54khce6mua7lmqqqxw"),
+    ("split", "c5f38b70305f519bf66d85fb6cf03058f3dde463ecd7918f2dc743918f2d",
+     "split1checkupstagehandshakeupstreamerranterredcaperred2y9e3w"),
+]
+
+
+def derive_private_key(mnemonic: str, path=(44 | HARDENED, 118 | HARDENED, HARDENED, 0, 0)) -> bytes:
+    """BIP-39 seed and BIP-32 derivation, enough to reproduce wallet addresses"""
+    seed = hashlib.pbkdf2_hmac('sha512', mnemonic.encode(), b'mnemonic', 2048)
+    digest = hmac.new(b'Bitcoin seed', seed, hashlib.sha512).digest()
+    key, chain_code = digest[:32], digest[32:]
+    for index in path:
+        if index & HARDENED:
+            data = b'\x00' + key + index.to_bytes(4, 'big')
+        else:
+            data = coincurve.PrivateKey(key).public_key.format(compressed=True) + index.to_bytes(4, 'big')
+        digest = hmac.new(chain_code, data, hashlib.sha512).digest()
+        key = ((int.from_bytes(digest[:32], 'big') + int.from_bytes(key, 'big')) % SECP256K1_ORDER).to_bytes(32, 'big')
+        chain_code = digest[32:]
+    return key
+
+
+@pytest.fixture
+def signer():
+    signer = CosmosSigner(derive_private_key(MNEMONIC_VECTORS[0][0]).hex())
+    yield signer
+    signer.shutdown()
+
+
+@pytest.mark.parametrize("mnemonic,address", MNEMONIC_VECTORS)
+def test_address_matches_wallet(mnemonic, address):
+    assert CosmosSigner(derive_private_key(mnemonic).hex()).address == address
+
+
+@pytest.mark.parametrize("hrp,data,encoded", BECH32_VECTORS)
+def test_bech32_bip173(hrp, data, encoded):
+    assert bech32_encode(hrp, bytes.fromhex(data)) == encoded
+
+
+def test_sign_doc_bytes_is_canonical_json():
+    fee = {"amount": [{"denom": "uatom", "amount": "22500"}], "gas": "900000"}
+    msgs = [{"type": "privachain/RegisterContent", "value": {"content_hash": "Qm", "owner": "cosmos1ü"}}]
+    doc = sign_doc_bytes("theta-testnet-001", "42", "7", canonical_json(fee), canonical_json(msgs), "memo")
+    assert doc == canonical_json({
+        "account_number": "42", "chain_id": "theta-testnet-001", "fee": fee,
+        "memo": "memo", "msgs": msgs, "sequence": "7"
+    }).encode()
+
+
+def test_signatures_verify_and_are_low_s(signer):
+    doc = b'{"account_number":"42"}'
+    signature = signer.sign(doc)
+    assert len(signature) == 64
+    assert int.from_bytes(signature[32:], 'big') <= SECP256K1_ORDER // 2
+    assert signer.verify(signature, doc)
+    assert not signer.verify(signature, doc + b" ")
+
+
+def test_asign_matches_sign(signer):
+    doc = b'{"sequence":"1"}'
+    # RFC 6979 nonces make signatures deterministic, pooled or not
+    assert asyncio.run(signer.asign(doc)) == signer.sign(doc)
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from services.resolution_cache import ResolutionCache, UpstreamError
+
+
+def test_misses_are_cached():
+    cache = ResolutionCache(positive_ttl=60, negative_ttl=60)
+    calls = []
+
+    async def loader(key):
+        calls.append(key)
+        return None
+
+    async def run():
+        assert await cache.resolve("missing", loader) is None
+        assert await cache.resolve("missing", loader) is None
+
+    asyncio.run(run())
+    assert calls == ["missing"]
+    assert cache.stats['negative_hits'] == 1
+
+
+def test_upstream_errors_are_not_cached():
+    cache = ResolutionCache(positive_ttl=60, negative_ttl=60)
+    answers = [UpstreamError("rpc down"), {"content_hash": "Qm"}]
+
+    async def loader(key):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    async def run():
+        with pytest.raises(UpstreamError):
+            await cache.resolve("example", loader)
+        assert await cache.resolve("example", loader) == {"content_hash": "Qm"}
+
+    asyncio.run(run())
+    assert cache.stats['upstream_errors'] == 1
+    assert cache.stats['negative_hits'] == 0
+
+
+def test_upstream_error_reaches_every_waiting_caller():
+    cache = ResolutionCache(positive_ttl=60, negative_ttl=60)
+
+    async def loader(key):
+        await asyncio.sleep(0.01)
+        raise UpstreamError("rpc down")
+
+    async def run():
+        return await asyncio.gather(*(cache.resolve("example", loader) for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, UpstreamError) for result in results)
+    assert cache.stats['upstream_queries'] == 1
+    assert cache.get_stats()['entries'] == 0
@@ -0,0 +1,94 @@
+import os
+import secrets
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from services.privacy_service import (
+    IPFSEncryptionService, STREAM_HEADER_BYTES, STREAM_MAX_SEGMENT_BYTES, STREAM_TAG_BYTES
+)
+
+
+@pytest.fixture
+def encryption():
+    service = IPFSEncryptionService()
+    service.master_key = secrets.token_bytes(32)
+    return service
+
+
+def seal(encryption, data: bytes, segment_size: int, feed: int = 7777) -> bytes:
+    encryptor = encryption.stream_encryptor(segment_size)
+    sealed = encryptor.header
+    for offset in range(0, len(data), feed):
+        sealed += encryptor.update(data[offset:offset + feed])
+    return sealed + encryptor.finalize()
+
+
+def open_sealed(encryption, sealed: bytes, feed: int = 5000) -> bytes:
+    decryptor = encryption.stream_decryptor()
+    opened = b""
+    for offset in range(0, len(sealed), feed):
+        opened += decryptor.update(sealed[offset:offset + feed])
+    return opened + decryptor.finalize()
+
+
+@pytest.mark.parametrize("segment_size", [10, 65536])
+@pytest.mark.parametrize("size", [0, 1, 65536, 131072, 200001])
+def test_round_trip(encryption, segment_size, size):
+    data = os.urandom(size)
+    assert open_sealed(encryption, seal(encryption, data, segment_size)) == data
+
+
+def test_content_hash_covers_plaintext(encryption):
+    import hashlib
+    encryptor = encryption.stream_encryptor()
+    encryptor.update(b"hello ")
+    encryptor.update(b"world")
+    encryptor.finalize()
+    assert encryptor.content_hash == hashlib.sha256(b"hello world").hexdigest()
+
+
+def test_truncation_at_segment_boundary_is_rejected(encryption):
+    segment_size = 1024
+    sealed = seal(encryption, os.urandom(segment_size * 4 + 10), segment_size)
+    # Drop the final segment: the previous one was sealed as non-final
+    truncated = sealed[:STREAM_HEADER_BYTES + 4 * (segment_size + STREAM_TAG_BYTES)]
+    with pytest.raises(InvalidTag):
+        open_sealed(encryption, truncated)
+
+
+def test_reordered_segments_are_rejected(encryption):
+    segment_size = 1024
+    sealed = seal(encryption, os.urandom(segment_size * 3), segment_size)
+    sealed_size = segment_size + STREAM_TAG_BYTES
+    first = sealed[STREAM_HEADER_BYTES:STREAM_HEADER_BYTES + sealed_size]
+    second = sealed[STREAM_HEADER_BYTES + sealed_size:STREAM_HEADER_BYTES + 2 * sealed_size]
+    swapped = sealed[:STREAM_HEADER_BYTES] + second + first + sealed[STREAM_HEADER_BYTES + 2 * sealed_size:]
+    with pytest.raises(InvalidTag):
+        open_sealed(encryption, swapped)
+
+
+def test_tampered_ciphertext_is_rejected(encryption):
+    sealed = bytearray(seal(encryption, b"payload", 1024))
+    sealed[-STREAM_TAG_BYTES - 1] ^= 1
+    with pytest.raises(InvalidTag):
+        open_sealed(encryption, bytes(sealed))
+
+
+def test_not_a_stream(encryption):
+    with pytest.raises(ValueError):
+        open_sealed(encryption, b"{" + b"x" * 64)
+
+
+@pytest.mark.parametrize("segment_size", [0, STREAM_MAX_SEGMENT_BYTES + 1, 0xffffffff])
+def test_forged_segment_size_is_rejected_before_buffering(encryption, segment_size):
+    sealed = seal(encryption, b"payload", 1024)
+    forged = sealed[:4] + segment_size.to_bytes(4, 'big') + sealed[8:]
+    decryptor = encryption.stream_decryptor()
+    with pytest.raises(ValueError):
+        decryptor.update(forged[:STREAM_HEADER_BYTES])
+
+
+def test_encryptor_rejects_unbounded_segments(encryption):
+    with pytest.raises(ValueError):
+        encryption.stream_encryptor(STREAM_MAX_SEGMENT_BYTES + 1)
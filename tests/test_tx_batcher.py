@@ -0,0 +1,50 @@
+import asyncio
+
+from services.tx_batcher import TxBatcher
+
+
+def run_batch(submit_batch, msgs: int = 32):
+    async def run():
+        batcher = TxBatcher(submit_batch, max_msgs=msgs, max_wait_ms=1, retries=3, retry_backoff_ms=0)
+        results = await asyncio.gather(*(batcher.submit({"n": n}, "memo") for n in range(msgs)))
+        return batcher, results
+    return asyncio.run(run())
+
+
+def test_transport_failures_retry_then_fail_the_whole_batch():
+    calls = []
+
+    async def submit_batch(payloads, memo):
+        calls.append(len(payloads))
+        return {"success": False, "error": "Broadcast failed: 503"}
+
+    batcher, results = run_batch(submit_batch)
+    assert calls == [32] * 4
+    assert batcher.stats['splits'] == 0
+    assert batcher.stats['failed_msgs'] == 32
+    assert not any(result["success"] for result in results)
+
+
+def test_checktx_rejection_splits_down_to_the_bad_msg():
+    async def submit_batch(payloads, memo):
+        if any(payload["n"] == 5 for payload in payloads):
+            return {"success": False, "code": 4, "error": "unauthorized"}
+        return {"success": True, "tx_hash": f"tx{len(payloads)}"}
+
+    batcher, results = run_batch(submit_batch)
+    assert [n for n, result in enumerate(results) if not result["success"]] == [5]
+    assert batcher.stats['retries'] == 0
+    assert batcher.stats['failed_msgs'] == 1
+
+
+def test_sequence_mismatch_is_left_to_the_submit_function():
+    calls = []
+
+    async def submit_batch(payloads, memo):
+        calls.append(len(payloads))
+        return {"success": False, "code": 32, "error": "account sequence mismatch, expected 9, got 7"}
+
+    batcher, results = run_batch(submit_batch)
+    assert calls == [32]
+    assert batcher.stats['splits'] == 0
+    assert not any(result["success"] for result in results)
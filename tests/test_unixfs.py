@@ -0,0 +1,127 @@
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from services.unixfs import (
+    CODEC_DAG_PB, CODEC_RAW, DEFAULT_CHUNK_SIZE, DEFAULT_MAX_LINKS, UnixFSBuilder,
+    binary_cid, cid_to_string, compute_cid, dag_pb_node, parse_cid, unixfs_data
+)
+
+# CIDs `ipfs add` (Kubo) assigns to single-chunk inputs
+KUBO_VECTORS = [
+    (b"", 0, "QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH"),
+    (b"hello world", 0, "Qmf412jQZiuVUtdgnB36FXFX7xg5V6KEbSJ4dpQuhkLyfD"),
+    (b"hello world\n", 0, "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o"),
+    (b"", 1, "bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku"),
+    (b"hello world", 1, "bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e"),
+]
+
+# (chunk count, chunk size): the layout edges of a 174-link balanced DAG. The two-level
+# overflow case uses a small chunker so the input stays around 30 MB.
+LAYOUT_CASES = [
+    (0, DEFAULT_CHUNK_SIZE),
+    (1, DEFAULT_CHUNK_SIZE),
+    (DEFAULT_MAX_LINKS, DEFAULT_CHUNK_SIZE),
+    (DEFAULT_MAX_LINKS + 1, DEFAULT_CHUNK_SIZE),
+    (DEFAULT_MAX_LINKS * DEFAULT_MAX_LINKS + 1, 1024),
+]
+
+
+def sample(chunks: int, chunk_size: int) -> bytes:
+    # Distinct chunks, with a partial last chunk when there is more than one
+    size = chunks * chunk_size - (chunk_size // 3 if chunks > 1 else 0)
+    return random.Random(chunks).randbytes(size)
+
+
+def reference_cid(data: bytes, chunk_size: int, cid_version: int) -> str:
+    """
+    Top-down port of Kubo's balanced layout (boxo importer/balanced): the first leaf is
+    the root; while data remains, the root becomes the first child of a new root one
+    level deeper, which is filled with recursively filled subtrees.
+    """
+    chunks = [data[offset:offset + chunk_size] for offset in range(0, len(data), chunk_size)] or [b""]
+    position = 0
+
+    def leaf():
+        nonlocal position
+        chunk = chunks[position]
+        position += 1
+        if cid_version == 1:
+            return binary_cid(chunk, CODEC_RAW, 1), len(chunk), len(chunk)
+        block = dag_pb_node([], unixfs_data(chunk, len(chunk)))
+        return binary_cid(block, CODEC_DAG_PB, 0), len(block), len(chunk)
+
+    def parent(children):
+        block = dag_pb_node([(cid, tsize) for cid, tsize, _ in children],
+                            unixfs_data(None, sum(size for _, _, size in children), [size for _, _, size in children]))
+        return binary_cid(block, CODEC_DAG_PB, cid_version), len(block) + sum(tsize for _, tsize, _ in children), \
+            sum(size for _, _, size in children)
+
+    def fill(depth):
+        children = []
+        while len(children) < DEFAULT_MAX_LINKS and position < len(chunks):
+            children.append(leaf() if depth == 1 else fill(depth - 1))
+        return parent(children)
+
+    root, depth = leaf(), 1
+    while position < len(chunks):
+        children = [root]
+        while len(children) < DEFAULT_MAX_LINKS and position < len(chunks):
+            children.append(leaf() if depth == 1 else fill(depth - 1))
+        root, depth = parent(children), depth + 1
+    return cid_to_string(root[0])
+
+
+def expected_blocks(chunks: int) -> int:
+    blocks, level = max(chunks, 1), max(chunks, 1)
+    while level > 1:
+        level = -(-level // DEFAULT_MAX_LINKS)
+        blocks += level
+    return blocks
+
+
+@pytest.mark.parametrize("data,cid_version,cid", KUBO_VECTORS)
+def test_kubo_vectors(data, cid_version, cid):
+    assert compute_cid(data, cid_version=cid_version) == cid
+
+
+@pytest.mark.parametrize("cid_version", [0, 1])
+@pytest.mark.parametrize("chunks,chunk_size", LAYOUT_CASES)
+def test_streaming_builder_matches_balanced_layout(chunks, chunk_size, cid_version):
+    data = sample(chunks, chunk_size)
+    builder = UnixFSBuilder(chunk_size, cid_version=cid_version)
+    # Feed sizes that never line up with chunk boundaries
+    view, offset, step = memoryview(data), 0, 1
+    while offset < len(data):
+        builder.update(view[offset:offset + step])
+        offset += step
+        step = step * 3 + 1 if step < chunk_size * 4 else 7
+    cid = builder.finalize()
+
+    assert cid == reference_cid(data, chunk_size, cid_version)
+    assert builder.blocks == expected_blocks(chunks)
+    assert builder.size == len(data)
+    assert parse_cid(cid) is not None
+
+
+def test_on_block_reports_every_block_once():
+    data = sample(DEFAULT_MAX_LINKS + 1, 1024)
+    blocks = {}
+    builder = UnixFSBuilder(1024, cid_version=1, on_block=lambda cid, block: blocks.setdefault(cid, block))
+    builder.update(data)
+    root = parse_cid(builder.finalize())
+    assert root in blocks
+    for cid, block in blocks.items():
+        assert binary_cid(block, cid[1], 1) == cid
+
+
+@pytest.mark.skipif(shutil.which("ipfs") is None, reason="Kubo (ipfs) not installed")
+@pytest.mark.parametrize("cid_version", [0, 1])
+@pytest.mark.parametrize("chunks,chunk_size", LAYOUT_CASES)
+def test_matches_kubo(chunks, chunk_size, cid_version):
+    data = sample(chunks, chunk_size)
+    command = ["ipfs", "add", "--only-hash", "-Q", f"--cid-version={cid_version}", f"--chunker=size-{chunk_size}"]
+    kubo_cid = subprocess.run(command, input=data, capture_output=True, check=True).stdout.decode().strip()
+    assert compute_cid(data, chunk_size, cid_version=cid_version) == kubo_cid